@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class FitbitConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitbit'
+
+    def ready(self):
+        # PolarUser 저장/삭제 시 JWT 인증 사용자 캐시를 무효화하는 signal 등록
+        from . import authentication  # noqa: F401
+
+        # write-behind 큐 drainer를 웹 워커의 첫 요청에서 시작 (Polar 업로드가 오기 전에도 남은 큐 저장)
+        from .polar_queue import connect_drainer_signal
+        connect_drainer_signal()
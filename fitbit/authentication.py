@@ -1,13 +1,62 @@
 """
 모바일 앱용 JWT 인증 클래스
 PolarUser 모델을 사용하는 커스텀 인증
-"""
 
+인증된 요청마다 PolarUser를 조회하지 않도록 user_id별로 짧은 TTL 동안 프로세스 내에 캐시.
+같은 프로세스에서 PolarUser가 저장/삭제되면 signal로 즉시 무효화되고,
+다른 워커에서의 변경(비활성화 등)은 최대 TTL(POLAR_JWT_USER_CACHE_TTL초) 후 반영됨
+"""
+import copy
+import threading
+import time
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from fitbit.models import PolarUser
 
 
+_user_cache = {}  # user_id -> (만료 시각, PolarUser)
+_user_cache_lock = threading.Lock()
+
+
+def get_cached_polar_user(user_id):
+    """
+    PolarUser 조회 (TTL 캐시, 캐시에 없거나 만료되면 DB 조회)
+
+    요청마다 request.user를 수정/저장할 수 있으므로 캐시된 객체의 복사본을 반환
+
+    Raises:
+        PolarUser.DoesNotExist: 사용자가 없는 경우
+    """
+    ttl = getattr(settings, 'POLAR_JWT_USER_CACHE_TTL', 60)
+    now = time.monotonic()
+
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+    if cached is not None and cached[0] > now:
+        return copy.copy(cached[1])
+
+    user = PolarUser.objects.get(id=user_id)
+    if ttl > 0:
+        with _user_cache_lock:
+            _user_cache[user_id] = (now + ttl, user)
+    return copy.copy(user)
+
+
+def invalidate_polar_user(user_id):
+    """캐시에서 사용자 제거 (저장/비활성화/삭제 시)"""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+@receiver(post_save, sender=PolarUser)
+@receiver(post_delete, sender=PolarUser)
+def _invalidate_polar_user_cache(sender, instance, **kwargs):
+    invalidate_polar_user(instance.pk)
+
+
 class PolarJWTAuthentication(JWTAuthentication):
     """
     PolarUser 모델을 사용하는 JWT 인증 클래스
@@ -22,7 +71,7 @@ class PolarJWTAuthentication(JWTAuthentication):
             if user_id is None:
                 raise InvalidToken('Token contained no recognizable user identification')
 
-            user = PolarUser.objects.get(id=user_id)
+            user = get_cached_polar_user(user_id)
 
             if not user.is_active:
                 raise AuthenticationFailed('User is inactive')
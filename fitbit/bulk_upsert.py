@@ -0,0 +1,88 @@
+"""
+대량 upsert 함수 (INSERT ... ON CONFLICT DO UPDATE)
+
+save_* 함수들이 행마다 update_or_create를 호출하던 것을
+배치 단위의 bulk_create(update_conflicts=True)로 대체
+"""
+from django.conf import settings
+from django.db import transaction
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size(batch_size=None):
+    """
+    upsert 배치 크기 결정 (인자 > settings.FITBIT_BULK_BATCH_SIZE > 기본값)
+    """
+    if batch_size:
+        return batch_size
+    return getattr(settings, 'FITBIT_BULK_BATCH_SIZE', DEFAULT_BATCH_SIZE) or DEFAULT_BATCH_SIZE
+
+
+def _make_key(model, unique_fields, values):
+    """unique 필드 값을 DB에서 읽은 값과 비교 가능한 형태로 정규화"""
+    return tuple(
+        model._meta.get_field(field).to_python(value)
+        for field, value in zip(unique_fields, values)
+    )
+
+
+def _count_existing(model, unique_fields, keys):
+    """이미 DB에 존재하는 key 개수 조회 (배치당 SELECT 1회)"""
+    filters = {
+        f'{field}__in': {key[i] for key in keys}
+        for i, field in enumerate(unique_fields)
+    }
+    existing = model.objects.filter(**filters).values_list(*unique_fields)
+    return sum(1 for row in existing if _make_key(model, unique_fields, row) in keys)
+
+
+def bulk_upsert(model, rows, unique_fields, update_fields, batch_size=None):
+    """
+    여러 행을 한 번에 upsert (unique key 충돌 시 update_fields만 갱신)
+
+    Args:
+        model: Django 모델 클래스
+        rows: 필드명 -> 값 dict 리스트
+        unique_fields: 충돌 판단 기준 필드 (unique_together와 동일해야 함)
+        update_fields: 충돌 시 갱신할 필드
+        batch_size: 배치 크기 (없으면 settings.FITBIT_BULK_BATCH_SIZE)
+
+    Returns:
+        tuple: (생성된 레코드 수, 업데이트된 레코드 수)
+    """
+    # 같은 key가 한 배치에 두 번 들어가면 ON CONFLICT가 실패하므로 마지막 값만 유지
+    # (행마다 update_or_create 하던 기존 동작과 동일한 결과)
+    deduped = {}
+    for row in rows:
+        key = _make_key(model, unique_fields, [row[field] for field in unique_fields])
+        deduped[key] = row
+
+    if not deduped:
+        return 0, 0
+
+    batch_size = get_batch_size(batch_size)
+    items = list(deduped.items())
+    created_count = 0
+    updated_count = 0
+
+    with transaction.atomic():
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            keys = {key for key, _ in batch}
+
+            existing_count = _count_existing(model, unique_fields, keys)
+
+            model.objects.bulk_create(
+                [model(**row) for _, row in batch],
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            )
+
+            created_count += len(batch) - existing_count
+            updated_count += existing_count
+
+    return created_count, updated_count
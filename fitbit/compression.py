@@ -0,0 +1,183 @@
+"""
+압축된 요청 본문(Content-Encoding: gzip/deflate) 해제
+
+모바일 앱/Polar 업로드가 셀룰러망에서 큰 JSON 배열을 압축해서 보낼 수 있도록
+settings.COMPRESSED_REQUEST_PATHS로 시작하는 경로의 요청 본문을 view보다 먼저 압축 해제함.
+Polar 업로드는 본문 스트림을 view가 읽는 만큼만 풀어서 압축된 큰 배열도 스트리밍(JSONArrayStream)으로 처리함.
+압축 해제 후 크기는 읽는 동안 제한 (zip bomb 방지): Polar 업로드 경로는 settings.POLAR_MAX_BODY_SIZE,
+그 외 경로는 settings.MAX_DECOMPRESSED_BODY_SIZE
+"""
+import io
+import logging
+import zlib
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+POLAR_UPLOAD_PATH = '/data/polar/'
+
+# Content-Encoding -> zlib wbits (deflate는 zlib 헤더가 있는 형식, 없으면 raw deflate로 재시도)
+DECOMPRESS_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'x-gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+
+class DecompressionError(Exception):
+    """압축 해제 실패 (status: 응답 코드)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class DecompressingStream(io.RawIOBase):
+    """
+    압축된 요청 본문 스트림을 읽는 만큼만 압축 해제하는 스트림 (read(n) / request.body 모두 지원)
+
+    Raises (read 중):
+        DecompressionError: 지원하지 않는 인코딩(415), 손상된 본문(400), 크기 초과(413)
+    """
+
+    def __init__(self, stream, encoding, max_size, read_size=64 * 1024):
+        """
+        Args:
+            stream: 압축된 본문 스트림 (request._stream)
+            encoding: Content-Encoding 값 (gzip, x-gzip, deflate)
+            max_size: 압축 해제 후 최대 크기 (바이트)
+            read_size: 한 번에 읽을 압축된 본문 크기 (바이트)
+        """
+        super().__init__()
+        wbits = DECOMPRESS_WBITS.get(encoding)
+        if wbits is None:
+            raise DecompressionError(f'Unsupported Content-Encoding: {encoding}', status=415)
+        self.stream = stream
+        self.encoding = encoding
+        self.max_size = max_size
+        self.read_size = read_size
+        self.decompressor = None
+        self.wbits = wbits
+        self.pending = b''  # 압축 해제했지만 아직 돌려주지 않은 데이터
+        self.total = 0  # 지금까지 압축 해제한 크기
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def _decompress(self, chunk):
+        """압축된 조각 1개 해제 (deflate는 첫 조각이 zlib 형식이 아니면 raw deflate로 재시도)"""
+        if self.decompressor is None:
+            candidates = [self.wbits, -zlib.MAX_WBITS] if self.encoding == 'deflate' else [self.wbits]
+            for candidate in candidates:
+                decompressor = zlib.decompressobj(wbits=candidate)
+                try:
+                    data = decompressor.decompress(chunk, self.max_size - self.total + 1)
+                except zlib.error:
+                    continue
+                self.decompressor = decompressor
+                return data
+            raise DecompressionError(f'Invalid {self.encoding} body')
+
+        # 이전 조각에서 max_length 때문에 풀지 못한 입력(unconsumed_tail)을 먼저 처리
+        try:
+            return self.decompressor.decompress(
+                self.decompressor.unconsumed_tail + chunk, self.max_size - self.total + 1
+            )
+        except zlib.error:
+            raise DecompressionError(f'Invalid {self.encoding} body')
+
+    def _fill(self):
+        """pending이 빌 때까지 압축된 본문을 읽어 해제 (본문 끝이면 False)"""
+        while not self.pending and not self.eof:
+            if self.decompressor is not None and self.decompressor.eof:
+                # 압축 스트림 끝 이후의 데이터는 무시
+                self.eof = True
+                break
+            if self.decompressor is not None and self.decompressor.unconsumed_tail:
+                chunk = b''
+            else:
+                chunk = self.stream.read(self.read_size)
+                if not chunk:
+                    self.eof = True
+                    break
+
+            self.pending = self._decompress(chunk)
+            self.total += len(self.pending)
+            if self.total > self.max_size:
+                raise DecompressionError('Decompressed body too large', status=413)
+        return bool(self.pending)
+
+    def readinto(self, buffer):
+        if not self._fill():
+            return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        if hasattr(self.stream, 'close'):
+            self.stream.close()
+        super().close()
+
+
+def is_streaming_path(path):
+    """view가 본문을 스트리밍으로 읽는 경로 (Polar 업로드, JSONArrayStream)"""
+    return path.startswith(POLAR_UPLOAD_PATH)
+
+
+class RequestDecompressionMiddleware:
+    """
+    COMPRESSED_REQUEST_PATHS 경로의 압축된 요청 본문을 풀어서 view에 전달
+    (view와 DRF는 압축되지 않은 요청과 똑같이 request.body / request.read() / request.data 사용)
+
+    - Polar 업로드 경로: 본문 스트림을 DecompressingStream으로 바꿔 view가 읽는 만큼만 압축 해제
+      (압축 해제 후 크기를 미리 알 수 없으므로 CONTENT_LENGTH는 압축된 크기로 두고
+      request.compressed_body_encoding에 원래 Content-Encoding을 기록, 크기 제한은 POLAR_MAX_BODY_SIZE)
+    - 그 외 경로: view 실행 전에 MAX_DECOMPRESSED_BODY_SIZE까지 전부 압축 해제
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding and encoding != 'identity' and self._applies_to(request.path):
+            streaming = is_streaming_path(request.path)
+            if streaming:
+                max_size = getattr(settings, 'POLAR_MAX_BODY_SIZE', 50 * 1024 * 1024)
+            else:
+                max_size = getattr(settings, 'MAX_DECOMPRESSED_BODY_SIZE', 10 * 1024 * 1024)
+
+            try:
+                stream = DecompressingStream(request._stream, encoding, max_size)
+                body = None if streaming else stream.read()
+            except DecompressionError as e:
+                logger.warning(f"[DECOMPRESS] {request.path}: {str(e)}")
+                return JsonResponse({'status': 'error', 'message': str(e)}, status=e.status)
+
+            if streaming:
+                request._stream = stream
+                request.compressed_body_encoding = encoding
+            else:
+                request._body = body
+                request._stream = io.BytesIO(body)
+                request.META['CONTENT_LENGTH'] = str(len(body))
+            del request.META['HTTP_CONTENT_ENCODING']
+            request.__dict__.pop('headers', None)  # 이미 만들어진 request.headers 캐시 무효화
+
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        """view가 본문을 읽다가 압축 해제에 실패하면 400/413/415 응답"""
+        if isinstance(exception, DecompressionError):
+            logger.warning(f"[DECOMPRESS] {request.path}: {str(exception)}")
+            return JsonResponse({'status': 'error', 'message': str(exception)}, status=exception.status)
+        return None
+
+    @staticmethod
+    def _applies_to(path):
+        prefixes = getattr(settings, 'COMPRESSED_REQUEST_PATHS', ('/data/polar/', '/api/mobile/'))
+        return path.startswith(tuple(prefixes))
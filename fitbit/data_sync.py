@@ -1,15 +1,17 @@
 """
 Fitbit 데이터를 DB에 저장하는 함수들
 """
-from datetime import datetime
-from django.db import transaction
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils import timezone
 import pytz
 from .models import (
     DailySummary, IntradayHeartRate, IntradaySteps, IntradayCalories,
     IntradayDistance, IntradayFloors, IntradayElevation,
     IntradaySpO2, IntradayHRV,
-    SleepLog, BreathingRate, SkinTemperature
+    SleepLog, BreathingRate, SkinTemperature, IntradaySyncWatermark
 )
 from .fitbit_api import (
     get_fitbit_heart_rate_data,
@@ -24,8 +26,14 @@ from .fitbit_api import (
     get_sleep_data,
     get_breathing_rate_data,
     get_skin_temperature_data,
+    get_devices_data,
     get_date_range
 )
+from .bulk_upsert import bulk_upsert
+from .rate_limit import fitbit_rate_limiter
+
+
+KST = pytz.timezone('Asia/Seoul')
 
 
 def parse_datetime_kst(date_str, time_str):
@@ -44,11 +52,45 @@ def parse_datetime_kst(date_str, time_str):
     # naive datetime 생성
     dt_naive = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M:%S")
     # KST timezone으로 localize (Fitbit API는 사용자 타임존으로 반환)
-    kst = pytz.timezone('Asia/Seoul')
-    dt_kst = kst.localize(dt_naive)
+    dt_kst = KST.localize(dt_naive)
     return dt_kst
 
 
+@lru_cache(maxsize=86400)
+def _time_offset(time_str):
+    """HH:MM:SS -> 자정 기준 timedelta (하루 최대 1440개(1분 단위)라 캐시로 재사용)"""
+    return timedelta(hours=int(time_str[0:2]), minutes=int(time_str[3:5]), seconds=int(time_str[6:8]))
+
+
+def parse_dataset_datetimes(date_str, dataset, tz=None):
+    """
+    intraday dataset 전체의 시간을 한 번에 timezone aware datetime으로 변환
+
+    행마다 strptime + localize를 하지 않고 날짜의 자정을 한 번만 localize한 뒤
+    시간 문자열을 offset으로 더함 (KST는 서머타임이 없어 offset 계산이 정확함)
+
+    Args:
+        date_str: 날짜 (YYYY-MM-DD)
+        dataset: Fitbit API 응답의 dataset 리스트 ({'time': 'HH:MM:SS', 'value': ...})
+        tz: 타임존 (없으면 KST)
+
+    Returns:
+        list: [(datetime, item), ...] (time이 없는 항목은 제외)
+    """
+    tz = tz or KST
+    midnight = datetime.strptime(date_str, "%Y-%m-%d")
+    if hasattr(tz, 'localize'):
+        base = tz.localize(midnight)
+    else:
+        base = midnight.replace(tzinfo=tz)
+
+    return [
+        (base + _time_offset(item['time']), item)
+        for item in dataset
+        if item.get('time')
+    ]
+
+
 def save_daily_summary(fitbit_user_id, date, activity_data, heart_data):
     """
     일일 요약 데이터를 DB에 저장
@@ -60,7 +102,7 @@ def save_daily_summary(fitbit_user_id, date, activity_data, heart_data):
         heart_data: 심박수 데이터 (API 응답)
 
     Returns:
-        DailySummary 객체 또는 None
+        저장된 DailySummary 객체 또는 None
     """
     try:
         # 활동 데이터 파싱
@@ -99,38 +141,41 @@ def save_daily_summary(fitbit_user_id, date, activity_data, heart_data):
                         hr_zones['peak_min'] = zone.get('min', 0)
                         hr_zones['peak_max'] = zone.get('max', 0)
 
-        # DB에 저장 (update_or_create 사용)
-        daily_summary, created = DailySummary.objects.update_or_create(
-            fitbit_user_id=fitbit_user_id,
-            date=date,
-            defaults={
-                'steps': steps,
-                'distance': distance,
-                'calories': calories,
-                'resting_heart_rate': resting_hr,
-                'hr_zone_out_of_range_minutes': hr_zones.get('out_of_range_minutes'),
-                'hr_zone_fat_burn_minutes': hr_zones.get('fat_burn_minutes'),
-                'hr_zone_cardio_minutes': hr_zones.get('cardio_minutes'),
-                'hr_zone_peak_minutes': hr_zones.get('peak_minutes'),
-                'hr_zone_fat_burn_min_hr': hr_zones.get('fat_burn_min'),
-                'hr_zone_fat_burn_max_hr': hr_zones.get('fat_burn_max'),
-                'hr_zone_cardio_min_hr': hr_zones.get('cardio_min'),
-                'hr_zone_cardio_max_hr': hr_zones.get('cardio_max'),
-                'hr_zone_peak_min_hr': hr_zones.get('peak_min'),
-                'hr_zone_peak_max_hr': hr_zones.get('peak_max'),
-            }
+        # DB에 저장 (bulk upsert 사용)
+        defaults = {
+            'steps': steps,
+            'distance': distance,
+            'calories': calories,
+            'resting_heart_rate': resting_hr,
+            'hr_zone_out_of_range_minutes': hr_zones.get('out_of_range_minutes'),
+            'hr_zone_fat_burn_minutes': hr_zones.get('fat_burn_minutes'),
+            'hr_zone_cardio_minutes': hr_zones.get('cardio_minutes'),
+            'hr_zone_peak_minutes': hr_zones.get('peak_minutes'),
+            'hr_zone_fat_burn_min_hr': hr_zones.get('fat_burn_min'),
+            'hr_zone_fat_burn_max_hr': hr_zones.get('fat_burn_max'),
+            'hr_zone_cardio_min_hr': hr_zones.get('cardio_min'),
+            'hr_zone_cardio_max_hr': hr_zones.get('cardio_max'),
+            'hr_zone_peak_min_hr': hr_zones.get('peak_min'),
+            'hr_zone_peak_max_hr': hr_zones.get('peak_max'),
+        }
+        created, _ = bulk_upsert(
+            DailySummary,
+            [{'fitbit_user_id': fitbit_user_id, 'date': date, **defaults}],
+            unique_fields=['fitbit_user_id', 'date'],
+            update_fields=list(defaults) + ['updated_at'],
         )
 
         action = "생성" if created else "업데이트"
         print(f"[DailySummary] {fitbit_user_id} - {date} {action}")
-        return daily_summary
+        # upsert는 pk/created_at을 돌려주지 않으므로 저장된 행을 다시 조회해서 반환
+        return DailySummary.objects.get(fitbit_user_id=fitbit_user_id, date=date)
 
     except Exception as e:
         print(f"일일 요약 저장 중 오류: {e}")
         return None
 
 
-def save_intraday_heart_rate(fitbit_user_id, date, heart_data):
+def save_intraday_heart_rate(fitbit_user_id, date, heart_data, raise_errors=False):
     """
     1분 단위 심박수 데이터를 DB에 저장
 
@@ -138,6 +183,7 @@ def save_intraday_heart_rate(fitbit_user_id, date, heart_data):
         fitbit_user_id: Fitbit 사용자 ID
         date: 날짜 (YYYY-MM-DD)
         heart_data: 심박수 데이터 (API 응답)
+        raise_errors: True면 저장 오류를 0으로 삼키지 않고 다시 발생 (증분 동기화의 워터마크 판단용)
 
     Returns:
         저장된 레코드 수
@@ -149,39 +195,38 @@ def save_intraday_heart_rate(fitbit_user_id, date, heart_data):
     if not intraday_data:
         return 0
 
-    saved_count = 0
-
     try:
-        with transaction.atomic():
-            for item in intraday_data:
-                time_str = item.get('time')
-                heart_rate = item.get('value')
-
-                if not time_str or not heart_rate:
-                    continue
-
-                # datetime 생성 (UTC timezone aware)
-                dt = parse_datetime_kst(date, time_str)
-
-                # DB에 저장
-                _, created = IntradayHeartRate.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    datetime=dt,
-                    defaults={'heart_rate': heart_rate}
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for dt, item in parse_dataset_datetimes(date, intraday_data):
+            heart_rate = item.get('value')
+
+            if not heart_rate:
+                continue
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'datetime': dt,
+                'heart_rate': heart_rate
+            })
+
+        # DB에 저장 (bulk upsert)
+        saved_count, updated_count = bulk_upsert(
+            IntradayHeartRate, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['heart_rate']
+        )
 
-        print(f"[IntradayHeartRate] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[IntradayHeartRate] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
 
     except Exception as e:
         print(f"Intraday 심박수 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def save_intraday_steps(fitbit_user_id, date, steps_data):
+def save_intraday_steps(fitbit_user_id, date, steps_data, raise_errors=False):
     """
     1분 단위 걸음 수 데이터를 DB에 저장
 
@@ -189,6 +234,7 @@ def save_intraday_steps(fitbit_user_id, date, steps_data):
         fitbit_user_id: Fitbit 사용자 ID
         date: 날짜 (YYYY-MM-DD)
         steps_data: 걸음 수 데이터 (API 응답)
+        raise_errors: True면 저장 오류를 0으로 삼키지 않고 다시 발생 (증분 동기화의 워터마크 판단용)
 
     Returns:
         저장된 레코드 수
@@ -200,39 +246,35 @@ def save_intraday_steps(fitbit_user_id, date, steps_data):
     if not intraday_data:
         return 0
 
-    saved_count = 0
-
     try:
-        with transaction.atomic():
-            for item in intraday_data:
-                time_str = item.get('time')
-                steps = item.get('value', 0)
-
-                if not time_str:
-                    continue
-
-                # datetime 생성
-                dt = parse_datetime_kst(date, time_str)
-
-                # DB에 저장
-                _, created = IntradaySteps.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    datetime=dt,
-                    defaults={'steps': steps}
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for dt, item in parse_dataset_datetimes(date, intraday_data):
+            steps = item.get('value', 0)
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'datetime': dt,
+                'steps': steps
+            })
+
+        # DB에 저장 (bulk upsert)
+        saved_count, updated_count = bulk_upsert(
+            IntradaySteps, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['steps']
+        )
 
-        print(f"[IntradaySteps] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[IntradaySteps] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
 
     except Exception as e:
         print(f"Intraday 걸음 수 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def save_intraday_calories(fitbit_user_id, date, calories_data):
+def save_intraday_calories(fitbit_user_id, date, calories_data, raise_errors=False):
     """
     1분 단위 칼로리 데이터를 DB에 저장
 
@@ -240,6 +282,7 @@ def save_intraday_calories(fitbit_user_id, date, calories_data):
         fitbit_user_id: Fitbit 사용자 ID
         date: 날짜 (YYYY-MM-DD)
         calories_data: 칼로리 데이터 (API 응답)
+        raise_errors: True면 저장 오류를 0으로 삼키지 않고 다시 발생 (증분 동기화의 워터마크 판단용)
 
     Returns:
         저장된 레코드 수
@@ -251,45 +294,39 @@ def save_intraday_calories(fitbit_user_id, date, calories_data):
     if not intraday_data:
         return 0
 
-    saved_count = 0
-
     try:
-        with transaction.atomic():
-            for item in intraday_data:
-                time_str = item.get('time')
-                calories = item.get('value', 0)
-                level = item.get('level', 0)
-                mets = item.get('mets', 0)
-
-                if not time_str:
-                    continue
-
-                # datetime 생성
-                dt = parse_datetime_kst(date, time_str)
-
-                # DB에 저장
-                _, created = IntradayCalories.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    datetime=dt,
-                    defaults={
-                        'calories': calories,
-                        'level': level,
-                        'mets': mets
-                    }
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for dt, item in parse_dataset_datetimes(date, intraday_data):
+            calories = item.get('value', 0)
+            level = item.get('level', 0)
+            mets = item.get('mets', 0)
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'datetime': dt,
+                'calories': calories,
+                'level': level,
+                'mets': mets
+            })
+
+        # DB에 저장 (bulk upsert)
+        saved_count, updated_count = bulk_upsert(
+            IntradayCalories, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['calories', 'level', 'mets']
+        )
 
-        print(f"[IntradayCalories] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[IntradayCalories] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
 
     except Exception as e:
         print(f"Intraday 칼로리 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def save_intraday_distance(fitbit_user_id, date, distance_data):
+def save_intraday_distance(fitbit_user_id, date, distance_data, raise_errors=False):
     """
     1분 단위 거리 데이터를 DB에 저장
 
@@ -297,6 +334,7 @@ def save_intraday_distance(fitbit_user_id, date, distance_data):
         fitbit_user_id: Fitbit 사용자 ID
         date: 날짜 (YYYY-MM-DD)
         distance_data: 거리 데이터 (API 응답)
+        raise_errors: True면 저장 오류를 0으로 삼키지 않고 다시 발생 (증분 동기화의 워터마크 판단용)
 
     Returns:
         저장된 레코드 수
@@ -308,39 +346,35 @@ def save_intraday_distance(fitbit_user_id, date, distance_data):
     if not intraday_data:
         return 0
 
-    saved_count = 0
-
     try:
-        with transaction.atomic():
-            for item in intraday_data:
-                time_str = item.get('time')
-                distance = item.get('value', 0)
-
-                if not time_str:
-                    continue
-
-                # datetime 생성
-                dt = parse_datetime_kst(date, time_str)
-
-                # DB에 저장
-                _, created = IntradayDistance.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    datetime=dt,
-                    defaults={'distance': distance}
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for dt, item in parse_dataset_datetimes(date, intraday_data):
+            distance = item.get('value', 0)
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'datetime': dt,
+                'distance': distance
+            })
+
+        # DB에 저장 (bulk upsert)
+        saved_count, updated_count = bulk_upsert(
+            IntradayDistance, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['distance']
+        )
 
-        print(f"[IntradayDistance] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[IntradayDistance] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
 
     except Exception as e:
         print(f"Intraday 거리 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def save_intraday_floors(fitbit_user_id, date, floors_data):
+def save_intraday_floors(fitbit_user_id, date, floors_data, raise_errors=False):
     """
     1분 단위 층수 데이터를 DB에 저장
 
@@ -348,6 +382,7 @@ def save_intraday_floors(fitbit_user_id, date, floors_data):
         fitbit_user_id: Fitbit 사용자 ID
         date: 날짜 (YYYY-MM-DD)
         floors_data: 층수 데이터 (API 응답)
+        raise_errors: True면 저장 오류를 0으로 삼키지 않고 다시 발생 (증분 동기화의 워터마크 판단용)
 
     Returns:
         저장된 레코드 수
@@ -359,39 +394,35 @@ def save_intraday_floors(fitbit_user_id, date, floors_data):
     if not intraday_data:
         return 0
 
-    saved_count = 0
-
     try:
-        with transaction.atomic():
-            for item in intraday_data:
-                time_str = item.get('time')
-                floors = item.get('value', 0)
-
-                if not time_str:
-                    continue
-
-                # datetime 생성
-                dt = parse_datetime_kst(date, time_str)
-
-                # DB에 저장
-                _, created = IntradayFloors.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    datetime=dt,
-                    defaults={'floors': floors}
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for dt, item in parse_dataset_datetimes(date, intraday_data):
+            floors = item.get('value', 0)
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'datetime': dt,
+                'floors': floors
+            })
+
+        # DB에 저장 (bulk upsert)
+        saved_count, updated_count = bulk_upsert(
+            IntradayFloors, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['floors']
+        )
 
-        print(f"[IntradayFloors] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[IntradayFloors] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
 
     except Exception as e:
         print(f"Intraday 층수 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def save_intraday_elevation(fitbit_user_id, date, elevation_data):
+def save_intraday_elevation(fitbit_user_id, date, elevation_data, raise_errors=False):
     """
     1분 단위 고도 데이터를 DB에 저장
 
@@ -399,6 +430,7 @@ def save_intraday_elevation(fitbit_user_id, date, elevation_data):
         fitbit_user_id: Fitbit 사용자 ID
         date: 날짜 (YYYY-MM-DD)
         elevation_data: 고도 데이터 (API 응답)
+        raise_errors: True면 저장 오류를 0으로 삼키지 않고 다시 발생 (증분 동기화의 워터마크 판단용)
 
     Returns:
         저장된 레코드 수
@@ -410,53 +442,83 @@ def save_intraday_elevation(fitbit_user_id, date, elevation_data):
     if not intraday_data:
         return 0
 
-    saved_count = 0
-
     try:
-        with transaction.atomic():
-            for item in intraday_data:
-                time_str = item.get('time')
-                elevation = item.get('value', 0)
-
-                if not time_str:
-                    continue
-
-                # datetime 생성
-                dt = parse_datetime_kst(date, time_str)
-
-                # DB에 저장
-                _, created = IntradayElevation.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    datetime=dt,
-                    defaults={'elevation': elevation}
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for dt, item in parse_dataset_datetimes(date, intraday_data):
+            elevation = item.get('value', 0)
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'datetime': dt,
+                'elevation': elevation
+            })
+
+        # DB에 저장 (bulk upsert)
+        saved_count, updated_count = bulk_upsert(
+            IntradayElevation, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['elevation']
+        )
 
-        print(f"[IntradayElevation] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[IntradayElevation] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
 
     except Exception as e:
         print(f"Intraday 고도 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def sync_fitbit_data_for_date(fitbit_user_id, access_token, date, start_time=None, end_time=None):
+def fetch_fitbit_data_for_date(access_token, date, start_time=None, end_time=None, max_workers=None):
     """
-    특정 날짜의 Fitbit 데이터를 API에서 가져와 DB에 저장
+    특정 날짜의 엔드포인트별 Fitbit 데이터를 병렬로 가져오기
+    (요청들이 서로 독립적이므로 전체 지연 시간이 가장 느린 요청 하나 수준으로 줄어듦)
 
     Args:
-        fitbit_user_id: Fitbit 사용자 ID
         access_token: Fitbit access token
         date: 날짜 (YYYY-MM-DD)
         start_time: 시작 시간 (HH:MM 형식, 선택)
         end_time: 종료 시간 (HH:MM 형식, 선택)
+        max_workers: 동시 요청 수 (없으면 settings.FITBIT_SYNC_FETCH_WORKERS)
 
     Returns:
-        dict: 동기화 결과 (성공 여부, 저장된 레코드 수 등)
+        dict: 데이터 종류 -> API 응답 (실패 시 None)
+              시간 범위 지정 시 activity, sleep, breathing_rate, skin_temperature는 요청하지 않음
     """
-    result = {
+    requests_to_fetch = {
+        'heart': (get_fitbit_heart_rate_data, (access_token, date, start_time, end_time)),
+        'steps': (get_steps_intraday_data, (access_token, date, start_time, end_time)),
+        'calories': (get_calories_intraday_data, (access_token, date, start_time, end_time)),
+        'distance': (get_distance_intraday_data, (access_token, date, start_time, end_time)),
+        'floors': (get_floors_intraday_data, (access_token, date, start_time, end_time)),
+        'elevation': (get_elevation_intraday_data, (access_token, date, start_time, end_time)),
+        'spo2': (get_spo2_intraday_data, (access_token, date, start_time, end_time)),
+        'hrv': (get_hrv_intraday_data, (access_token, date, start_time, end_time)),
+    }
+
+    # 일일 요약/수면 관련 데이터는 하루 전체 동기화 시에만 저장하므로 그때만 요청
+    if not start_time:
+        requests_to_fetch.update({
+            'activity': (get_activity_data, (access_token, date)),
+            'sleep': (get_sleep_data, (access_token, date)),
+            'breathing_rate': (get_breathing_rate_data, (access_token, date)),
+            'skin_temperature': (get_skin_temperature_data, (access_token, date)),
+        })
+
+    max_workers = max_workers or getattr(settings, 'FITBIT_SYNC_FETCH_WORKERS', 12)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(requests_to_fetch))) as executor:
+        futures = {
+            key: executor.submit(func, *args)
+            for key, (func, args) in requests_to_fetch.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+
+def new_sync_result(date):
+    """sync_fitbit_data_for_date가 반환하는 결과 dict 초기값"""
+    return {
         'date': date,
         'success': False,
         'daily_summary': False,
@@ -474,61 +536,106 @@ def sync_fitbit_data_for_date(fitbit_user_id, access_token, date, start_time=Non
         'error': None
     }
 
-    try:
-        # API에서 데이터 가져오기
-        activity_data = get_activity_data(access_token, date)
-        heart_data = get_fitbit_heart_rate_data(access_token, date, start_time, end_time)
-        steps_data = get_steps_intraday_data(access_token, date, start_time, end_time)
-        calories_data = get_calories_intraday_data(access_token, date, start_time, end_time)
-        distance_data = get_distance_intraday_data(access_token, date, start_time, end_time)
-        floors_data = get_floors_intraday_data(access_token, date, start_time, end_time)
-        elevation_data = get_elevation_intraday_data(access_token, date, start_time, end_time)
-        spo2_data = get_spo2_intraday_data(access_token, date, start_time, end_time)
-        hrv_data = get_hrv_intraday_data(access_token, date, start_time, end_time)
 
-        # 일일 요약 저장 (시간 범위 지정 시에는 스킵)
-        if activity_data and not start_time:
-            summary = save_daily_summary(fitbit_user_id, date, activity_data, heart_data)
-            result['daily_summary'] = summary is not None
+def save_fitbit_data_for_date(fitbit_user_id, date, fetched, start_time=None, result=None):
+    """
+    fetch_fitbit_data_for_date로 가져온 응답들을 DB에 저장
 
-        # Intraday 데이터 저장
-        if heart_data:
-            result['intraday_hr'] = save_intraday_heart_rate(fitbit_user_id, date, heart_data)
+    Args:
+        fitbit_user_id: Fitbit 사용자 ID
+        date: 날짜 (YYYY-MM-DD)
+        fetched: 데이터 종류 -> API 응답 dict
+        start_time: 시작 시간 (지정 시 일일 요약/수면 관련 데이터는 스킵)
+        result: 저장 결과를 기록할 dict (없으면 새로 생성)
 
-        if steps_data:
-            result['intraday_steps'] = save_intraday_steps(fitbit_user_id, date, steps_data)
+    Returns:
+        dict: 저장된 레코드 수가 기록된 result
+    """
+    if result is None:
+        result = new_sync_result(date)
+
+    activity_data = fetched.get('activity')
+    heart_data = fetched.get('heart')
+    steps_data = fetched.get('steps')
+    calories_data = fetched.get('calories')
+    distance_data = fetched.get('distance')
+    floors_data = fetched.get('floors')
+    elevation_data = fetched.get('elevation')
+    spo2_data = fetched.get('spo2')
+    hrv_data = fetched.get('hrv')
+
+    # 일일 요약 저장 (시간 범위 지정 시에는 스킵)
+    if activity_data and not start_time:
+        summary = save_daily_summary(fitbit_user_id, date, activity_data, heart_data)
+        result['daily_summary'] = summary is not None
+
+    # Intraday 데이터 저장
+    if heart_data:
+        result['intraday_hr'] = save_intraday_heart_rate(fitbit_user_id, date, heart_data)
 
-        if calories_data:
-            result['intraday_calories'] = save_intraday_calories(fitbit_user_id, date, calories_data)
+    if steps_data:
+        result['intraday_steps'] = save_intraday_steps(fitbit_user_id, date, steps_data)
 
-        if distance_data:
-            result['intraday_distance'] = save_intraday_distance(fitbit_user_id, date, distance_data)
+    if calories_data:
+        result['intraday_calories'] = save_intraday_calories(fitbit_user_id, date, calories_data)
 
-        if floors_data:
-            result['intraday_floors'] = save_intraday_floors(fitbit_user_id, date, floors_data)
+    if distance_data:
+        result['intraday_distance'] = save_intraday_distance(fitbit_user_id, date, distance_data)
 
-        if elevation_data:
-            result['intraday_elevation'] = save_intraday_elevation(fitbit_user_id, date, elevation_data)
+    if floors_data:
+        result['intraday_floors'] = save_intraday_floors(fitbit_user_id, date, floors_data)
 
-        if spo2_data:
-            result['intraday_spo2'] = save_intraday_spo2(fitbit_user_id, date, spo2_data)
+    if elevation_data:
+        result['intraday_elevation'] = save_intraday_elevation(fitbit_user_id, date, elevation_data)
+
+    if spo2_data:
+        result['intraday_spo2'] = save_intraday_spo2(fitbit_user_id, date, spo2_data)
+
+    if hrv_data:
+        result['intraday_hrv'] = save_intraday_hrv(fitbit_user_id, date, hrv_data)
+
+    # 수면 관련 데이터 저장 (시간 범위 지정 시에는 스킵)
+    if not start_time:
+        sleep_data = fetched.get('sleep')
+        if sleep_data:
+            result['sleep_logs'] = save_sleep_log(fitbit_user_id, date, sleep_data)
 
-        if hrv_data:
-            result['intraday_hrv'] = save_intraday_hrv(fitbit_user_id, date, hrv_data)
+        br_data = fetched.get('breathing_rate')
+        if br_data:
+            result['breathing_rate'] = save_breathing_rate(fitbit_user_id, date, br_data)
 
-        # 수면 관련 데이터 저장 (시간 범위 지정 시에는 스킵)
-        if not start_time:
-            sleep_data = get_sleep_data(access_token, date)
-            if sleep_data:
-                result['sleep_logs'] = save_sleep_log(fitbit_user_id, date, sleep_data)
+        temp_data = fetched.get('skin_temperature')
+        if temp_data:
+            result['skin_temperature'] = save_skin_temperature(fitbit_user_id, date, temp_data)
 
-            br_data = get_breathing_rate_data(access_token, date)
-            if br_data:
-                result['breathing_rate'] = save_breathing_rate(fitbit_user_id, date, br_data)
+    return result
 
-            temp_data = get_skin_temperature_data(access_token, date)
-            if temp_data:
-                result['skin_temperature'] = save_skin_temperature(fitbit_user_id, date, temp_data)
+
+def sync_fitbit_data_for_date(fitbit_user_id, access_token, date, start_time=None, end_time=None):
+    """
+    특정 날짜의 Fitbit 데이터를 API에서 가져와 DB에 저장
+
+    Args:
+        fitbit_user_id: Fitbit 사용자 ID
+        access_token: Fitbit access token
+        date: 날짜 (YYYY-MM-DD)
+        start_time: 시작 시간 (HH:MM 형식, 선택)
+        end_time: 종료 시간 (HH:MM 형식, 선택)
+
+    Returns:
+        dict: 동기화 결과 (성공 여부, 저장된 레코드 수 등)
+    """
+    result = new_sync_result(date)
+
+    # 토큰이 갱신되어도 같은 사용자의 Rate Limit 예산으로 집계되도록 연결
+    fitbit_rate_limiter.bind(fitbit_user_id, access_token)
+
+    try:
+        # API에서 데이터 가져오기 (엔드포인트별 요청을 병렬로 실행)
+        fetched = fetch_fitbit_data_for_date(access_token, date, start_time, end_time)
+
+        # DB에 저장
+        save_fitbit_data_for_date(fitbit_user_id, date, fetched, start_time, result)
 
         result['success'] = True
         time_range = f" ({start_time}-{end_time})" if start_time else ""
@@ -554,13 +661,7 @@ def sync_fitbit_data_range(fitbit_user_id, access_token, days_back=7):
         list: 각 날짜별 동기화 결과 리스트
     """
     dates = get_date_range(days_back)
-    results = []
-
-    for date in dates:
-        result = sync_fitbit_data_for_date(fitbit_user_id, access_token, date)
-        results.append(result)
-
-    return results
+    return sync_fitbit_data_date_range(fitbit_user_id, access_token, min(dates), max(dates))
 
 
 def sync_recent_intraday_data(fitbit_user_id, access_token, minutes_back=5):
@@ -608,151 +709,391 @@ def sync_recent_intraday_data(fitbit_user_id, access_token, minutes_back=5):
     )
 
 
-def save_intraday_spo2(fitbit_user_id, date, spo2_data):
+def save_intraday_spo2(fitbit_user_id, date, spo2_data, raise_errors=False):
     """SpO2 데이터를 DB에 저장"""
     if not spo2_data:
         return 0
 
-    saved_count = 0
     try:
-        with transaction.atomic():
-            # SpO2 데이터는 리스트 형식일 수 있음
-            if isinstance(spo2_data, list):
-                # 리스트의 첫 번째 항목에서 minutes 추출
-                for day_data in spo2_data:
-                    if 'minutes' in day_data:
-                        for item in day_data['minutes']:
-                            minute = item.get('minute')
-                            value = item.get('value')
-
-                            if not minute or value is None:
-                                continue
-
-                            dt = datetime.fromisoformat(minute.replace('Z', '+00:00'))
-
-                            _, created = IntradaySpO2.objects.update_or_create(
-                                fitbit_user_id=fitbit_user_id,
-                                datetime=dt,
-                                defaults={'spo2': value}
-                            )
-
-                            if created:
-                                saved_count += 1
-            elif 'minutes' in spo2_data:
-                # dict 형식인 경우
-                for item in spo2_data['minutes']:
-                    minute = item.get('minute')
-                    value = item.get('value')
-
-                    if not minute or value is None:
-                        continue
-
-                    dt = datetime.fromisoformat(minute.replace('Z', '+00:00'))
-
-                    _, created = IntradaySpO2.objects.update_or_create(
-                        fitbit_user_id=fitbit_user_id,
-                        datetime=dt,
-                        defaults={'spo2': value}
-                    )
-
-                    if created:
-                        saved_count += 1
-
-        print(f"[IntradaySpO2] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        # SpO2 데이터는 리스트 형식일 수 있음
+        if isinstance(spo2_data, list):
+            day_list = spo2_data
+        elif 'minutes' in spo2_data:
+            # dict 형식인 경우
+            day_list = [spo2_data]
+        else:
+            day_list = []
+
+        rows = []
+        for day_data in day_list:
+            for item in day_data.get('minutes', []):
+                minute = item.get('minute')
+                value = item.get('value')
+
+                if not minute or value is None:
+                    continue
+
+                dt = datetime.fromisoformat(minute.replace('Z', '+00:00'))
+
+                rows.append({
+                    'fitbit_user_id': fitbit_user_id,
+                    'datetime': dt,
+                    'spo2': value
+                })
+
+        saved_count, updated_count = bulk_upsert(
+            IntradaySpO2, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['spo2']
+        )
+
+        print(f"[IntradaySpO2] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
     except Exception as e:
         print(f"Intraday SpO2 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         import traceback
         traceback.print_exc()
         return 0
 
 
-def save_intraday_hrv(fitbit_user_id, date, hrv_data):
+def save_intraday_hrv(fitbit_user_id, date, hrv_data, raise_errors=False):
     """HRV 데이터를 DB에 저장"""
     if not hrv_data or 'hrv' not in hrv_data:
         return 0
-    
-    saved_count = 0
+
     try:
-        with transaction.atomic():
-            for item in hrv_data['hrv']:
-                minutes = item.get('minutes', [])
-                
-                for minute_data in minutes:
-                    minute = minute_data.get('minute')
-                    value = minute_data.get('value', {})
-                    
-                    if not minute:
-                        continue
-                    
-                    dt = datetime.fromisoformat(minute.replace('Z', '+00:00'))
-                    
-                    _, created = IntradayHRV.objects.update_or_create(
-                        fitbit_user_id=fitbit_user_id,
-                        datetime=dt,
-                        defaults={
-                            'rmssd': value.get('rmssd', 0),
-                            'coverage': value.get('coverage'),
-                            'hf': value.get('hf'),
-                            'lf': value.get('lf')
-                        }
-                    )
-                    
-                    if created:
-                        saved_count += 1
-        
-        print(f"[IntradayHRV] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        rows = []
+        for item in hrv_data['hrv']:
+            minutes = item.get('minutes', [])
+
+            for minute_data in minutes:
+                minute = minute_data.get('minute')
+                value = minute_data.get('value', {})
+
+                if not minute:
+                    continue
+
+                dt = datetime.fromisoformat(minute.replace('Z', '+00:00'))
+
+                rows.append({
+                    'fitbit_user_id': fitbit_user_id,
+                    'datetime': dt,
+                    'rmssd': value.get('rmssd', 0),
+                    'coverage': value.get('coverage'),
+                    'hf': value.get('hf'),
+                    'lf': value.get('lf')
+                })
+
+        saved_count, updated_count = bulk_upsert(
+            IntradayHRV, rows,
+            unique_fields=['fitbit_user_id', 'datetime'],
+            update_fields=['rmssd', 'coverage', 'hf', 'lf']
+        )
+
+        print(f"[IntradayHRV] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
     except Exception as e:
         print(f"Intraday HRV 저장 중 오류: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
+# 증분 동기화 대상 (분 단위 시간 범위 조회가 가능한 데이터)
+# 데이터 종류 -> (조회 함수, 저장 함수, 응답 key, 결과 dict key)
+INCREMENTAL_METRICS = {
+    'heart': (get_fitbit_heart_rate_data, save_intraday_heart_rate, 'activities-heart-intraday', 'intraday_hr'),
+    'steps': (get_steps_intraday_data, save_intraday_steps, 'activities-steps-intraday', 'intraday_steps'),
+    'calories': (get_calories_intraday_data, save_intraday_calories, 'activities-calories-intraday', 'intraday_calories'),
+    'distance': (get_distance_intraday_data, save_intraday_distance, 'activities-distance-intraday', 'intraday_distance'),
+    'floors': (get_floors_intraday_data, save_intraday_floors, 'activities-floors-intraday', 'intraday_floors'),
+    'elevation': (get_elevation_intraday_data, save_intraday_elevation, 'activities-elevation-intraday', 'intraday_elevation'),
+}
+
+
+def split_by_day(start_dt, end_dt):
+    """
+    KST 시간 범위를 날짜별 구간으로 분할 (자정을 넘는 범위 처리)
+
+    여러 날짜를 한 번에 조회하면 응답의 dataset에 시간만 있고 날짜가 없으므로
+    하루 단위로 나누어 각각 같은 날짜의 범위 엔드포인트(date/{d}/{d}/1min/time/...)로 조회
+
+    Args:
+        start_dt: 시작 시각 (KST aware, 분 단위)
+        end_dt: 종료 시각 (KST aware, 분 단위, 포함)
+
+    Returns:
+        list: [(날짜 YYYY-MM-DD, 시작 HH:MM, 종료 HH:MM), ...]
+    """
+    chunks = []
+    current = start_dt
+    while current <= end_dt:
+        day_end = current.replace(hour=23, minute=59)
+        chunk_end = min(day_end, end_dt)
+        chunks.append((current.strftime('%Y-%m-%d'), current.strftime('%H:%M'), chunk_end.strftime('%H:%M')))
+        # 다음 날 00:00 (DST가 없는 KST 기준)
+        current = day_end + timedelta(minutes=1)
+    return chunks
+
+
+def get_chunk_end_minute(chunk_date, chunk_end):
+    """조회한 구간의 마지막 분 (KST aware)"""
+    return KST.localize(datetime.strptime(f'{chunk_date} {chunk_end}', '%Y-%m-%d %H:%M'))
+
+
+def get_device_synced_minute(devices):
+    """
+    연결된 기기 중 가장 최근 동기화 시각 (분 단위 내림, KST aware)
+
+    Fitbit은 기기가 동기화한 시각까지만 분 단위 값을 채우므로 워터마크와 조회 범위를 이 시각으로 제한함
+    (lastSyncTime은 사용자 시간대 기준이며 이 서비스의 사용자는 KST)
+
+    Returns:
+        datetime 또는 None (기기 목록 조회 실패, 기기 없음)
+    """
+    synced = []
+    for device in devices or []:
+        last_sync = device.get('lastSyncTime') if isinstance(device, dict) else None
+        if not last_sync:
+            continue
+        try:
+            synced.append(datetime.fromisoformat(last_sync[:19]))
+        except ValueError:
+            continue
+    if not synced:
+        return None
+    return KST.localize(max(synced).replace(second=0, microsecond=0))
+
+
+def get_last_dataset_minute(chunk_date, data, response_key):
+    """응답 dataset의 마지막 분 (KST aware, 값이 없으면 None)"""
+    dataset = (data.get(response_key) or {}).get('dataset') or []
+    times = [item['time'] for item in dataset if item.get('time')]
+    if not times:
+        return None
+    return KST.localize(datetime.strptime(f'{chunk_date} {max(times)[:5]}', '%Y-%m-%d %H:%M'))
+
+
+def get_watermark_minute(chunk_date, chunk_end, data, response_key, device_synced_at):
+    """
+    구간 저장 후 올릴 워터마크
+
+    기기 동기화 시각을 알면 구간 끝과 동기화 시각 중 이른 분까지 올림
+    (동기화 이전의 0이거나 누락된 분은 조회가 끝난 것으로 보므로 밤새 0인 걸음 수 등을 매번 다시 조회하지 않음).
+    기기 목록을 조회하지 못하면 응답에 실제로 포함된 마지막 분까지만 올림
+
+    Returns:
+        datetime 또는 None (올릴 위치가 없음)
+    """
+    chunk_end_minute = get_chunk_end_minute(chunk_date, chunk_end)
+    if device_synced_at is not None:
+        return min(chunk_end_minute, device_synced_at)
+    last_minute = get_last_dataset_minute(chunk_date, data, response_key)
+    return min(chunk_end_minute, last_minute) if last_minute else None
+
+
+# 하루 단위로만 조회 가능한 데이터 (증분 동기화에서 날짜 워터마크 사용)
+# 데이터 종류 -> (조회 함수, 저장 함수, 결과 dict key, 응답의 목록 key)
+DAILY_INCREMENTAL_METRICS = {
+    'spo2': (get_spo2_intraday_data, save_intraday_spo2, 'intraday_spo2', None),
+    'hrv': (get_hrv_intraday_data, save_intraday_hrv, 'intraday_hrv', 'hrv'),
+}
+
+
+def has_daily_minutes(data, list_key):
+    """SpO2/HRV 응답에 분 단위 값이 있는지 (수면 분석이 끝나 그날 값이 확정되었는지)"""
+    if list_key:
+        data = data.get(list_key) if isinstance(data, dict) else None
+    elif isinstance(data, dict):
+        data = [data]
+    return any(isinstance(day, dict) and day.get('minutes') for day in data or [])
+
+
+def sync_incremental_intraday_data(fitbit_user_id, access_token, lag_minutes=None, max_lookback_minutes=None,
+                                   initial_minutes=5, max_workers=None):
+    """
+    워터마크 기반 Intraday 증분 동기화 (cron용)
+
+    데이터 종류별로 마지막 저장 분(워터마크) 다음부터 "현재 - lag"과 기기 마지막 동기화 시각 중 이른 분까지 조회하므로
+    cron이 누락되어도 다음 실행에서 빈 구간이 채워지고, 이미 저장된 분은 다시 조회하지 않음.
+    워터마크는 저장이 성공한 구간만, 실제로 채워진 분(get_watermark_minute)까지만 올림
+
+    SpO2/HRV는 분 단위 범위 조회가 불가능하고 수면 분석이 끝난 뒤 하루치가 한 번에 생기므로
+    그날 값을 저장하면 날짜 워터마크를 남기고 다음 날까지 다시 조회하지 않음
+
+    Args:
+        fitbit_user_id: Fitbit 사용자 ID
+        access_token: Fitbit access token
+        lag_minutes: Fitbit API 지연 (없으면 settings.FITBIT_INCREMENTAL_LAG_MINUTES)
+        max_lookback_minutes: 최대 조회 범위 (없으면 settings.FITBIT_INCREMENTAL_MAX_LOOKBACK_MINUTES)
+                              워터마크가 이보다 오래되면 이 범위만 조회 (나머지는 백필 스크립트로 처리)
+        initial_minutes: 워터마크가 없을 때 조회할 범위 (분)
+        max_workers: 동시 요청 수 (없으면 settings.FITBIT_SYNC_FETCH_WORKERS)
+
+    Returns:
+        dict: 동기화 결과 (sync_fitbit_data_for_date와 동일한 형식)
+    """
+    kst = KST
+    lag_minutes = lag_minutes if lag_minutes is not None else getattr(settings, 'FITBIT_INCREMENTAL_LAG_MINUTES', 10)
+    max_lookback_minutes = max_lookback_minutes or getattr(settings, 'FITBIT_INCREMENTAL_MAX_LOOKBACK_MINUTES', 1440)
+
+    now = datetime.now(kst).replace(second=0, microsecond=0)
+    end_dt = now - timedelta(minutes=lag_minutes)
+    date = end_dt.strftime('%Y-%m-%d')
+
+    result = new_sync_result(date)
+    fitbit_rate_limiter.bind(fitbit_user_id, access_token)
+
+    try:
+        watermarks = dict(
+            IntradaySyncWatermark.objects.filter(fitbit_user_id=fitbit_user_id)
+            .values_list('metric', 'last_synced_at')
+        )
+
+        # 기기가 아직 동기화하지 않은 분은 조회하지 않음
+        device_synced_at = get_device_synced_minute(get_devices_data(access_token))
+        if device_synced_at is not None:
+            end_dt = min(end_dt, device_synced_at)
+        oldest_dt = end_dt - timedelta(minutes=max_lookback_minutes - 1)
+
+        # 데이터 종류별 조회 구간 계산
+        tasks = []
+        for metric in INCREMENTAL_METRICS:
+            watermark = watermarks.get(metric)
+            if watermark:
+                start_dt = watermark.astimezone(kst) + timedelta(minutes=1)
+            else:
+                start_dt = end_dt - timedelta(minutes=initial_minutes - 1)
+            start_dt = max(start_dt, oldest_dt)
+
+            for chunk in split_by_day(start_dt, end_dt):
+                tasks.append((metric, chunk))
+
+        # 오늘 값을 이미 저장한 SpO2/HRV는 조회하지 않음
+        today_start = kst.localize(datetime.strptime(date, '%Y-%m-%d'))
+        daily_tasks = [
+            metric for metric in DAILY_INCREMENTAL_METRICS
+            if not watermarks.get(metric) or watermarks[metric] < today_start
+        ]
+
+        max_workers = max_workers or getattr(settings, 'FITBIT_SYNC_FETCH_WORKERS', 12)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (metric, chunk, executor.submit(INCREMENTAL_METRICS[metric][0], access_token, chunk[0], chunk[1], chunk[2]))
+                for metric, chunk in tasks
+            ]
+            daily_futures = [
+                (metric, executor.submit(DAILY_INCREMENTAL_METRICS[metric][0], access_token, date))
+                for metric in daily_tasks
+            ]
+
+            fetched = [(metric, chunk, future.result()) for metric, chunk, future in futures]
+            daily_fetched = [(metric, future.result()) for metric, future in daily_futures]
+
+        # 저장 후 워터마크 갱신 (조회나 저장에 실패한 구간은 워터마크를 유지하여 다음 실행에서 재시도)
+        new_watermarks = {}
+        failed_metrics = set()
+        for metric, (chunk_date, chunk_start, chunk_end), data in fetched:
+            _, save_func, response_key, result_key = INCREMENTAL_METRICS[metric]
+            # 구간은 종류별로 시간 순이므로 앞 구간이 실패하면 이후 구간은 저장은 하되 워터마크를 올리지 않음
+            if data is None:
+                failed_metrics.add(metric)
+                continue
+
+            try:
+                result[result_key] += save_func(fitbit_user_id, chunk_date, data, raise_errors=True)
+            except Exception:
+                failed_metrics.add(metric)
+                continue
+
+            if metric not in failed_metrics:
+                last_minute = get_watermark_minute(chunk_date, chunk_end, data, response_key, device_synced_at)
+                if last_minute is not None:
+                    new_watermarks[metric] = last_minute
+
+        for metric, data in daily_fetched:
+            _, save_func, result_key, list_key = DAILY_INCREMENTAL_METRICS[metric]
+            if not data:
+                continue
+            try:
+                result[result_key] = save_func(fitbit_user_id, date, data, raise_errors=True)
+            except Exception:
+                continue
+            if has_daily_minutes(data, list_key):
+                new_watermarks[metric] = today_start
+
+        for metric, last_minute in new_watermarks.items():
+            if watermarks.get(metric) and last_minute <= watermarks[metric]:
+                continue
+            IntradaySyncWatermark.objects.update_or_create(
+                fitbit_user_id=fitbit_user_id,
+                metric=metric,
+                defaults={'last_synced_at': last_minute}
+            )
+
+        result['success'] = True
+        print(f"[Incremental Sync Success] {fitbit_user_id} - {len(tasks)}개 구간 (~{end_dt.strftime('%Y-%m-%d %H:%M')})")
+
+    except Exception as e:
+        result['error'] = str(e)
+        print(f"[Incremental Sync Error] {fitbit_user_id}: {e}")
+
+    return result
+
+
 def save_sleep_log(fitbit_user_id, date, sleep_data):
     """수면 로그 데이터를 DB에 저장"""
     if not sleep_data or 'sleep' not in sleep_data:
         return 0
 
-    saved_count = 0
     try:
-        with transaction.atomic():
-            for sleep in sleep_data['sleep']:
-                log_id = sleep.get('logId')
-                if not log_id:
-                    continue
-
-                # 수면 시작/종료 시간 파싱 (ISO format)
-                start_time = datetime.fromisoformat(sleep.get('startTime', '').replace('Z', '+00:00'))
-                end_time = datetime.fromisoformat(sleep.get('endTime', '').replace('Z', '+00:00'))
-
-                # 수면 단계별 시간
-                levels = sleep.get('levels', {})
-                summary = levels.get('summary', {})
-
-                _, created = SleepLog.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    log_id=log_id,
-                    defaults={
-                        'date': date,
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'duration': sleep.get('duration', 0),
-                        'minutes_asleep': sleep.get('minutesAsleep', 0),
-                        'minutes_awake': sleep.get('minutesAwake', 0),
-                        'minutes_deep': summary.get('deep', {}).get('minutes'),
-                        'minutes_light': summary.get('light', {}).get('minutes'),
-                        'minutes_rem': summary.get('rem', {}).get('minutes'),
-                        'minutes_wake': summary.get('wake', {}).get('minutes'),
-                        'efficiency': sleep.get('efficiency'),
-                        'sleep_score': sleep.get('sleepScore'),
-                        'is_main_sleep': sleep.get('isMainSleep', False)
-                    }
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for sleep in sleep_data['sleep']:
+            log_id = sleep.get('logId')
+            if not log_id:
+                continue
+
+            # 수면 시작/종료 시간 파싱 (ISO format)
+            start_time = datetime.fromisoformat(sleep.get('startTime', '').replace('Z', '+00:00'))
+            end_time = datetime.fromisoformat(sleep.get('endTime', '').replace('Z', '+00:00'))
+
+            # 수면 단계별 시간
+            levels = sleep.get('levels', {})
+            summary = levels.get('summary', {})
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'log_id': log_id,
+                'date': date,
+                'start_time': start_time,
+                'end_time': end_time,
+                'duration': sleep.get('duration', 0),
+                'minutes_asleep': sleep.get('minutesAsleep', 0),
+                'minutes_awake': sleep.get('minutesAwake', 0),
+                'minutes_deep': summary.get('deep', {}).get('minutes'),
+                'minutes_light': summary.get('light', {}).get('minutes'),
+                'minutes_rem': summary.get('rem', {}).get('minutes'),
+                'minutes_wake': summary.get('wake', {}).get('minutes'),
+                'efficiency': sleep.get('efficiency'),
+                'sleep_score': sleep.get('sleepScore'),
+                'is_main_sleep': sleep.get('isMainSleep', False)
+            })
+
+        # log_id가 unique이므로 log_id 기준으로 upsert
+        saved_count, updated_count = bulk_upsert(
+            SleepLog, rows,
+            unique_fields=['log_id'],
+            update_fields=[
+                'fitbit_user_id', 'date', 'start_time', 'end_time', 'duration',
+                'minutes_asleep', 'minutes_awake', 'minutes_deep', 'minutes_light',
+                'minutes_rem', 'minutes_wake', 'efficiency', 'sleep_score', 'is_main_sleep'
+            ]
+        )
 
-        print(f"[SleepLog] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[SleepLog] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
     except Exception as e:
         print(f"Sleep Log 저장 중 오류: {e}")
@@ -764,26 +1105,28 @@ def save_breathing_rate(fitbit_user_id, date, br_data):
     if not br_data or 'br' not in br_data:
         return 0
 
-    saved_count = 0
     try:
-        with transaction.atomic():
-            for item in br_data['br']:
-                item_date = item.get('dateTime')
-                breathing_rate = item.get('value', {}).get('breathingRate')
-
-                if not item_date or breathing_rate is None:
-                    continue
-
-                _, created = BreathingRate.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    date=item_date,
-                    defaults={'breathing_rate': breathing_rate}
-                )
-
-                if created:
-                    saved_count += 1
+        rows = []
+        for item in br_data['br']:
+            item_date = item.get('dateTime')
+            breathing_rate = item.get('value', {}).get('breathingRate')
+
+            if not item_date or breathing_rate is None:
+                continue
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'date': item_date,
+                'breathing_rate': breathing_rate
+            })
+
+        saved_count, updated_count = bulk_upsert(
+            BreathingRate, rows,
+            unique_fields=['fitbit_user_id', 'date'],
+            update_fields=['breathing_rate']
+        )
 
-        print(f"[BreathingRate] {fitbit_user_id} - {date}: {saved_count}개 저장")
+        print(f"[BreathingRate] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
         return saved_count
     except Exception as e:
         print(f"Breathing Rate 저장 중 오류: {e}")
@@ -795,30 +1138,222 @@ def save_skin_temperature(fitbit_user_id, date, temp_data):
     if not temp_data or 'tempSkin' not in temp_data:
         return 0
 
-    saved_count = 0
     try:
-        with transaction.atomic():
-            for item in temp_data['tempSkin']:
-                item_date = item.get('dateTime')
-                relative_temp = item.get('value', {}).get('nightlyRelative')
+        rows = []
+        for item in temp_data['tempSkin']:
+            item_date = item.get('dateTime')
+            relative_temp = item.get('value', {}).get('nightlyRelative')
+
+            if not item_date or relative_temp is None:
+                continue
+
+            rows.append({
+                'fitbit_user_id': fitbit_user_id,
+                'date': item_date,
+                'relative_temp': relative_temp
+            })
+
+        saved_count, updated_count = bulk_upsert(
+            SkinTemperature, rows,
+            unique_fields=['fitbit_user_id', 'date'],
+            update_fields=['relative_temp']
+        )
 
-                if not item_date or relative_temp is None:
-                    continue
+        print(f"[SkinTemperature] {fitbit_user_id} - {date}: {saved_count}개 저장, {updated_count}개 업데이트")
+        return saved_count
+    except Exception as e:
+        print(f"Skin Temperature 저장 중 오류: {e}")
+        return 0
+
+
+# 날짜 범위 조회 시 엔드포인트별 최대 기간 (일)
+# 데이터 종류 -> (조회 함수, 저장 함수, 응답의 리스트 key, 항목의 날짜 key, 결과 dict key, 최대 일수)
+RANGE_ENDPOINTS = {
+    'spo2': (get_spo2_intraday_data, save_intraday_spo2, None, 'dateTime', 'intraday_spo2', 30),
+    'hrv': (get_hrv_intraday_data, save_intraday_hrv, 'hrv', 'dateTime', 'intraday_hrv', 30),
+    'sleep': (get_sleep_data, save_sleep_log, 'sleep', 'dateOfSleep', 'sleep_logs', 100),
+    'breathing_rate': (get_breathing_rate_data, save_breathing_rate, 'br', 'dateTime', 'breathing_rate', 30),
+    'skin_temperature': (get_skin_temperature_data, save_skin_temperature, 'tempSkin', 'dateTime', 'skin_temperature', 30),
+}
+
+# 하루 1440분이 모두 응답에 포함되어 여러 날짜를 한 번에 조회해도 날짜를 복원할 수 있는 데이터
+# (심박수는 착용하지 않은 시간이 빠지므로 하루 단위로 조회)
+DENSE_INTRADAY_METRICS = ('steps', 'calories', 'distance', 'floors', 'elevation')
+
+
+def split_date_range(start_date, end_date, max_days):
+    """
+    날짜 범위를 max_days일 이하의 구간으로 분할
+
+    Returns:
+        list: [(시작 날짜, 종료 날짜), ...] (YYYY-MM-DD)
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=max_days - 1), end)
+        chunks.append((start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def split_intraday_by_date(data, response_key, dates):
+    """
+    여러 날짜의 intraday 응답(dataset에 시간만 있음)을 날짜별 응답으로 분할
+
+    시간이 이전 항목보다 작거나 같아지면 다음 날로 판단하며,
+    날짜마다 00:00:00부터 시작하지 않거나 날짜 수가 맞지 않으면 None 반환 (하루 단위로 다시 조회)
+
+    Returns:
+        dict: 날짜 -> {response_key: {'dataset': [...]}} 또는 None
+    """
+    if not data or response_key not in data:
+        return None
+
+    days = []
+    previous_time = None
+    for item in data[response_key].get('dataset', []):
+        time_str = item.get('time')
+        if not time_str:
+            continue
+        if previous_time is None or time_str <= previous_time:
+            if time_str != '00:00:00':
+                return None
+            days.append([])
+        days[-1].append(item)
+        previous_time = time_str
+
+    if len(days) != len(dates):
+        return None
 
-                _, created = SkinTemperature.objects.update_or_create(
-                    fitbit_user_id=fitbit_user_id,
-                    date=item_date,
-                    defaults={'relative_temp': relative_temp}
+    return {date: {response_key: {'dataset': items}} for date, items in zip(dates, days)}
+
+
+def split_payload_by_date(data, list_key, date_key):
+    """
+    날짜 범위 응답(항목마다 날짜 포함)을 날짜별 응답으로 분할 (저장 함수에 그대로 전달 가능한 형태)
+
+    Args:
+        data: API 응답 (list_key가 None이면 항목 리스트 자체, 예: SpO2)
+        list_key: 항목 리스트가 들어있는 key (hrv, sleep, br, tempSkin)
+        date_key: 항목의 날짜 key (dateTime, dateOfSleep)
+
+    Returns:
+        dict: 날짜 -> 응답
+    """
+    if list_key is None:
+        items = data if isinstance(data, list) else [data]
+    else:
+        items = data.get(list_key, [])
+
+    by_date = {}
+    for item in items:
+        item_date = item.get(date_key)
+        if item_date:
+            by_date.setdefault(item_date, []).append(item)
+
+    if list_key is None:
+        return by_date
+    return {item_date: {list_key: date_items} for item_date, date_items in by_date.items()}
+
+
+def sync_fitbit_data_date_range(fitbit_user_id, access_token, start_date, end_date, max_workers=None):
+    """
+    날짜 범위의 Fitbit 데이터를 범위 엔드포인트로 한 번에 가져와 저장 (백필용)
+
+    - 일일 활동 요약, 심박수: 날짜별 요청
+    - 걸음 수/칼로리/거리/층수/고도: settings.FITBIT_BACKFILL_INTRADAY_MAX_DAYS일 단위 요청
+      (응답을 날짜별로 나눌 수 없으면 해당 구간만 날짜별로 다시 요청)
+    - SpO2/HRV/호흡수/피부 온도: 30일 단위, 수면: 100일 단위 요청
+
+    날짜별로 12회 요청하던 것에 비해 30일 백필 시 요청 수가 360회에서 90회 수준으로 줄어듦
+
+    Args:
+        fitbit_user_id: Fitbit 사용자 ID
+        access_token: Fitbit access token
+        start_date: 시작 날짜 (YYYY-MM-DD)
+        end_date: 종료 날짜 (YYYY-MM-DD, 포함)
+        max_workers: 동시 요청 수 (없으면 settings.FITBIT_SYNC_FETCH_WORKERS)
+
+    Returns:
+        list: 날짜별 동기화 결과 (sync_fitbit_data_for_date와 동일한 형식, 날짜 오름차순)
+    """
+    dates = [start for start, _ in split_date_range(start_date, end_date, 1)]
+    results = {date: new_sync_result(date) for date in dates}
+    fitbit_rate_limiter.bind(fitbit_user_id, access_token)
+
+    intraday_max_days = getattr(settings, 'FITBIT_BACKFILL_INTRADAY_MAX_DAYS', 7)
+    max_workers = max_workers or getattr(settings, 'FITBIT_SYNC_FETCH_WORKERS', 12)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            daily_futures = {
+                date: (
+                    executor.submit(get_activity_data, access_token, date),
+                    executor.submit(get_fitbit_heart_rate_data, access_token, date),
                 )
+                for date in dates
+            }
+            dense_futures = [
+                (metric, chunk_start, chunk_end,
+                 executor.submit(INCREMENTAL_METRICS[metric][0], access_token, chunk_start, end_date=chunk_end))
+                for metric in DENSE_INTRADAY_METRICS
+                for chunk_start, chunk_end in split_date_range(start_date, end_date, intraday_max_days)
+            ]
+            range_futures = [
+                (key, executor.submit(func, access_token, chunk_start, end_date=chunk_end))
+                for key, (func, _, _, _, _, max_days) in RANGE_ENDPOINTS.items()
+                for chunk_start, chunk_end in split_date_range(start_date, end_date, max_days)
+            ]
+
+            # 일일 요약 + 심박수 (날짜별)
+            for date, (activity_future, heart_future) in daily_futures.items():
+                activity_data = activity_future.result()
+                heart_data = heart_future.result()
+                if activity_data:
+                    results[date]['daily_summary'] = save_daily_summary(
+                        fitbit_user_id, date, activity_data, heart_data
+                    ) is not None
+                if heart_data:
+                    results[date]['intraday_hr'] = save_intraday_heart_rate(fitbit_user_id, date, heart_data)
+
+            # 분 단위 데이터 (여러 날짜 응답을 날짜별로 분할, 실패 시 날짜별 재요청)
+            for metric, chunk_start, chunk_end, future in dense_futures:
+                fetch_func, save_func, response_key, result_key = INCREMENTAL_METRICS[metric]
+                chunk_dates = [start for start, _ in split_date_range(chunk_start, chunk_end, 1)]
+
+                by_date = split_intraday_by_date(future.result(), response_key, chunk_dates)
+                if by_date is None:
+                    retry_futures = {date: executor.submit(fetch_func, access_token, date) for date in chunk_dates}
+                    by_date = {date: retry.result() for date, retry in retry_futures.items()}
+
+                for date, day_data in by_date.items():
+                    if day_data:
+                        results[date][result_key] += save_func(fitbit_user_id, date, day_data)
+
+            # 날짜 범위 엔드포인트 (항목마다 날짜 포함)
+            for key, future in range_futures:
+                _, save_func, list_key, date_key, result_key, _ = RANGE_ENDPOINTS[key]
+                data = future.result()
+                if not data:
+                    continue
 
-                if created:
-                    saved_count += 1
+                for date, day_data in split_payload_by_date(data, list_key, date_key).items():
+                    if date in results:
+                        results[date][result_key] += save_func(fitbit_user_id, date, day_data)
+
+        for result in results.values():
+            result['success'] = True
+        print(f"[Range Sync Success] {fitbit_user_id} - {start_date} ~ {end_date}")
 
-        print(f"[SkinTemperature] {fitbit_user_id} - {date}: {saved_count}개 저장")
-        return saved_count
     except Exception as e:
-        print(f"Skin Temperature 저장 중 오류: {e}")
-        return 0
+        for result in results.values():
+            result['error'] = str(e)
+        print(f"[Range Sync Error] {fitbit_user_id} - {start_date} ~ {end_date}: {e}")
+
+    return [results[date] for date in dates]
 
 
 def sync_daily_health_data(fitbit_user_id, access_token, date):
@@ -0,0 +1,121 @@
+"""
+Fitbit 데이터 비동기 동기화 함수
+
+API 요청은 AsyncFitbitClient로 동시에 보내고, DB 저장은 sync_to_async(thread_sensitive=True)로
+단일 스레드에서 순서대로 실행 (ORM은 비동기 컨텍스트에서 직접 호출할 수 없음)
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from .data_sync import new_sync_result, save_fitbit_data_for_date
+from .fitbit_api_async import AsyncFitbitClient
+from .rate_limit import fitbit_rate_limiter
+
+
+async def async_fetch_fitbit_data_for_date(client, access_token, date, start_time=None, end_time=None):
+    """
+    특정 날짜의 엔드포인트별 Fitbit 데이터를 동시에 가져오기
+    (data_sync.fetch_fitbit_data_for_date의 비동기 버전, 반환 형식 동일)
+    """
+    requests_to_fetch = {
+        'heart': client.get_fitbit_heart_rate_data(access_token, date, start_time, end_time),
+        'steps': client.get_steps_intraday_data(access_token, date, start_time, end_time),
+        'calories': client.get_calories_intraday_data(access_token, date, start_time, end_time),
+        'distance': client.get_distance_intraday_data(access_token, date, start_time, end_time),
+        'floors': client.get_floors_intraday_data(access_token, date, start_time, end_time),
+        'elevation': client.get_elevation_intraday_data(access_token, date, start_time, end_time),
+        'spo2': client.get_spo2_intraday_data(access_token, date, start_time, end_time),
+        'hrv': client.get_hrv_intraday_data(access_token, date, start_time, end_time),
+    }
+
+    # 일일 요약/수면 관련 데이터는 하루 전체 동기화 시에만 요청
+    if not start_time:
+        requests_to_fetch.update({
+            'activity': client.get_activity_data(access_token, date),
+            'sleep': client.get_sleep_data(access_token, date),
+            'breathing_rate': client.get_breathing_rate_data(access_token, date),
+            'skin_temperature': client.get_skin_temperature_data(access_token, date),
+        })
+
+    responses = await asyncio.gather(*requests_to_fetch.values())
+    return dict(zip(requests_to_fetch.keys(), responses))
+
+
+async def async_sync_fitbit_data_for_date(client, fitbit_user_id, access_token, date, start_time=None, end_time=None):
+    """
+    특정 날짜의 Fitbit 데이터를 API에서 가져와 DB에 저장 (sync_fitbit_data_for_date의 비동기 버전)
+
+    Args:
+        client: AsyncFitbitClient
+        fitbit_user_id: Fitbit 사용자 ID
+        access_token: Fitbit access token
+        date: 날짜 (YYYY-MM-DD)
+        start_time: 시작 시간 (HH:MM 형식, 선택)
+        end_time: 종료 시간 (HH:MM 형식, 선택)
+
+    Returns:
+        dict: 동기화 결과 (sync_fitbit_data_for_date와 동일한 형식)
+    """
+    result = new_sync_result(date)
+    fitbit_rate_limiter.bind(fitbit_user_id, access_token)
+
+    try:
+        fetched = await async_fetch_fitbit_data_for_date(client, access_token, date, start_time, end_time)
+
+        await sync_to_async(save_fitbit_data_for_date, thread_sensitive=True)(
+            fitbit_user_id, date, fetched, start_time, result
+        )
+
+        result['success'] = True
+        time_range = f" ({start_time}-{end_time})" if start_time else ""
+        print(f"[Async Sync Success] {fitbit_user_id} - {date}{time_range}")
+
+    except Exception as e:
+        result['error'] = str(e)
+        print(f"[Async Sync Error] {fitbit_user_id} - {date}: {e}")
+
+    return result
+
+
+async def async_sync_users(fitbit_users, date, start_time=None, end_time=None, max_concurrency=None):
+    """
+    여러 사용자의 특정 날짜 데이터를 하나의 event loop에서 동시에 동기화
+
+    Args:
+        fitbit_users: FitbitUser 객체 리스트 (access_token이 유효해야 함)
+        date: 날짜 (YYYY-MM-DD)
+        start_time: 시작 시간 (HH:MM 형식, 선택)
+        end_time: 종료 시간 (HH:MM 형식, 선택)
+        max_concurrency: 동시에 동기화할 사용자 수 (없으면 settings.FITBIT_ASYNC_MAX_USERS)
+
+    Returns:
+        list: 사용자별 {'fitbit_user_id', 'success', 'result', 'error'}
+    """
+    max_concurrency = max_concurrency or getattr(settings, 'FITBIT_ASYNC_MAX_USERS', 50)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with AsyncFitbitClient() as client:
+        async def _sync_user(fitbit_user):
+            async with semaphore:
+                result = await async_sync_fitbit_data_for_date(
+                    client, fitbit_user.fitbit_user_id, fitbit_user.access_token, date, start_time, end_time
+                )
+            return {
+                'fitbit_user_id': fitbit_user.fitbit_user_id,
+                'success': result['success'],
+                'result': result,
+                'error': result['error'],
+            }
+
+        return await asyncio.gather(*(_sync_user(user) for user in fitbit_users))
+
+
+def run_async_sync_users(fitbit_users, date, start_time=None, end_time=None, max_concurrency=None):
+    """
+    동기 코드(스크립트, 관리 명령)에서 async_sync_users를 실행
+
+    Note:
+        QuerySet은 event loop 밖에서 평가해야 하므로 list로 변환하여 전달
+    """
+    fitbit_users = list(fitbit_users)
+    return asyncio.run(async_sync_users(fitbit_users, date, start_time, end_time, max_concurrency))
@@ -1,50 +1,244 @@
 """
 Fitbit API 호출 관련 함수들
 """
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 from django.conf import settings
+from .rate_limit import RateLimitDeferred, fitbit_rate_limiter
+
+
+class FitbitHttpClient:
+    """
+    Fitbit API용 HTTP 클라이언트
+
+    requests.Session을 재사용하여 api.fitbit.com과의 TCP/TLS 연결을
+    keep-alive로 유지 (요청마다 새 핸드셰이크를 하지 않음)
+    """
+
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None):
+        """
+        Args:
+            pool_size: 커넥션 풀 크기 (없으면 settings.FITBIT_HTTP_POOL_SIZE)
+            connect_timeout: 연결 타임아웃 초 (없으면 settings.FITBIT_HTTP_CONNECT_TIMEOUT)
+            read_timeout: 응답 타임아웃 초 (없으면 settings.FITBIT_HTTP_READ_TIMEOUT)
+        """
+        self._pool_size = pool_size
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool_size(self):
+        return self._pool_size or getattr(settings, 'FITBIT_HTTP_POOL_SIZE', 64)
+
+    @property
+    def timeout(self):
+        """requests에 전달할 (connect, read) 타임아웃"""
+        connect_timeout = self._connect_timeout or getattr(settings, 'FITBIT_HTTP_CONNECT_TIMEOUT', 5)
+        read_timeout = self._read_timeout or getattr(settings, 'FITBIT_HTTP_READ_TIMEOUT', 30)
+        return (connect_timeout, read_timeout)
+
+    @property
+    def session(self):
+        """세션은 첫 요청 시 생성 (gunicorn fork 이후 프로세스별로 생성되도록)"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+        return session
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def close(self):
+        """세션 종료 (풀에 남은 연결 정리)"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# 모듈 공용 클라이언트 (get_* 함수, 토큰 갱신, 관리 명령에서 공유)
+fitbit_client = FitbitHttpClient()
+
+# 401 응답을 받은 access token (token_refresh.run_with_valid_token이 확인 후 토큰을 강제 갱신)
+# 예산 키(사용자 ID, bind 전이면 토큰 해시) -> (access token, 기록 시각), 사용자당 1개만 보관
+_unauthorized_tokens = {}
+_unauthorized_lock = threading.Lock()
+UNAUTHORIZED_TTL = 3600  # 이 시간 안에 확인되지 않은 기록은 버림 (초)
+
+
+def mark_unauthorized(access_token):
+    """401 응답을 받은 access token 기록 (오래된 기록은 함께 정리)"""
+    key = fitbit_rate_limiter.key_for(access_token)
+    now = time.monotonic()
+    with _unauthorized_lock:
+        for stale in [k for k, (_, marked_at) in _unauthorized_tokens.items() if now - marked_at > UNAUTHORIZED_TTL]:
+            del _unauthorized_tokens[stale]
+        _unauthorized_tokens[key] = (access_token, now)
+
+
+def pop_unauthorized(access_token):
+    """
+    access token이 401 응답을 받은 적이 있는지 확인하고 기록 삭제
+
+    Returns:
+        bool: 401 응답 여부
+    """
+    key = fitbit_rate_limiter.key_for(access_token)
+    with _unauthorized_lock:
+        entry = _unauthorized_tokens.get(key)
+        if entry is not None and entry[0] == access_token:
+            del _unauthorized_tokens[key]
+            return True
+        return False
 
 
 def get_fitbit_data(access_token, endpoint):
     """
     Fitbit API에서 데이터 가져오기
 
+    요청 전 사용자별 Rate Limit 예산을 확보하고(필요 시 대기),
+    429 응답은 Fitbit-Rate-Limit-Reset 이후 재시도
+    (리셋까지 FITBIT_RATE_LIMIT_MAX_WAIT보다 오래 기다려야 하면 RateLimitDeferred 발생)
+
     Args:
         access_token: Fitbit access token
         endpoint: API endpoint (예: '/1/user/-/profile.json')
 
     Returns:
         dict: API 응답 데이터 또는 None
+
+    Raises:
+        RateLimitDeferred: 사용자의 예산이 소진되어 다음 실행으로 미뤄야 함
     """
     headers = {'Authorization': f'Bearer {access_token}'}
     url = f"{settings.FITBIT_API_BASE_URL}{endpoint}"
+    max_retries = getattr(settings, 'FITBIT_RATE_LIMIT_MAX_RETRIES', 2)
+    retries = 0
 
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
+        while True:
+            fitbit_rate_limiter.acquire(access_token)
+
+            response = fitbit_client.get(url, headers=headers)
+            rate_limit_reset = fitbit_rate_limiter.update_from_headers(access_token, response.headers)
+
+            if response.status_code == 200:
+                return response.json()
+
             error_msg = f"API 요청 실패 ({endpoint}): {response.status_code} - {response.text}"
 
-            # 429 에러 시 rate limit 정보 출력
+            if response.status_code == 401:
+                mark_unauthorized(access_token)
+
+            # 429 에러 시 rate limit 정보 출력 후 리셋 시점까지 대기하여 재시도
             if response.status_code == 429:
-                rate_limit_reset = response.headers.get('Fitbit-Rate-Limit-Reset')
+                fitbit_rate_limiter.penalize(access_token, rate_limit_reset)
+
                 rate_limit_remaining = response.headers.get('Fitbit-Rate-Limit-Remaining')
                 rate_limit_limit = response.headers.get('Fitbit-Rate-Limit-Limit')
 
-                if rate_limit_reset:
+                if rate_limit_reset is not None:
                     error_msg += f"\n⚠️  Rate Limit 초과! {rate_limit_reset}초 후 리셋"
                 if rate_limit_remaining is not None:
                     error_msg += f"\n   남은 요청: {rate_limit_remaining}/{rate_limit_limit}"
 
+                if retries < max_retries:
+                    retries += 1
+                    print(error_msg + f"\n   리셋 후 재시도 ({retries}/{max_retries})")
+                    continue
+
             print(error_msg)
             return None
+    except RateLimitDeferred as e:
+        print(f"API 요청 보류 ({endpoint}): Rate Limit 예산 소진, {e.retry_after:.0f}초 후 리셋 (다음 실행에서 재시도)")
+        raise
     except Exception as e:
         print(f"API 요청 중 오류 발생 ({endpoint}): {e}")
         return None
 
 
+def intraday_endpoint(resource, date, start_time=None, end_time=None, end_date=None):
+    """
+    activities intraday(1분 단위) 엔드포인트 생성
+
+    Args:
+        resource: heart, steps, calories, distance, floors, elevation
+        date: 시작 날짜 (YYYY-MM-DD 형식)
+        start_time: 시작 시간 (HH:MM 형식, 선택)
+        end_time: 종료 시간 (HH:MM 형식, 선택)
+        end_date: 종료 날짜 (YYYY-MM-DD 형식, 선택) - 날짜 범위 조회 시 사용
+
+    Returns:
+        str: API endpoint
+    """
+    if start_time and end_time:
+        return f"/1/user/-/activities/{resource}/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
+    elif end_date:
+        # 날짜 범위 조회
+        return f"/1/user/-/activities/{resource}/date/{date}/{end_date}/1min.json"
+    return f"/1/user/-/activities/{resource}/date/{date}/1d/1min.json"
+
+
+def activity_endpoint(date):
+    """일일 활동 요약 엔드포인트"""
+    return f"/1/user/-/activities/date/{date}.json"
+
+
+def spo2_endpoint(date, end_date=None):
+    """SpO2 intraday 엔드포인트 (날짜 범위 형식, end_date가 없으면 시작일/종료일 동일, 최대 30일)"""
+    return f"/1/user/-/spo2/date/{date}/{end_date or date}/all.json"
+
+
+def hrv_endpoint(date, end_date=None):
+    """HRV intraday 엔드포인트 (날짜 범위 형식, end_date가 없으면 시작일/종료일 동일, 최대 30일)"""
+    return f"/1/user/-/hrv/date/{date}/{end_date or date}/all.json"
+
+
+def sleep_endpoint(date, end_date=None):
+    """수면 로그 엔드포인트 (end_date 지정 시 날짜 범위, 최대 100일)"""
+    if end_date:
+        return f"/1.2/user/-/sleep/date/{date}/{end_date}.json"
+    return f"/1.2/user/-/sleep/date/{date}.json"
+
+
+def breathing_rate_endpoint(date, end_date=None):
+    """호흡수 엔드포인트 (end_date 지정 시 날짜 범위, 최대 30일)"""
+    if end_date:
+        return f"/1/user/-/br/date/{date}/{end_date}.json"
+    return f"/1/user/-/br/date/{date}.json"
+
+
+def skin_temperature_endpoint(date, end_date=None):
+    """피부 온도 엔드포인트 (end_date 지정 시 날짜 범위, 최대 30일)"""
+    if end_date:
+        return f"/1/user/-/temp/skin/date/{date}/{end_date}.json"
+    return f"/1/user/-/temp/skin/date/{date}.json"
+
+
+def devices_endpoint():
+    """연결된 기기 목록 엔드포인트 (기기별 lastSyncTime 포함)"""
+    return "/1/user/-/devices.json"
+
+
 def get_fitbit_heart_rate_data(access_token, date, start_time=None, end_time=None, end_date=None):
     """
     특정 날짜(또는 날짜 범위)의 심박수 데이터 가져오기 (일일 요약 + 1분 단위 데이터)
@@ -59,13 +253,7 @@ def get_fitbit_heart_rate_data(access_token, date, start_time=None, end_time=Non
     Returns:
         dict: 심박수 데이터
     """
-    if start_time and end_time:
-        endpoint = f"/1/user/-/activities/heart/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
-    elif end_date:
-        # 날짜 범위 조회
-        endpoint = f"/1/user/-/activities/heart/date/{date}/{end_date}/1min.json"
-    else:
-        endpoint = f"/1/user/-/activities/heart/date/{date}/1d/1min.json"
+    endpoint = intraday_endpoint('heart', date, start_time, end_time, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
@@ -80,7 +268,7 @@ def get_activity_data(access_token, date):
     Returns:
         dict: 활동 데이터 (걸음 수, 거리, 칼로리 등)
     """
-    endpoint = f"/1/user/-/activities/date/{date}.json"
+    endpoint = activity_endpoint(date)
     return get_fitbit_data(access_token, endpoint)
 
 
@@ -98,12 +286,7 @@ def get_steps_intraday_data(access_token, date, start_time=None, end_time=None,
     Returns:
         dict: 걸음 수 intraday 데이터
     """
-    if start_time and end_time:
-        endpoint = f"/1/user/-/activities/steps/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
-    elif end_date:
-        endpoint = f"/1/user/-/activities/steps/date/{date}/{end_date}/1min.json"
-    else:
-        endpoint = f"/1/user/-/activities/steps/date/{date}/1d/1min.json"
+    endpoint = intraday_endpoint('steps', date, start_time, end_time, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
@@ -121,12 +304,7 @@ def get_calories_intraday_data(access_token, date, start_time=None, end_time=Non
     Returns:
         dict: 칼로리 intraday 데이터
     """
-    if start_time and end_time:
-        endpoint = f"/1/user/-/activities/calories/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
-    elif end_date:
-        endpoint = f"/1/user/-/activities/calories/date/{date}/{end_date}/1min.json"
-    else:
-        endpoint = f"/1/user/-/activities/calories/date/{date}/1d/1min.json"
+    endpoint = intraday_endpoint('calories', date, start_time, end_time, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
@@ -144,12 +322,7 @@ def get_distance_intraday_data(access_token, date, start_time=None, end_time=Non
     Returns:
         dict: 거리 intraday 데이터
     """
-    if start_time and end_time:
-        endpoint = f"/1/user/-/activities/distance/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
-    elif end_date:
-        endpoint = f"/1/user/-/activities/distance/date/{date}/{end_date}/1min.json"
-    else:
-        endpoint = f"/1/user/-/activities/distance/date/{date}/1d/1min.json"
+    endpoint = intraday_endpoint('distance', date, start_time, end_time, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
@@ -167,12 +340,7 @@ def get_floors_intraday_data(access_token, date, start_time=None, end_time=None,
     Returns:
         dict: 층수 intraday 데이터
     """
-    if start_time and end_time:
-        endpoint = f"/1/user/-/activities/floors/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
-    elif end_date:
-        endpoint = f"/1/user/-/activities/floors/date/{date}/{end_date}/1min.json"
-    else:
-        endpoint = f"/1/user/-/activities/floors/date/{date}/1d/1min.json"
+    endpoint = intraday_endpoint('floors', date, start_time, end_time, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
@@ -190,16 +358,11 @@ def get_elevation_intraday_data(access_token, date, start_time=None, end_time=No
     Returns:
         dict: 고도 intraday 데이터
     """
-    if start_time and end_time:
-        endpoint = f"/1/user/-/activities/elevation/date/{date}/{date}/1min/time/{start_time}/{end_time}.json"
-    elif end_date:
-        endpoint = f"/1/user/-/activities/elevation/date/{date}/{end_date}/1min.json"
-    else:
-        endpoint = f"/1/user/-/activities/elevation/date/{date}/1d/1min.json"
+    endpoint = intraday_endpoint('elevation', date, start_time, end_time, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
-def get_spo2_intraday_data(access_token, date, start_time=None, end_time=None):
+def get_spo2_intraday_data(access_token, date, start_time=None, end_time=None, end_date=None):
     """
     특정 날짜의 SpO2 intraday 데이터 가져오기 (5분 단위)
 
@@ -208,16 +371,16 @@ def get_spo2_intraday_data(access_token, date, start_time=None, end_time=None):
         date: 날짜 (YYYY-MM-DD 형식)
         start_time: 시작 시간 (HH:MM 형식, 선택) - 사용 안 함
         end_time: 종료 시간 (HH:MM 형식, 선택) - 사용 안 함
+        end_date: 종료 날짜 (YYYY-MM-DD 형식, 선택) - 날짜 범위 조회 시 사용
 
     Returns:
         dict: SpO2 intraday 데이터
     """
-    # SpO2 Intraday는 날짜 범위 형식으로 요청 (시작일/종료일 동일)
-    endpoint = f"/1/user/-/spo2/date/{date}/{date}/all.json"
+    endpoint = spo2_endpoint(date, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
-def get_hrv_intraday_data(access_token, date, start_time=None, end_time=None):
+def get_hrv_intraday_data(access_token, date, start_time=None, end_time=None, end_date=None):
     """
     특정 날짜의 HRV intraday 데이터 가져오기 (수면 중)
 
@@ -226,60 +389,76 @@ def get_hrv_intraday_data(access_token, date, start_time=None, end_time=None):
         date: 날짜 (YYYY-MM-DD 형식)
         start_time: 시작 시간 (HH:MM 형식, 선택) - 사용 안 함
         end_time: 종료 시간 (HH:MM 형식, 선택) - 사용 안 함
+        end_date: 종료 날짜 (YYYY-MM-DD 형식, 선택) - 날짜 범위 조회 시 사용
 
     Returns:
         dict: HRV intraday 데이터
     """
-    # HRV Intraday는 날짜 범위 형식으로 요청 (시작일/종료일 동일)
-    endpoint = f"/1/user/-/hrv/date/{date}/{date}/all.json"
+    endpoint = hrv_endpoint(date, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
-def get_sleep_data(access_token, date):
+def get_sleep_data(access_token, date, end_date=None):
     """
     특정 날짜의 수면 데이터 가져오기
 
     Args:
         access_token: Fitbit access token
         date: 날짜 (YYYY-MM-DD 형식)
+        end_date: 종료 날짜 (YYYY-MM-DD 형식, 선택) - 날짜 범위 조회 시 사용
 
     Returns:
         dict: 수면 데이터
     """
-    endpoint = f"/1.2/user/-/sleep/date/{date}.json"
+    endpoint = sleep_endpoint(date, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
-def get_breathing_rate_data(access_token, date):
+def get_breathing_rate_data(access_token, date, end_date=None):
     """
     특정 날짜의 호흡수 데이터 가져오기
 
     Args:
         access_token: Fitbit access token
         date: 날짜 (YYYY-MM-DD 형식)
+        end_date: 종료 날짜 (YYYY-MM-DD 형식, 선택) - 날짜 범위 조회 시 사용
 
     Returns:
         dict: 호흡수 데이터
     """
-    endpoint = f"/1/user/-/br/date/{date}.json"
+    endpoint = breathing_rate_endpoint(date, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
-def get_skin_temperature_data(access_token, date):
+def get_skin_temperature_data(access_token, date, end_date=None):
     """
     특정 날짜의 피부 온도 데이터 가져오기
 
     Args:
         access_token: Fitbit access token
         date: 날짜 (YYYY-MM-DD 형식)
+        end_date: 종료 날짜 (YYYY-MM-DD 형식, 선택) - 날짜 범위 조회 시 사용
 
     Returns:
         dict: 피부 온도 데이터
     """
-    endpoint = f"/1/user/-/temp/skin/date/{date}.json"
+    endpoint = skin_temperature_endpoint(date, end_date)
     return get_fitbit_data(access_token, endpoint)
 
 
+def get_devices_data(access_token):
+    """
+    연결된 기기 목록 가져오기
+
+    Args:
+        access_token: Fitbit access token
+
+    Returns:
+        list: 기기 목록 (lastSyncTime은 사용자 시간대 기준 "YYYY-MM-DDTHH:MM:SS.fff")
+    """
+    return get_fitbit_data(access_token, devices_endpoint())
+
+
 def get_date_range(days_back=7):
     """
     오늘부터 days_back 일 전까지의 날짜 리스트 생성
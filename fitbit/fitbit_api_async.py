@@ -0,0 +1,188 @@
+"""
+Fitbit API 비동기(asyncio) 호출 관련 함수들
+
+fitbit_api.py와 같은 엔드포인트 생성 함수를 사용하고, aiohttp 세션 하나로
+여러 사용자의 요청을 동시에 수백 개까지 보낼 수 있도록 함
+(Rate Limit 예산은 동기 클라이언트와 같은 fitbit_rate_limiter를 공유)
+"""
+import asyncio
+import aiohttp
+from django.conf import settings
+from .fitbit_api import (
+    intraday_endpoint,
+    activity_endpoint,
+    spo2_endpoint,
+    hrv_endpoint,
+    sleep_endpoint,
+    breathing_rate_endpoint,
+    skin_temperature_endpoint,
+    mark_unauthorized,
+)
+from .rate_limit import RateLimitDeferred, fitbit_rate_limiter
+
+
+class AsyncFitbitClient:
+    """
+    Fitbit API용 비동기 HTTP 클라이언트
+
+    사용 예:
+        async with AsyncFitbitClient() as client:
+            data = await client.get_fitbit_data(access_token, endpoint)
+    """
+
+    def __init__(self, max_connections=None, connect_timeout=None, read_timeout=None):
+        """
+        Args:
+            max_connections: 동시 연결 수 (없으면 settings.FITBIT_ASYNC_MAX_CONNECTIONS)
+            connect_timeout: 연결 타임아웃 초 (없으면 settings.FITBIT_HTTP_CONNECT_TIMEOUT)
+            read_timeout: 응답 타임아웃 초 (없으면 settings.FITBIT_HTTP_READ_TIMEOUT)
+        """
+        self.max_connections = max_connections or getattr(settings, 'FITBIT_ASYNC_MAX_CONNECTIONS', 100)
+        self.connect_timeout = connect_timeout or getattr(settings, 'FITBIT_HTTP_CONNECT_TIMEOUT', 5)
+        self.read_timeout = read_timeout or getattr(settings, 'FITBIT_HTTP_READ_TIMEOUT', 30)
+        self._session = None
+
+    @property
+    def session(self):
+        """세션은 실행 중인 event loop 안에서 처음 사용할 때 생성"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self):
+        """세션 종료 (풀에 남은 연결 정리)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _acquire(self, access_token, max_wait):
+        """
+        Rate Limit 예산 확보 (event loop를 막지 않도록 asyncio.sleep으로 대기)
+
+        Raises:
+            RateLimitDeferred: max_wait 안에 예산을 확보할 수 없음
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+
+        while True:
+            wait = fitbit_rate_limiter.try_acquire(access_token)
+            if wait == 0:
+                return True
+            if loop.time() + wait > deadline:
+                raise RateLimitDeferred(fitbit_rate_limiter.key_for(access_token), wait)
+            await asyncio.sleep(wait)
+
+    async def get_fitbit_data(self, access_token, endpoint):
+        """
+        Fitbit API에서 데이터 가져오기 (fitbit_api.get_fitbit_data의 비동기 버전)
+
+        Args:
+            access_token: Fitbit access token
+            endpoint: API endpoint (예: '/1/user/-/profile.json')
+
+        Returns:
+            dict: API 응답 데이터 또는 None
+
+        Raises:
+            RateLimitDeferred: 사용자의 예산이 소진되어 다음 실행으로 미뤄야 함
+        """
+        headers = {'Authorization': f'Bearer {access_token}'}
+        url = f"{settings.FITBIT_API_BASE_URL}{endpoint}"
+        max_retries = getattr(settings, 'FITBIT_RATE_LIMIT_MAX_RETRIES', 2)
+        max_wait = fitbit_rate_limiter.max_wait
+        retries = 0
+
+        try:
+            while True:
+                await self._acquire(access_token, max_wait)
+
+                async with self.session.get(url, headers=headers) as response:
+                    rate_limit_reset = fitbit_rate_limiter.update_from_headers(access_token, response.headers)
+
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+
+                    text = await response.text()
+
+                error_msg = f"API 요청 실패 ({endpoint}): {response.status} - {text}"
+
+                if response.status == 401:
+                    mark_unauthorized(access_token)
+
+                # 429 에러 시 리셋 시점까지 대기하여 재시도
+                if response.status == 429:
+                    fitbit_rate_limiter.penalize(access_token, rate_limit_reset)
+
+                    if rate_limit_reset is not None:
+                        error_msg += f"\n⚠️  Rate Limit 초과! {rate_limit_reset}초 후 리셋"
+
+                    if retries < max_retries:
+                        retries += 1
+                        print(error_msg + f"\n   리셋 후 재시도 ({retries}/{max_retries})")
+                        continue
+
+                print(error_msg)
+                return None
+        except RateLimitDeferred as e:
+            print(f"API 요청 보류 ({endpoint}): Rate Limit 예산 소진, {e.retry_after:.0f}초 후 리셋 (다음 실행에서 재시도)")
+            raise
+        except Exception as e:
+            print(f"API 요청 중 오류 발생 ({endpoint}): {e!r}")
+            return None
+
+    async def get_fitbit_heart_rate_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """심박수 데이터 (일일 요약 + 1분 단위)"""
+        return await self.get_fitbit_data(access_token, intraday_endpoint('heart', date, start_time, end_time, end_date))
+
+    async def get_activity_data(self, access_token, date):
+        """일일 활동 요약"""
+        return await self.get_fitbit_data(access_token, activity_endpoint(date))
+
+    async def get_steps_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """걸음 수 intraday 데이터"""
+        return await self.get_fitbit_data(access_token, intraday_endpoint('steps', date, start_time, end_time, end_date))
+
+    async def get_calories_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """칼로리 intraday 데이터"""
+        return await self.get_fitbit_data(access_token, intraday_endpoint('calories', date, start_time, end_time, end_date))
+
+    async def get_distance_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """거리 intraday 데이터"""
+        return await self.get_fitbit_data(access_token, intraday_endpoint('distance', date, start_time, end_time, end_date))
+
+    async def get_floors_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """층수 intraday 데이터"""
+        return await self.get_fitbit_data(access_token, intraday_endpoint('floors', date, start_time, end_time, end_date))
+
+    async def get_elevation_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """고도 intraday 데이터"""
+        return await self.get_fitbit_data(access_token, intraday_endpoint('elevation', date, start_time, end_time, end_date))
+
+    async def get_spo2_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """SpO2 intraday 데이터 (start_time, end_time 사용 안 함)"""
+        return await self.get_fitbit_data(access_token, spo2_endpoint(date, end_date))
+
+    async def get_hrv_intraday_data(self, access_token, date, start_time=None, end_time=None, end_date=None):
+        """HRV intraday 데이터 (start_time, end_time 사용 안 함)"""
+        return await self.get_fitbit_data(access_token, hrv_endpoint(date, end_date))
+
+    async def get_sleep_data(self, access_token, date, end_date=None):
+        """수면 데이터"""
+        return await self.get_fitbit_data(access_token, sleep_endpoint(date, end_date))
+
+    async def get_breathing_rate_data(self, access_token, date, end_date=None):
+        """호흡수 데이터"""
+        return await self.get_fitbit_data(access_token, breathing_rate_endpoint(date, end_date))
+
+    async def get_skin_temperature_data(self, access_token, date, end_date=None):
+        """피부 온도 데이터"""
+        return await self.get_fitbit_data(access_token, skin_temperature_endpoint(date, end_date))
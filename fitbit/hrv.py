@@ -0,0 +1,412 @@
+"""
+HRV(심박변이도) 지표 계산
+
+여러 RR 구간(사용자별/5분 구간별)을 ragged 배열로 한 번에 계산하는 배치 API.
+구간 i의 값은 values[offsets[i]:offsets[i+1]] (offsets 길이 = 구간 수 + 1)이며,
+결과는 구간별 배열로 반환하고 계산할 수 없는 지표는 NaN으로 채움.
+
+주파수 도메인은 RR 타코그램(누적합 시간축)을 4Hz 등간격으로 보간한 뒤 Welch PSD로 계산하며,
+모든 구간의 Welch 세그먼트를 2차원 배열 하나로 모아 FFT를 한 번에 수행함 (하루치 5분 구간도 호출 1회).
+window 함수와 HF/LF 대역 마스크는 세그먼트 길이별로 캐시함
+"""
+import math
+from datetime import timedelta
+from functools import lru_cache
+import numpy as np
+
+# 주파수 대역 (Hz)
+HF_BAND = (0.15, 0.4)  # High Frequency: 0.15 - 0.4 Hz (양끝 포함)
+LF_BAND = (0.04, 0.15)  # Low Frequency: 0.04 - 0.15 Hz (상한 미포함)
+
+WINDOW_SECONDS = 300  # 지표 구간 (5분, UTC 기준 00:00, 00:05, ...로 정렬 - KST도 같은 경계)
+OUTLIER_SD = 3  # 이상치 기준 (평균 ± 3 표준편차, scripts/remove_polar_outliers.py와 동일)
+
+MIN_FREQUENCY_COUNT = 10  # 주파수 도메인 최소 RR 개수
+WELCH_MAX_NPERSEG = 256  # 4Hz에서 64초
+LOMB_FREQUENCY_STEP = 1 / 256  # Lomb-Scargle 주파수 간격 (Hz)
+MAX_NN_INTERVAL_MS = 2000  # 이보다 긴 RR은 누락된 박동(끊긴 구간)으로 간주
+
+# 주파수 도메인 계산 방법
+FREQUENCY_METHOD_WELCH = 'welch'  # 4Hz 보간 + Welch
+FREQUENCY_METHOD_LOMB = 'lomb'  # 보간 없이 박동 시각에서 Lomb-Scargle
+FREQUENCY_METHOD_AUTO = 'auto'  # 짧거나 끊긴 구간만 Lomb-Scargle, 나머지는 Welch
+
+# numpy 2.0에서 trapz가 trapezoid로 이름이 바뀜 (2.4에서 trapz 제거)
+trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def window_start(dt, window_seconds=WINDOW_SECONDS):
+    """dt가 속한 지표 구간의 시작 시각 (일괄 계산, 백필, 증분 계산이 모두 같은 구간을 사용)"""
+    timestamp = dt.timestamp()
+    return dt - timedelta(seconds=timestamp - math.floor(timestamp / window_seconds) * window_seconds)
+
+
+def offsets_from_counts(counts):
+    """구간별 개수 -> offsets"""
+    return np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+
+
+def build_hrv_batch(rows):
+    """
+    (key, hr, rr) 행을 구간별 ragged 배열로 변환
+
+    Args:
+        rows: key 순으로 정렬된 (key, hr, rr) iterable (같은 key 안에서는 시각 순, rr은 None 가능)
+              hr/rr이 None이거나 0 이하(측정 실패)인 값은 통계에서 제외하고 행 수에만 포함
+
+    Returns:
+        tuple: (keys, 구간별 행 수 배열, hr, hr_offsets, rr, rr_offsets)
+    """
+    keys = []
+    row_counts = []
+    hr_counts = []
+    rr_counts = []
+    hr = []
+    rr = []
+    for key, row_hr, row_rr in rows:
+        if not keys or keys[-1] != key:
+            keys.append(key)
+            row_counts.append(0)
+            hr_counts.append(0)
+            rr_counts.append(0)
+        row_counts[-1] += 1
+        if row_hr is not None and row_hr > 0:
+            hr.append(row_hr)
+            hr_counts[-1] += 1
+        if row_rr is not None and row_rr > 0:
+            rr.append(row_rr)
+            rr_counts[-1] += 1
+
+    return (
+        keys, np.array(row_counts, dtype=np.intp),
+        np.array(hr, dtype=float), offsets_from_counts(hr_counts),
+        np.array(rr, dtype=float), offsets_from_counts(rr_counts),
+    )
+
+
+def segment_replace_outliers(values, offsets):
+    """
+    구간별 이상치를 구간 평균(반올림)으로 대체 (scripts/remove_polar_outliers.py와 같은 규칙)
+
+    0 이하 값(측정 실패)은 통계에서 제외하고 그대로 둠. 표준편차는 ddof=0
+
+    Returns:
+        np.ndarray: 이상치를 대체한 복사본
+    """
+    values = np.asarray(values, dtype=float)
+    counts = np.diff(offsets)
+    valid = values > 0
+    valid_offsets = offsets_from_counts(segment_sum(valid.astype(float), offsets).astype(np.intp))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = segment_sum(values[valid], valid_offsets) / np.diff(valid_offsets)
+        deviation = values[valid] - np.repeat(mean, np.diff(valid_offsets))
+        std = np.sqrt(segment_sum(deviation ** 2, valid_offsets) / np.diff(valid_offsets))
+        row_mean = np.repeat(mean, counts)
+        row_std = np.repeat(std, counts)
+        outlier = valid & (row_std > 0) & (np.abs(values - row_mean) > OUTLIER_SD * row_std)
+    result = values.copy()
+    result[outlier] = np.rint(row_mean[outlier])
+    return result
+
+
+def segment_sum(values, offsets):
+    """구간별 합 (빈 구간은 0)"""
+    sums = np.zeros(len(offsets) - 1)
+    nonempty = np.diff(offsets) > 0
+    if nonempty.any():
+        sums[nonempty] = np.add.reduceat(values, offsets[:-1][nonempty])
+    return sums
+
+
+def segment_mean_std(values, offsets):
+    """
+    구간별 평균과 표준편차(ddof=1)
+
+    Returns:
+        tuple: (평균, 표준편차) - 값이 없으면 평균 NaN, 2개 미만이면 표준편차 NaN
+    """
+    counts = np.diff(offsets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = segment_sum(values, offsets) / counts
+        deviation = values - np.repeat(mean, counts)
+        std = np.sqrt(segment_sum(deviation ** 2, offsets) / (counts - 1))
+    std[counts < 2] = np.nan
+    return mean, std
+
+
+def segment_rmssd(values, offsets):
+    """
+    구간별 RMSSD: 연속된 RR 간격 차이의 제곱 평균의 제곱근 (구간 경계를 넘는 차이는 제외)
+
+    Returns:
+        np.ndarray: 값이 2개 미만인 구간은 NaN
+    """
+    counts = np.diff(offsets)
+    diff = np.diff(values)
+    boundaries = offsets[1:-1] - 1
+    keep = np.ones(len(diff), dtype=bool)
+    keep[boundaries[(boundaries >= 0) & (boundaries < len(diff))]] = False
+
+    diff_counts = np.maximum(counts - 1, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rmssd = np.sqrt(segment_sum(diff[keep] ** 2, offsets_from_counts(diff_counts)) / diff_counts)
+    rmssd[counts < 2] = np.nan
+    return rmssd
+
+
+def segment_cumsum(values, offsets):
+    """구간별 누적합 (구간마다 0부터 다시 시작)"""
+    cumsum = np.cumsum(values)
+    starts = offsets[:-1][np.diff(offsets) > 0]
+    before = np.zeros(len(values))
+    before[starts] = np.concatenate(([0.0], cumsum))[starts]
+    return cumsum - np.maximum.accumulate(before)
+
+
+def resample_tachogram(values, offsets, sampling_rate=4.0):
+    """
+    구간별 RR 타코그램을 등간격으로 선형 보간
+
+    박동 시각은 RR 누적합(초)이며, 각 구간의 첫 박동부터 마지막 박동까지를 1/sampling_rate 간격으로 샘플링
+
+    Args:
+        values: RR 간격 배열 (ms)
+        offsets: 구간 경계
+        sampling_rate: 보간 샘플링 레이트 (Hz)
+
+    Returns:
+        tuple: (보간된 RR 배열, 보간 결과의 구간 경계) - RR이 2개 미만인 구간은 빈 구간
+    """
+    counts = np.diff(offsets)
+    if not len(values):
+        # 모든 구간에 RR이 없음 (np.interp는 빈 배열을 받지 않음)
+        return np.empty(0), np.zeros(len(counts) + 1, dtype=np.intp)
+
+    beat_times = np.cumsum(values) / 1000.0  # 전체 구간에 걸쳐 증가하는 시간축
+    valid = counts >= 2
+    first = np.zeros(len(counts))
+    duration = np.zeros(len(counts))
+    first[valid] = beat_times[offsets[:-1][valid]]
+    duration[valid] = beat_times[offsets[1:][valid] - 1] - first[valid]
+
+    grid_counts = np.where(valid, np.floor(duration * sampling_rate).astype(np.intp) + 1, 0)
+    grid_offsets = offsets_from_counts(grid_counts)
+    window = np.repeat(np.arange(len(counts)), grid_counts)
+    grid_times = first[window] + (np.arange(grid_offsets[-1]) - grid_offsets[:-1][window]) / sampling_rate
+    return np.interp(grid_times, beat_times, values), grid_offsets
+
+
+@lru_cache(maxsize=32)
+def _welch_plan(nperseg, sampling_rate):
+    """세그먼트 길이별 Hann window, PSD 스케일, 주파수와 HF/LF 대역 마스크 (scipy.signal.welch 기본값과 동일)"""
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(nperseg) / nperseg)  # periodic Hann
+    scale = np.full(nperseg // 2 + 1, 2.0 / (sampling_rate * np.sum(window ** 2)))
+    scale[0] /= 2
+    if nperseg % 2 == 0:
+        scale[-1] /= 2
+    freqs = np.fft.rfftfreq(nperseg, 1.0 / sampling_rate)
+    hf_mask = (freqs >= HF_BAND[0]) & (freqs <= HF_BAND[1])
+    lf_mask = (freqs >= LF_BAND[0]) & (freqs < LF_BAND[1])
+    return window, scale, freqs, hf_mask, lf_mask
+
+
+def _welch_band_power(signal_values, grid_offsets, windows, nperseg, sampling_rate):
+    """
+    windows 구간들의 Welch PSD(50% overlap, 세그먼트별 평균 제거)를 FFT 1회로 계산해 HF/LF power 반환
+    (각 구간의 길이는 nperseg 이상이어야 함)
+    """
+    window, scale, freqs, hf_mask, lf_mask = _welch_plan(nperseg, sampling_rate)
+    step = nperseg - nperseg // 2
+    segment_counts = (np.diff(grid_offsets)[windows] - nperseg) // step + 1
+
+    owner = np.repeat(np.arange(len(windows)), segment_counts)
+    local = np.arange(segment_counts.sum()) - np.repeat(offsets_from_counts(segment_counts)[:-1], segment_counts)
+    starts = grid_offsets[:-1][windows][owner] + local * step
+    segments = signal_values[starts[:, None] + np.arange(nperseg)]
+    segments -= segments.mean(axis=1, keepdims=True)
+
+    spectra = np.abs(np.fft.rfft(segments * window, axis=1)) ** 2 * scale
+    psd = np.add.reduceat(spectra, offsets_from_counts(segment_counts)[:-1], axis=0) / segment_counts[:, None]
+
+    hf_power = trapezoid(psd[:, hf_mask], freqs[hf_mask], axis=-1)
+    lf_power = trapezoid(psd[:, lf_mask], freqs[lf_mask], axis=-1)
+    return hf_power, lf_power
+
+
+@lru_cache(maxsize=4)
+def _lomb_plan(step):
+    """Lomb-Scargle 주파수(LF 하한 ~ HF 상한)와 HF/LF 대역 마스크"""
+    freqs = np.arange(LF_BAND[0], HF_BAND[1] + step / 2, step)
+    hf_mask = (freqs >= HF_BAND[0]) & (freqs <= HF_BAND[1])
+    lf_mask = (freqs >= LF_BAND[0]) & (freqs < LF_BAND[1])
+    return freqs, hf_mask, lf_mask
+
+
+def _lomb_band_power(values, offsets, windows):
+    """
+    windows 구간들의 Lomb-Scargle PSD를 보간 없이 박동 시각에서 계산해 HF/LF power 반환
+
+    PSD는 등간격일 때 Welch(periodogram)와 같은 단위(ms²/Hz)가 되도록 평균 박동 주기로 스케일함
+    """
+    freqs, hf_mask, lf_mask = _lomb_plan(LOMB_FREQUENCY_STEP)
+    counts = np.diff(offsets)[windows]
+    index = np.concatenate([np.arange(offsets[w], offsets[w + 1]) for w in windows])
+    owner_offsets = offsets_from_counts(counts)
+    owner = np.repeat(np.arange(len(windows)), counts)
+
+    rr = values[index]
+    t = segment_cumsum(rr, owner_offsets) / 1000.0
+    y = rr - np.repeat(segment_sum(rr, owner_offsets) / counts, counts)
+
+    def reduce(matrix):
+        return np.add.reduceat(matrix, owner_offsets[:-1], axis=0)
+
+    omega_t = t[:, None] * (2 * np.pi * freqs)
+    tau = np.arctan2(reduce(np.sin(2 * omega_t)), reduce(np.cos(2 * omega_t))) / 2
+    shifted = omega_t - tau[owner]
+    cos_term, sin_term = np.cos(shifted), np.sin(shifted)
+    power = 0.5 * (
+        reduce(y[:, None] * cos_term) ** 2 / reduce(cos_term ** 2)
+        + reduce(y[:, None] * sin_term) ** 2 / reduce(sin_term ** 2)
+    )
+
+    duration = t[owner_offsets[1:] - 1] - t[owner_offsets[:-1]]
+    psd = power * (2 * duration / (counts - 1))[:, None]
+    hf_power = trapezoid(psd[:, hf_mask], freqs[hf_mask], axis=-1)
+    lf_power = trapezoid(psd[:, lf_mask], freqs[lf_mask], axis=-1)
+    return hf_power, lf_power
+
+
+def segment_frequency_domain(values, offsets, sampling_rate=4.0, method=FREQUENCY_METHOD_WELCH):
+    """
+    구간별 주파수 도메인 분석: HF, LF power, LF/HF ratio
+
+    welch: RR 타코그램을 sampling_rate로 보간한 뒤 Welch PSD (nperseg = min(보간 길이, 256), 50% overlap, Hann)
+    lomb: 보간 없이 박동 시각에서 Lomb-Scargle PSD
+    auto: Welch 세그먼트 1개(256 샘플)보다 짧거나 MAX_NN_INTERVAL_MS보다 긴 RR(끊긴 구간)이 있으면 lomb, 나머지는 welch
+
+    Args:
+        values: RR 간격 배열 (ms)
+        offsets: 구간 경계
+        sampling_rate: 보간 샘플링 레이트 (Hz), 기본값 4Hz
+        method: FREQUENCY_METHOD_WELCH / FREQUENCY_METHOD_LOMB / FREQUENCY_METHOD_AUTO
+
+    Returns:
+        tuple: (hf_power, lf_power, lf_hf_ratio) - RR이 MIN_FREQUENCY_COUNT개 미만이면 NaN,
+               HF가 0이거나 LF가 0이면 lf_hf_ratio는 NaN
+    """
+    if method not in (FREQUENCY_METHOD_WELCH, FREQUENCY_METHOD_LOMB, FREQUENCY_METHOD_AUTO):
+        raise ValueError(f'Unknown frequency method: {method}')
+
+    n_segments = len(offsets) - 1
+    hf_power = np.full(n_segments, np.nan)
+    lf_power = np.full(n_segments, np.nan)
+    counts = np.diff(offsets)
+    eligible = counts >= MIN_FREQUENCY_COUNT
+    if not eligible.any():
+        # RR이 없거나 MIN_FREQUENCY_COUNT개 미만인 구간만 있으면 보간하지 않음
+        return hf_power, lf_power, np.full(n_segments, np.nan)
+
+    resampled, grid_offsets = resample_tachogram(values, offsets, sampling_rate)
+    grid_counts = np.diff(grid_offsets)
+
+    if method == FREQUENCY_METHOD_LOMB:
+        use_lomb = eligible
+    elif method == FREQUENCY_METHOD_AUTO:
+        gappy = segment_sum((values > MAX_NN_INTERVAL_MS).astype(float), offsets) > 0
+        use_lomb = eligible & ((grid_counts < WELCH_MAX_NPERSEG) | gappy)
+    else:
+        use_lomb = np.zeros(n_segments, dtype=bool)
+
+    lomb_windows = np.flatnonzero(use_lomb)
+    if len(lomb_windows):
+        hf_power[lomb_windows], lf_power[lomb_windows] = _lomb_band_power(values, offsets, lomb_windows)
+
+    # 256 샘플 이상인 구간은 세그먼트 길이가 같으므로 한 번에, 더 짧은 구간은 길이별로 (nperseg = 길이)
+    welch_windows = eligible & ~use_lomb & (grid_counts >= 2)
+    full = np.flatnonzero(welch_windows & (grid_counts >= WELCH_MAX_NPERSEG))
+    if len(full):
+        hf_power[full], lf_power[full] = _welch_band_power(
+            resampled, grid_offsets, full, WELCH_MAX_NPERSEG, sampling_rate
+        )
+    for length in np.unique(grid_counts[welch_windows & (grid_counts < WELCH_MAX_NPERSEG)]):
+        short = np.flatnonzero(welch_windows & (grid_counts == length))
+        hf_power[short], lf_power[short] = _welch_band_power(
+            resampled, grid_offsets, short, int(length), sampling_rate
+        )
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lf_hf_ratio = np.where((hf_power > 0) & (lf_power != 0), lf_power / hf_power, np.nan)
+    return hf_power, lf_power, lf_hf_ratio
+
+
+def compute_hrv_batch(hr, hr_offsets, rr, rr_offsets, frequency_method=FREQUENCY_METHOD_WELCH):
+    """
+    구간별 HR 통계와 HRV 지표 (PolarHeartRateIndex5 필드와 같은 이름)
+
+    Args:
+        hr, hr_offsets: HR 값 (bpm) ragged 배열
+        rr, rr_offsets: RR 간격 (ms) ragged 배열 (hr과 구간 수가 같아야 함)
+        frequency_method: 주파수 도메인 계산 방법 (segment_frequency_domain 참고)
+
+    Returns:
+        dict: 지표 이름 -> 구간별 배열 (계산할 수 없으면 NaN)
+    """
+    mean_hr, sd_hr = segment_mean_std(hr, hr_offsets)
+    mean_rr, sdnn = segment_mean_std(rr, rr_offsets)
+    hf_power, lf_power, lf_hf_ratio = segment_frequency_domain(rr, rr_offsets, method=frequency_method)
+
+    # 95% 범위 (평균이나 표준편차가 0이면 없음)
+    has_bounds = (mean_hr != 0) & (sd_hr > 0)
+    with np.errstate(invalid='ignore'):
+        hr_upper = np.where(has_bounds, mean_hr + 1.96 * sd_hr, np.nan)
+        hr_lower = np.where(has_bounds, mean_hr - 1.96 * sd_hr, np.nan)
+
+    return {
+        'rmssd': segment_rmssd(rr, rr_offsets),
+        'sdnn': sdnn,
+        'hf_power': hf_power,
+        'lf_power': lf_power,
+        'lf_hf_ratio': lf_hf_ratio,
+        'mean_hr': mean_hr,
+        'sd_hr': sd_hr,
+        'hr_upper': hr_upper,
+        'hr_lower': hr_lower,
+        'mean_rr': mean_rr,
+    }
+
+
+def hrv_values(metrics, index):
+    """compute_hrv_batch 결과에서 구간 1개의 지표 dict (NaN은 None, DB 저장용)"""
+    return {
+        name: None if np.isnan(values[index]) else float(values[index])
+        for name, values in metrics.items()
+    }
+
+
+def _single_window(rr_intervals):
+    rr = np.asarray(rr_intervals, dtype=float)
+    return rr, np.array([0, len(rr)])
+
+
+def calculate_rmssd(rr_intervals):
+    """RMSSD 계산 (구간 1개, RR이 2개 미만이면 None)"""
+    value = segment_rmssd(*_single_window(rr_intervals))[0]
+    return None if np.isnan(value) else float(value)
+
+
+def calculate_sdnn(rr_intervals):
+    """SDNN 계산: RR 간격의 표준편차 (구간 1개, RR이 2개 미만이면 None)"""
+    value = segment_mean_std(*_single_window(rr_intervals))[1][0]
+    return None if np.isnan(value) else float(value)
+
+
+def calculate_frequency_domain(rr_intervals, sampling_rate=4.0, method=FREQUENCY_METHOD_WELCH):
+    """
+    주파수 도메인 분석 (구간 1개)
+
+    Returns:
+        tuple: (hf_power, lf_power, lf_hf_ratio) - 계산할 수 없으면 None
+    """
+    results = segment_frequency_domain(*_single_window(rr_intervals), sampling_rate=sampling_rate, method=method)
+    return tuple(None if np.isnan(values[0]) else float(values[0]) for values in results)
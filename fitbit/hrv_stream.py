@@ -0,0 +1,274 @@
+"""
+Polar HRV 지표 증분 계산 (스트리밍)
+
+calculate_polar_hrv_index.py는 5분마다 이상치 제거 cron(polar_heart_rate_nn)을 거친 데이터를 다시 읽어 계산하지만,
+이 엔진은 수신 테이블(polar_heart_rate)에 새로 저장된 행만 id 순으로 읽어 (사용자, 5분 구간)별로 모으고
+구간이 닫히면 polar_heart_rate_index_5 행을 만듦 (이상치 제거 cron을 기다리지 않으므로 지연이 grace만큼으로 줄어듦)
+
+- 구간은 일괄 계산/백필과 같은 fitbit.hrv.window_start로 정렬됨 (00:00, 00:05, ...)
+- 구간이 닫히면 샘플을 시각 순으로 정렬하고 remove_polar_outliers.py와 같은 3σ 규칙으로 이상치를 대체한 뒤
+  닫힌 구간 전체를 compute_hrv_batch로 한 번에 계산 (이상치 통계는 사용자의 5분 구간 기준)
+- 닫힌 구간은 index 행이 저장된 뒤에만 상태에서 제거 (저장이 실패하면 다음 poll에서 다시 계산)
+- id는 커밋 순서와 다르게 보일 수 있으므로 매 poll마다 마지막 id 이전 POLAR_HRV_STREAM_OVERLAP_ROWS개를 다시 확인하고
+  이미 읽은 id는 건너뜀
+- 구간 종료 후 POLAR_HRV_STREAM_GRACE_SECONDS가 지나면 닫힘
+  (그 뒤에 도착한 늦은 샘플은 같은 구간의 새 상태가 되어 다시 닫히지만, 이미 저장된 행은 ignore_conflicts로 유지)
+
+settings.POLAR_HRV_STREAMING을 켜면 remove_polar_outliers.py가 일괄 계산 스크립트를 실행하지 않으며,
+`python manage.py stream_polar_hrv`를 별도 프로세스로 1개만 실행해야 함
+"""
+import logging
+import threading
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .hrv import (
+    FREQUENCY_METHOD_WELCH, WINDOW_SECONDS, build_hrv_batch, compute_hrv_batch, hrv_values,
+    offsets_from_counts, segment_replace_outliers, window_start,
+)
+from .models import PolarHeartRate, PolarHeartRateIndex5
+
+logger = logging.getLogger(__name__)
+
+MAX_CLOSE_ATTEMPTS = 3  # 계산이 계속 실패하는 구간은 이 횟수 후 버림
+
+
+class HRVWindowState:
+    """(사용자, 5분 구간) 1개의 수신 샘플"""
+
+    __slots__ = ('start', 'samples', 'attempts')
+
+    def __init__(self, start):
+        self.start = start
+        self.samples = []  # (datetime, hr, rr)
+        self.attempts = 0  # 계산 실패 횟수
+
+    def add(self, dt, hr, rr):
+        self.samples.append((dt, hr, rr))
+
+
+class IncrementalHRVEngine:
+    """
+    사용자별 5분 구간 HRV 상태 관리
+
+    사용 예:
+        engine = IncrementalHRVEngine()
+        engine.add(username, date_of_birth, dt, hr, rr)  # 새 샘플마다
+        keys, rows = engine.ready_rows(timezone.now())  # 닫힌 구간의 PolarHeartRateIndex5 (저장 전)
+        PolarHeartRateIndex5.objects.bulk_create(rows, ignore_conflicts=True)
+        engine.discard(keys)  # 저장이 끝난 구간만 제거
+    """
+
+    def __init__(self, grace_seconds=None, frequency_method=None, window_seconds=WINDOW_SECONDS):
+        self.grace = timedelta(seconds=(
+            grace_seconds if grace_seconds is not None
+            else getattr(settings, 'POLAR_HRV_STREAM_GRACE_SECONDS', 120)
+        ))
+        self.frequency_method = frequency_method or getattr(settings, 'HRV_FREQUENCY_METHOD', FREQUENCY_METHOD_WELCH)
+        self.window_seconds = window_seconds
+        self.windows = {}  # (username, date_of_birth, 구간 시작) -> HRVWindowState
+
+    def add(self, username, date_of_birth, dt, hr, rr):
+        """샘플 1개 반영"""
+        start = window_start(dt, self.window_seconds)
+        key = (username, date_of_birth, start)
+        state = self.windows.get(key)
+        if state is None:
+            state = self.windows[key] = HRVWindowState(start)
+        state.add(dt, hr, rr)
+
+    def ready_rows(self, now):
+        """
+        종료 후 grace가 지난 구간의 지표 계산 (상태는 그대로 두며, 저장 후 discard로 제거)
+
+        Returns:
+            tuple: (닫힌 구간 key 목록, 저장 전 PolarHeartRateIndex5 목록)
+                   샘플이 2개 미만인 구간은 행 없이 key만 포함되고, 계산에 실패한 구간은 key에서도 빠짐
+        """
+        window_length = timedelta(seconds=self.window_seconds)
+        ready = sorted(
+            key for key, state in self.windows.items() if state.start + window_length + self.grace <= now
+        )
+        keys = [key for key in ready if len(self.windows[key].samples) < 2]
+        closed = [key for key in ready if len(self.windows[key].samples) >= 2]
+        if not closed:
+            return keys, []
+
+        try:
+            rows = self._compute(closed)
+        except Exception as e:
+            # 배치 계산이 실패하면 구간별로 다시 계산해 실패한 구간만 남김
+            logger.error(f"[HRV_STREAM] Batch computation failed, retrying per window: {str(e)}", exc_info=True)
+            rows = []
+            for key in closed:
+                try:
+                    rows.extend(self._compute([key]))
+                except Exception as window_error:
+                    state = self.windows[key]
+                    state.attempts += 1
+                    logger.error(f"[HRV_STREAM] Window {key} failed ({state.attempts}/{MAX_CLOSE_ATTEMPTS}): "
+                                 f"{str(window_error)}")
+                    if state.attempts >= MAX_CLOSE_ATTEMPTS:
+                        keys.append(key)
+                    continue
+                keys.append(key)
+            return keys, rows
+
+        return keys + closed, rows
+
+    def _compute(self, keys):
+        """구간들의 샘플을 시각 순으로 정렬하고 이상치를 대체한 뒤 한 번에 지표 계산"""
+        window_length = timedelta(seconds=self.window_seconds)
+        samples = [sorted(self.windows[key].samples, key=lambda sample: sample[0]) for key in keys]
+        offsets = offsets_from_counts([len(window) for window in samples])
+        hr = np.array([sample[1] for window in samples for sample in window], dtype=float)
+        rr = np.array([sample[2] or 0 for window in samples for sample in window], dtype=float)
+        hr = segment_replace_outliers(hr, offsets)
+        rr = segment_replace_outliers(rr, offsets)
+
+        codes = np.repeat(np.arange(len(keys)), np.diff(offsets))
+        _, data_counts, hr, hr_offsets, rr, rr_offsets = build_hrv_batch(zip(codes, hr, rr))
+        metrics = compute_hrv_batch(hr, hr_offsets, rr, rr_offsets, frequency_method=self.frequency_method)
+
+        return [
+            PolarHeartRateIndex5(
+                username=username,
+                date_of_birth=date_of_birth,
+                datetime_start=start,
+                datetime_end=start + window_length,
+                data_count=int(data_counts[code]),
+                **hrv_values(metrics, code)
+            )
+            for code, (username, date_of_birth, start) in enumerate(keys)
+        ]
+
+    def discard(self, keys):
+        """저장이 끝난 구간 제거"""
+        for key in keys:
+            self.windows.pop(key, None)
+
+
+class HRVStream:
+    """polar_heart_rate를 id 순으로 읽어 IncrementalHRVEngine에 넣고 닫힌 구간을 저장"""
+
+    FIELDS = ('id', 'username', 'date_of_birth', 'datetime', 'hr', 'rr')
+
+    def __init__(self, engine=None, batch_size=None, overlap_rows=None):
+        self.engine = engine or IncrementalHRVEngine()
+        self.batch_size = batch_size or getattr(settings, 'POLAR_HRV_STREAM_BATCH_SIZE', 10000)
+        self.overlap_rows = (
+            overlap_rows if overlap_rows is not None
+            else getattr(settings, 'POLAR_HRV_STREAM_OVERLAP_ROWS', 20000)
+        )
+        self.last_id = None
+        self.seen = set()  # 마지막 id 이전 overlap_rows 범위에서 이미 읽은 id
+
+    def start(self, now=None):
+        """
+        재시작 시 아직 닫히지 않았을 구간의 데이터를 다시 읽어 상태 복원
+        (이미 저장된 구간은 저장 시 ignore_conflicts로 건너뜀)
+        """
+        now = now or timezone.now()
+        since = window_start(now - self.engine.grace, self.engine.window_seconds) - timedelta(
+            seconds=self.engine.window_seconds
+        )
+        self.last_id = PolarHeartRate.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        rows = PolarHeartRate.objects.filter(datetime__gte=since, id__lte=self.last_id).order_by('id').values_list(
+            *self.FIELDS
+        )
+        count = self._feed(rows)
+        # 복원 범위 밖의 최근 행은 이미 닫힌 구간이므로 다시 읽지 않음
+        self.seen.update(self._overlap_ids())
+        return count
+
+    def _overlap_ids(self):
+        return PolarHeartRate.objects.filter(
+            id__gt=self.last_id - self.overlap_rows, id__lte=self.last_id
+        ).values_list('id', flat=True)
+
+    def _feed(self, rows):
+        count = 0
+        for row_id, username, date_of_birth, dt, hr, rr in rows:
+            if row_id in self.seen:
+                continue
+            self.seen.add(row_id)
+            self.last_id = max(self.last_id, row_id)
+            count += 1
+            if username and date_of_birth:
+                self.engine.add(username, date_of_birth, dt, hr, rr)
+        return count
+
+    def read_new_rows(self):
+        """
+        마지막 id 이후 행과, overlap 범위에서 늦게 커밋되어 아직 읽지 않은 행 반영
+
+        Returns:
+            int: 새로 반영한 행 수
+        """
+        late_ids = [row_id for row_id in self._overlap_ids() if row_id not in self.seen]
+        count = 0
+        for i in range(0, len(late_ids), self.batch_size):
+            count += self._feed(
+                PolarHeartRate.objects.filter(id__in=late_ids[i:i + self.batch_size]).values_list(*self.FIELDS)
+            )
+
+        while True:
+            rows = list(
+                PolarHeartRate.objects.filter(id__gt=self.last_id).order_by('id').values_list(
+                    *self.FIELDS
+                )[:self.batch_size]
+            )
+            count += self._feed(rows)
+            if len(rows) < self.batch_size:
+                break
+
+        floor = self.last_id - self.overlap_rows
+        self.seen = {row_id for row_id in self.seen if row_id > floor}
+        return count
+
+    def poll(self, now=None):
+        """
+        새 행을 반영하고 닫힌 구간 저장 (저장이 끝난 구간만 상태에서 제거)
+
+        Returns:
+            tuple: (읽은 행 수, 저장한 index 행 수)
+        """
+        if self.last_id is None:
+            self.start(now)
+
+        count = self.read_new_rows()
+        keys, index_rows = self.engine.ready_rows(now or timezone.now())
+        if index_rows:
+            PolarHeartRateIndex5.objects.bulk_create(index_rows, ignore_conflicts=True)
+        self.engine.discard(keys)
+        return count, len(index_rows)
+
+
+def is_hrv_streaming_enabled():
+    return getattr(settings, 'POLAR_HRV_STREAMING', False)
+
+
+def run_hrv_stream(stream=None, interval=None, stop_event=None):
+    """
+    스트리밍 루프 (interval초마다 새 행 확인)
+
+    Args:
+        stream: HRVStream (없으면 새로 생성)
+        interval: 확인 간격 (없으면 settings.POLAR_HRV_STREAM_INTERVAL)
+        stop_event: 설정되면 루프 종료 (threading.Event)
+    """
+    stream = stream or HRVStream()
+    interval = interval or getattr(settings, 'POLAR_HRV_STREAM_INTERVAL', 5.0)
+    stop_event = stop_event or threading.Event()
+
+    while not stop_event.is_set():
+        try:
+            close_old_connections()
+            samples, saved = stream.poll()
+            if saved:
+                logger.info(f"[HRV_STREAM] {samples} samples, {saved} index rows saved")
+        except Exception as e:
+            logger.error(f"[HRV_STREAM] Poll failed: {str(e)}", exc_info=True)
+        stop_event.wait(interval)
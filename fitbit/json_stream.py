@@ -0,0 +1,188 @@
+"""
+대용량 JSON 배열 본문을 항목 단위로 읽는 파서
+
+json.loads(request.body)는 본문 전체와 모든 항목 dict를 한 번에 메모리에 올리므로,
+오프라인으로 쌓인 수만 개의 샘플을 한 번에 받을 때는 요청 스트림을 고정 크기로 읽으면서
+배열 항목을 하나씩 디코딩함 (메모리 사용량이 본문 크기와 무관하게 일정)
+"""
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+VALUE_TERMINATORS = WHITESPACE + ',]'
+# 버퍼 끝에서 잘린 리터럴/이스케이프(예: "tru", "\u00")는 에러 위치 뒤에 이보다 적은 글자만 남음
+TRUNCATION_LOOKAHEAD = 16
+
+
+class JSONStreamError(ValueError):
+    """본문이 JSON 배열이 아니거나 형식이 잘못됨"""
+
+
+class BodyTooLargeError(JSONStreamError):
+    """본문이 최대 크기를 넘음"""
+
+
+def _may_be_truncated(error, length):
+    """
+    디코딩 에러가 값이 버퍼 끝에서 잘려서 난 것일 수 있는지 (아니면 더 읽어도 같은 에러이므로 바로 실패)
+
+    닫히지 않은 문자열은 에러 위치가 문자열 시작이므로 길이와 관계없이 잘린 것으로 봄 (max_item_size로 제한)
+    """
+    if error.msg.startswith('Unterminated string'):
+        return True
+    return length - error.pos < TRUNCATION_LOOKAHEAD
+
+
+class _StreamBuffer:
+    """요청 스트림을 read_size씩 읽어 문자열 버퍼로 유지 (이미 처리한 앞부분은 주기적으로 버림)"""
+
+    def __init__(self, stream, max_size, read_size):
+        self.stream = stream
+        self.max_size = max_size
+        self.read_size = read_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.total = 0
+        self.eof = False
+
+    def fill(self):
+        """다음 조각을 읽어 버퍼에 추가 (더 읽을 것이 없으면 False)"""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            self.text += self.decoder.decode(b'', final=True)
+            return False
+
+        self.total += len(chunk)
+        if self.total > self.max_size:
+            raise BodyTooLargeError(f'Request body too large (max {self.max_size} bytes)')
+
+        # 처리가 끝난 앞부분을 버려 버퍼가 본문 전체만큼 커지지 않도록 함
+        if self.pos > self.read_size:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+        try:
+            self.text += self.decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise JSONStreamError('Invalid UTF-8 body')
+        return True
+
+    def next_char(self):
+        """공백을 건너뛴 다음 문자 (소비하지 않음, 본문 끝이면 None)"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return None
+
+
+class JSONArrayStream:
+    """
+    요청 본문 스트림 파서
+
+    사용 예:
+        parser = JSONArrayStream(request, max_size)
+        if parser.is_array():
+            for item in parser.items(): ...
+        else:
+            data = parser.read_value()  # 배열이 아니면 본문 전체를 한 번에 디코딩
+    """
+
+    def __init__(self, stream, max_size, read_size=64 * 1024, max_item_size=1024 * 1024):
+        """
+        Args:
+            stream: read(n)를 지원하는 본문 스트림 (HttpRequest 등)
+            max_size: 본문 최대 크기 (바이트, 초과 시 BodyTooLargeError)
+            read_size: 한 번에 읽을 크기 (바이트)
+            max_item_size: 배열 항목 1개의 최대 크기 (글자 수, 초과 시 JSONStreamError)
+        """
+        self.buffer = _StreamBuffer(stream, max_size, read_size)
+        self.decoder = json.JSONDecoder()
+        self.max_item_size = max_item_size
+
+    def is_array(self):
+        """본문이 JSON 배열인지 확인 (본문을 소비하지 않음)"""
+        return self.buffer.next_char() == '['
+
+    def read_value(self):
+        """
+        본문 전체를 JSON 값 1개로 디코딩 (배열이 아닌 본문용, 최대 크기 제한은 동일)
+
+        Raises:
+            JSONStreamError: 형식 오류
+        """
+        while self.buffer.fill():
+            pass
+        try:
+            return json.loads(self.buffer.text[self.buffer.pos:])
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f'Invalid JSON format: {e.msg}')
+
+    def items(self):
+        """
+        JSON 배열 항목을 하나씩 yield
+
+        Raises:
+            JSONStreamError: 배열이 아니거나 형식 오류
+            BodyTooLargeError: 본문이 max_size를 넘는 경우
+        """
+        buffer = self.buffer
+        if buffer.next_char() != '[':
+            raise JSONStreamError('Expected a JSON array')
+        buffer.pos += 1
+
+        if buffer.next_char() == ']':
+            buffer.pos += 1
+        else:
+            while True:
+                if buffer.next_char() is None:
+                    raise JSONStreamError('Unexpected end of JSON array')
+
+                # 버퍼 끝에서 잘린 값(예: 숫자 "12"|"3", "1.5"|"e3")을 완성된 값으로 착각하지 않도록
+                # 값 뒤에 구분 문자(공백, ',' 또는 ']')가 이미 읽혔거나 본문 끝일 때만 디코딩 결과를 사용.
+                # 잘려서 난 에러가 아니면 본문을 더 읽지 않고 바로 실패
+                while True:
+                    try:
+                        item, end = self.decoder.raw_decode(buffer.text, buffer.pos)
+                        if buffer.eof or (end < len(buffer.text) and buffer.text[end] in VALUE_TERMINATORS):
+                            break
+                    except json.JSONDecodeError as e:
+                        if buffer.eof or not _may_be_truncated(e, len(buffer.text)):
+                            raise JSONStreamError(f'Invalid JSON format: {e.msg}')
+                    if len(buffer.text) - buffer.pos > self.max_item_size:
+                        raise JSONStreamError(f'JSON array item too large (max {self.max_item_size} characters)')
+                    buffer.fill()
+
+                buffer.pos = end
+                yield item
+
+                separator = buffer.next_char()
+                if separator == ',':
+                    buffer.pos += 1
+                elif separator == ']':
+                    buffer.pos += 1
+                    break
+                else:
+                    raise JSONStreamError('Expected "," or "]" in JSON array')
+
+        if buffer.next_char() is not None:
+            raise JSONStreamError('Unexpected data after JSON array')
+
+
+def iter_chunks(items, chunk_size):
+    """iterable을 chunk_size개씩 리스트로 묶어 yield"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
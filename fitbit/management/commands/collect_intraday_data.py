@@ -7,11 +7,12 @@
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import datetime, timedelta
-import requests
-import base64
+from datetime import timedelta
 import time
 from fitbit.models import FitbitUser, IntradayHeartRate, IntradaySteps, IntradayCalories
+from fitbit.fitbit_api import fitbit_client
+from fitbit.token_refresh import ensure_valid_token
+from fitbit.data_sync import parse_dataset_datetimes
 from django.conf import settings
 
 
@@ -63,36 +64,15 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('\n=== 데이터 수집 완료 ===\n'))
 
     def refresh_token_if_needed(self, user):
-        """토큰 갱신"""
-        auth_header = base64.b64encode(
-            f"{settings.FITBIT_CLIENT_ID}:{settings.FITBIT_CLIENT_SECRET}".encode()
-        ).decode()
-
-        headers = {
-            'Authorization': f'Basic {auth_header}',
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-
-        data = {
-            'grant_type': 'refresh_token',
-            'refresh_token': user.refresh_token
-        }
-
-        response = requests.post(settings.FITBIT_TOKEN_URL, headers=headers, data=data)
-
-        if response.status_code == 200:
-            token_data = response.json()
-            user.access_token = token_data['access_token']
-            user.refresh_token = token_data['refresh_token']
-            user.save()
-            return True
-        else:
-            raise Exception(f"토큰 갱신 실패: {response.text}")
+        """토큰 갱신 (동시에 실행 중인 다른 동기화와 겹치지 않도록 사용자별 잠금 사용)"""
+        if not ensure_valid_token(user, force=True):
+            raise Exception("토큰 갱신 실패")
+        return True
 
     def make_api_request(self, user, url, retry=True):
         """Fitbit API 요청 (자동 토큰 갱신 포함)"""
         headers = {'Authorization': f'Bearer {user.access_token}'}
-        response = requests.get(url, headers=headers)
+        response = fitbit_client.get(url, headers=headers)
 
         # 401 에러 시 토큰 갱신 후 재시도
         if response.status_code == 401 and retry:
@@ -121,10 +101,8 @@ class Command(BaseCommand):
 
         count = 0
         if 'activities-heart-intraday' in data and 'dataset' in data['activities-heart-intraday']:
-            for entry in data['activities-heart-intraday']['dataset']:
-                dt = timezone.make_aware(
-                    datetime.strptime(f"{date} {entry['time']}", '%Y-%m-%d %H:%M:%S')
-                )
+            dataset = data['activities-heart-intraday']['dataset']
+            for dt, entry in parse_dataset_datetimes(date, dataset, tz=timezone.get_current_timezone()):
 
                 IntradayHeartRate.objects.update_or_create(
                     fitbit_user_id=user.fitbit_user_id,
@@ -151,10 +129,8 @@ class Command(BaseCommand):
 
         count = 0
         if 'activities-steps-intraday' in data and 'dataset' in data['activities-steps-intraday']:
-            for entry in data['activities-steps-intraday']['dataset']:
-                dt = timezone.make_aware(
-                    datetime.strptime(f"{date} {entry['time']}", '%Y-%m-%d %H:%M:%S')
-                )
+            dataset = data['activities-steps-intraday']['dataset']
+            for dt, entry in parse_dataset_datetimes(date, dataset, tz=timezone.get_current_timezone()):
 
                 IntradaySteps.objects.update_or_create(
                     fitbit_user_id=user.fitbit_user_id,
@@ -181,10 +157,8 @@ class Command(BaseCommand):
 
         count = 0
         if 'activities-calories-intraday' in data and 'dataset' in data['activities-calories-intraday']:
-            for entry in data['activities-calories-intraday']['dataset']:
-                dt = timezone.make_aware(
-                    datetime.strptime(f"{date} {entry['time']}", '%Y-%m-%d %H:%M:%S')
-                )
+            dataset = data['activities-calories-intraday']['dataset']
+            for dt, entry in parse_dataset_datetimes(date, dataset, tz=timezone.get_current_timezone()):
 
                 IntradayCalories.objects.update_or_create(
                     fitbit_user_id=user.fitbit_user_id,
@@ -0,0 +1,46 @@
+"""
+Polar write-behind 큐를 polar_heart_rate에 저장하는 Django 관리 명령
+
+POLAR_QUEUE_IN_PROCESS_DRAINER=False로 웹 워커 내 drainer를 끄고 별도 프로세스(systemd 등)로 실행할 때 사용
+"""
+from django.core.management.base import BaseCommand
+from fitbit.polar_queue import get_polar_queue, run_drainer
+
+
+class Command(BaseCommand):
+    help = 'Polar write-behind 큐에 쌓인 심박수 데이터를 DB에 저장합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='큐가 빌 때까지 저장한 뒤 종료 (기본: 계속 실행)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='큐가 비어 있을 때 대기 시간 (초, 기본: POLAR_QUEUE_DRAIN_INTERVAL)',
+        )
+        parser.add_argument(
+            '--requeue-dead',
+            action='store_true',
+            help='POLAR_QUEUE_MAX_ATTEMPTS번 실패하여 polar_queue_dead로 옮겨진 행을 다시 큐에 넣음 (원인 해결 후)',
+        )
+
+    def handle(self, *args, **options):
+        queue = get_polar_queue()
+        self.stdout.write(f'큐 파일: {queue.path} (대기 중 {queue.pending_count()}개, 실패 {queue.dead_count()}행)')
+
+        if options['requeue_dead']:
+            count = queue.requeue_dead()
+            self.stdout.write(self.style.SUCCESS(f'실패한 {count}행을 다시 큐에 추가'))
+
+        if options['once']:
+            count = queue.drain()
+            self.stdout.write(self.style.SUCCESS(f'{count}개 저장 완료'))
+            return
+
+        try:
+            run_drainer(queue, interval=options.get('interval'))
+        except KeyboardInterrupt:
+            self.stdout.write('종료')
@@ -0,0 +1,39 @@
+"""
+Polar HRV 지표 증분 계산 Django 관리 명령
+
+settings.POLAR_HRV_STREAMING=True로 5분 일괄 계산(calculate_polar_hrv_index.py)을 끄고
+이 명령을 별도 프로세스(systemd 등)로 1개만 실행 (fitbit/hrv_stream.py 참고)
+"""
+from django.core.management.base import BaseCommand
+from fitbit.hrv_stream import HRVStream, run_hrv_stream
+
+
+class Command(BaseCommand):
+    help = '새로 수신된 Polar 심박 데이터로 5분 구간 HRV 지표를 증분 계산합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='새 수신 데이터를 한 번 반영하고 닫힌 구간을 저장한 뒤 종료 (기본: 계속 실행)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='새 수신 데이터 확인 간격 (초, 기본: POLAR_HRV_STREAM_INTERVAL)',
+        )
+
+    def handle(self, *args, **options):
+        stream = HRVStream()
+        restored = stream.start()
+        self.stdout.write(f'열린 구간 복원: 샘플 {restored}개, 구간 {len(stream.engine.windows)}개')
+
+        if options['once']:
+            samples, saved = stream.poll()
+            self.stdout.write(self.style.SUCCESS(f'샘플 {samples}개 반영, index {saved}개 저장'))
+            return
+
+        try:
+            run_hrv_stream(stream, interval=options.get('interval'))
+        except KeyboardInterrupt:
+            self.stdout.write('종료')
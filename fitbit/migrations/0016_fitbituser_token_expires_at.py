@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitbit', '0015_polarheartrateindex5'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fitbituser',
+            name='token_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
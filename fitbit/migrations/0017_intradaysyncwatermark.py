@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitbit', '0016_fitbituser_token_expires_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntradaySyncWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fitbit_user_id', models.CharField(max_length=255)),
+                ('metric', models.CharField(max_length=20)),
+                ('last_synced_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'intraday_sync_watermarks',
+                'unique_together': {('fitbit_user_id', 'metric')},
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+from django.db import migrations, transaction
+from django.db.models import Count, Min, Q
+
+
+NATURAL_KEY = ('username', 'date_of_birth', 'device_id', 'datetime')
+GROUP_CHUNK_SIZE = 500
+DELETE_CHUNK_SIZE = 1000
+
+
+def remove_duplicate_polar_heart_rates(apps, schema_editor):
+    """
+    unique 제약 추가 전 중복 행 삭제 (자연키별로 id가 가장 작은 행만 유지)
+
+    중복 그룹을 GROUP_CHUNK_SIZE개씩 나누어 처리하고 청크마다 커밋하여
+    큰 테이블에서도 한 번에 긴 트랜잭션/잠금을 잡지 않도록 함
+    """
+    PolarHeartRate = apps.get_model('fitbit', 'PolarHeartRate')
+
+    duplicate_groups = list(
+        PolarHeartRate.objects.values(*NATURAL_KEY)
+        .annotate(keep_id=Min('id'), row_count=Count('id'))
+        .filter(row_count__gt=1)
+        .order_by()
+    )
+
+    deleted_total = 0
+    for start in range(0, len(duplicate_groups), GROUP_CHUNK_SIZE):
+        groups = duplicate_groups[start:start + GROUP_CHUNK_SIZE]
+
+        condition = Q()
+        for group in groups:
+            condition |= Q(**{field: group[field] for field in NATURAL_KEY})
+        keep_ids = {group['keep_id'] for group in groups}
+
+        duplicate_ids = [
+            row_id
+            for row_id in PolarHeartRate.objects.filter(condition).values_list('id', flat=True)
+            if row_id not in keep_ids
+        ]
+
+        with transaction.atomic():
+            for delete_start in range(0, len(duplicate_ids), DELETE_CHUNK_SIZE):
+                ids = duplicate_ids[delete_start:delete_start + DELETE_CHUNK_SIZE]
+                deleted, _ = PolarHeartRate.objects.filter(id__in=ids).delete()
+                deleted_total += deleted
+
+    if deleted_total:
+        print(f"\n  polar_heart_rate 중복 {deleted_total}개 삭제 ({len(duplicate_groups)}개 그룹)")
+
+
+class Migration(migrations.Migration):
+
+    # 중복 삭제를 청크마다 커밋하기 위해 마이그레이션 전체를 하나의 트랜잭션으로 묶지 않음
+    atomic = False
+
+    dependencies = [
+        ('fitbit', '0017_intradaysyncwatermark'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_polar_heart_rates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='polarheartrate',
+            unique_together={('username', 'date_of_birth', 'device_id', 'datetime')},
+        ),
+    ]
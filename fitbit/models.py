@@ -8,6 +8,7 @@ class FitbitUser(models.Model):
     fitbit_user_id = models.CharField(max_length=255, unique=True)
     access_token = models.TextField()
     refresh_token = models.TextField()
+    token_expires_at = models.DateTimeField(null=True, blank=True)  # access token 만료 시각 (토큰 응답의 expires_in 기준)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     granted_scope = models.TextField(null=True, blank=True)
@@ -318,6 +319,21 @@ class SkinTemperature(models.Model):
         return f"SkinTemperature({self.fitbit_user_id}, {self.date}, {self.relative_temp}°C)"
 
 
+class IntradaySyncWatermark(models.Model):
+    """사용자/데이터 종류별 Intraday 증분 동기화 위치 (마지막으로 저장된 분)"""
+    fitbit_user_id = models.CharField(max_length=255)
+    metric = models.CharField(max_length=20)  # heart, steps, calories, distance, floors, elevation, spo2, hrv (spo2/hrv는 날짜 시작)
+    last_synced_at = models.DateTimeField()  # 마지막으로 조회를 마친 분
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'intraday_sync_watermarks'
+        unique_together = ('fitbit_user_id', 'metric')
+
+    def __str__(self):
+        return f"IntradaySyncWatermark({self.fitbit_user_id}, {self.metric}, {self.last_synced_at})"
+
+
 class PolarHeartRate(models.Model):
     """Polar 기기 실시간 심박수 및 RR 간격 데이터"""
     device_id = models.CharField(max_length=255, db_index=True)  # Polar 기기 MAC 주소
@@ -330,6 +346,8 @@ class PolarHeartRate(models.Model):
 
     class Meta:
         db_table = 'polar_heart_rate'
+        # 모바일 재전송 시 같은 샘플이 중복 저장되지 않도록 자연키로 unique
+        unique_together = ('username', 'date_of_birth', 'device_id', 'datetime')
         ordering = ['-datetime']
         indexes = [
             models.Index(fields=['device_id', '-datetime']),
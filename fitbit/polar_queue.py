@@ -0,0 +1,428 @@
+"""
+Polar 심박수 write-behind 큐
+
+settings.POLAR_WRITE_BEHIND가 켜져 있으면 receive_polar_data는 검증된 샘플을
+로컬 SQLite(WAL) 큐 파일에 추가만 하고 바로 응답하며, 백그라운드 drainer가
+큐를 큰 배치로 묶어 polar_heart_rate에 bulk insert함 (요청 지연이 DB 지연과 무관해짐)
+
+- 큐 파일은 프로세스/워커 간에 공유되며, drainer는 행을 lease 방식으로 가져가므로 여러 개가 동시에 실행되어도 됨
+- 중복 insert는 unique 제약 + ignore_conflicts로 무시되므로 drainer가 insert 후 큐 삭제 전에 죽어도 안전
+- 큐에 쌓인 샘플이 POLAR_QUEUE_MAX_PENDING을 넘으면 QueueFullError (요청은 503으로 거절, 클라이언트 재시도)
+- 큐 파일은 synchronous=FULL로 기록하므로 응답한 샘플은 전원이 꺼져도 남음
+- 데이터 문제(역직렬화 실패, 제약 위반 등)로 insert에 실패한 행은 lease가 끝난 뒤 다시 시도하고,
+  POLAR_QUEUE_MAX_ATTEMPTS번 실패하면 polar_queue_dead 테이블로 옮겨 나머지 큐가 막히지 않도록 함
+  (원인 해결 후 drain_polar_queue --requeue-dead)
+- DB 연결 끊김/잠금 같은 일시적인 오류(TRANSIENT_DB_ERRORS)는 실패 횟수에 넣지 않고 lease를 풀어 둔 채 대기 후 재시도
+- 웹 워커 안의 drainer는 첫 요청(request_started)에서 시작되므로 재시작 직후 업로드가 없어도 남은 큐를 저장함
+- 실시간 대시보드(fitbit.realtime)에는 drainer가 커밋한 뒤에 전달하므로, 대시보드에 보인 샘플은 항상 DB에 있음
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from .models import PolarHeartRate
+from .realtime import polar_sample_broker
+
+logger = logging.getLogger(__name__)
+
+# 행 내용과 무관하게 DB 상태 때문에 실패하는 오류 (실패 횟수에 넣지 않음)
+TRANSIENT_DB_ERRORS = (OperationalError, InterfaceError)
+
+
+class QueueFullError(Exception):
+    """큐에 쌓인 샘플 수가 한도를 넘어 더 받을 수 없음"""
+
+
+def is_write_behind_enabled():
+    return getattr(settings, 'POLAR_WRITE_BEHIND', False)
+
+
+def serialize_polar_heart_rate(polar_data):
+    """저장 전 PolarHeartRate -> 큐에 기록할 리스트"""
+    return [
+        polar_data.device_id,
+        polar_data.datetime.isoformat(),
+        polar_data.hr,
+        polar_data.rr,
+        polar_data.username,
+        polar_data.date_of_birth.isoformat() if polar_data.date_of_birth else None,
+    ]
+
+
+def deserialize_polar_heart_rate(sample):
+    """큐에 기록된 리스트 -> 저장 전 PolarHeartRate"""
+    device_id, dt, hr, rr, username, date_of_birth = sample
+    return PolarHeartRate(
+        device_id=device_id,
+        datetime=datetime.fromisoformat(dt),
+        hr=hr,
+        rr=rr,
+        username=username,
+        date_of_birth=datetime.strptime(date_of_birth, '%Y-%m-%d').date() if date_of_birth else None,
+    )
+
+
+class PolarWriteQueue:
+    """SQLite(WAL) 파일 기반 durable 큐 (요청 1건 = 큐 1행)"""
+
+    def __init__(self, path=None, max_pending=None, batch_size=None, lease_seconds=None, max_attempts=None):
+        """
+        Args:
+            path: 큐 파일 경로 (없으면 settings.POLAR_QUEUE_PATH)
+            max_pending: 큐에 쌓일 수 있는 최대 샘플 수 (없으면 settings.POLAR_QUEUE_MAX_PENDING)
+            batch_size: drainer가 한 번에 insert할 샘플 수 (없으면 settings.POLAR_QUEUE_BATCH_SIZE)
+            lease_seconds: drainer가 가져간 행을 다른 drainer가 다시 가져갈 수 있게 되는 시간
+                           (없으면 settings.POLAR_QUEUE_LEASE_SECONDS, insert 실패 시 재시도 간격이기도 함)
+            max_attempts: 이 횟수만큼 insert에 실패한 행은 polar_queue_dead로 옮김
+                          (없으면 settings.POLAR_QUEUE_MAX_ATTEMPTS)
+        """
+        self.path = str(path or getattr(settings, 'POLAR_QUEUE_PATH', settings.BASE_DIR / 'polar_queue.sqlite3'))
+        self.max_pending = max_pending or getattr(settings, 'POLAR_QUEUE_MAX_PENDING', 100000)
+        self.batch_size = batch_size or getattr(settings, 'POLAR_QUEUE_BATCH_SIZE', 5000)
+        self.lease_seconds = lease_seconds or getattr(settings, 'POLAR_QUEUE_LEASE_SECONDS', 300)
+        self.max_attempts = max_attempts or getattr(settings, 'POLAR_QUEUE_MAX_ATTEMPTS', 5)
+        self._local = threading.local()
+
+    def _connect(self):
+        """스레드별 SQLite 연결 (WAL 모드, 커밋마다 fsync, 쓰기 잠금 대기 최대 5초)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # 202 응답 후에 유실되지 않도록 WAL 커밋마다 fsync (NORMAL은 전원 장애 시 마지막 커밋이 사라질 수 있음)
+            conn.execute('PRAGMA synchronous=FULL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS polar_queue ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' sample_count INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' enqueued_at REAL NOT NULL,'
+                ' claimed_at REAL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0)'
+            )
+            # attempts 컬럼이 없던 이전 버전의 큐 파일
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(polar_queue)')}
+            if 'attempts' not in columns:
+                try:
+                    conn.execute('ALTER TABLE polar_queue ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+                except sqlite3.OperationalError:
+                    pass  # 다른 프로세스가 먼저 추가함
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS polar_queue_dead ('
+                ' id INTEGER PRIMARY KEY,'
+                ' sample_count INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' enqueued_at REAL NOT NULL,'
+                ' attempts INTEGER NOT NULL,'
+                ' failed_at REAL NOT NULL,'
+                ' error TEXT)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def pending_count(self):
+        """큐에 쌓인 샘플 수"""
+        row = self._connect().execute('SELECT COALESCE(SUM(sample_count), 0) FROM polar_queue').fetchone()
+        return row[0]
+
+    def enqueue(self, objects):
+        """
+        검증된 PolarHeartRate 목록을 큐에 추가 (INSERT 1회)
+
+        Raises:
+            QueueFullError: 큐에 쌓인 샘플이 max_pending을 넘는 경우
+        """
+        if not objects:
+            return 0
+
+        pending = self.pending_count()
+        if pending + len(objects) > self.max_pending:
+            raise QueueFullError(f'Polar queue is full ({pending} samples pending)')
+
+        payload = json.dumps([serialize_polar_heart_rate(obj) for obj in objects], separators=(',', ':'))
+        self._connect().execute(
+            'INSERT INTO polar_queue (sample_count, payload, enqueued_at) VALUES (?, ?, ?)',
+            (len(objects), payload, time.time())
+        )
+        return len(objects)
+
+    def _claim(self):
+        """
+        insert할 행을 batch_size 샘플만큼 가져감 (다른 drainer와 겹치지 않도록 claimed_at 기록)
+
+        Returns:
+            list: [(id, payload), ...]
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, sample_count, payload FROM polar_queue'
+                ' WHERE claimed_at IS NULL OR claimed_at < ? ORDER BY id LIMIT 1000',
+                (now - self.lease_seconds,)
+            ).fetchall()
+
+            claimed = []
+            total = 0
+            for row_id, sample_count, payload in rows:
+                if claimed and total + sample_count > self.batch_size:
+                    break
+                claimed.append((row_id, payload))
+                total += sample_count
+
+            if claimed:
+                conn.executemany('UPDATE polar_queue SET claimed_at = ? WHERE id = ?', [(now, row_id) for row_id, _ in claimed])
+            conn.execute('COMMIT')
+            return claimed
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def drain_once(self):
+        """
+        큐에서 한 배치를 꺼내 polar_heart_rate에 bulk insert
+
+        Returns:
+            int: insert한 샘플 수 (큐가 비어 있거나 모두 실패하면 0)
+        """
+        return self.drain_batch()[1]
+
+    def drain_batch(self):
+        """
+        큐에서 한 배치를 꺼내 insert
+
+        배치 insert가 실패하면 행(요청 1건)별로 다시 insert하여 실패한 행만 남김
+        (실패한 행은 lease가 끝난 뒤 재시도, max_attempts번 실패하면 polar_queue_dead로 이동)
+
+        Returns:
+            tuple: (가져간 행 수, insert한 샘플 수) - 가져간 행이 0이면 큐가 비어 있음
+
+        Raises:
+            TRANSIENT_DB_ERRORS: DB 연결/잠금 오류 (저장하지 못한 행은 실패 횟수를 올리지 않고 lease를 풀어 둠)
+        """
+        claimed = self._claim()
+        if not claimed:
+            return 0, 0
+
+        transient = None
+        try:
+            objects = [
+                deserialize_polar_heart_rate(sample)
+                for _, payload in claimed
+                for sample in json.loads(payload)
+            ]
+            # 이미 저장된 샘플(재전송, drainer 재시작)은 unique 제약으로 무시
+            with transaction.atomic():
+                PolarHeartRate.objects.bulk_create(objects, batch_size=1000, ignore_conflicts=True)
+            self._publish(objects)
+            done = [row_id for row_id, _ in claimed]
+            failed = []
+            inserted = len(objects)
+        except TRANSIENT_DB_ERRORS as e:
+            done, failed, inserted, transient = [], [], 0, e
+        except Exception as e:
+            logger.warning(f"[POLAR_QUEUE] Batch insert failed, retrying {len(claimed)} rows one by one: {str(e)}")
+            done, failed, inserted, transient = self._insert_rows(claimed)
+
+        self._connect().executemany('DELETE FROM polar_queue WHERE id = ?', [(row_id,) for row_id in done])
+        if failed:
+            self._record_failures(failed)
+        if transient is not None:
+            finished = set(done) | {row_id for row_id, _ in failed}
+            self._release([row_id for row_id, _ in claimed if row_id not in finished])
+            raise transient
+        return len(claimed), inserted
+
+    def _insert_rows(self, claimed):
+        """
+        행별 insert (배치 insert 실패 시)
+
+        Returns:
+            tuple: (저장된 행 id 리스트, [(실패한 행 id, 에러 메시지), ...], insert한 샘플 수,
+                    중간에 발생한 일시적인 DB 오류 또는 None - 발생하면 나머지 행은 시도하지 않음)
+        """
+        done = []
+        failed = []
+        inserted = 0
+        for row_id, payload in claimed:
+            try:
+                objects = [deserialize_polar_heart_rate(sample) for sample in json.loads(payload)]
+                with transaction.atomic():
+                    PolarHeartRate.objects.bulk_create(objects, batch_size=1000, ignore_conflicts=True)
+            except TRANSIENT_DB_ERRORS as e:
+                return done, failed, inserted, e
+            except Exception as e:
+                failed.append((row_id, str(e)))
+            else:
+                self._publish(objects)
+                done.append(row_id)
+                inserted += len(objects)
+        return done, failed, inserted, None
+
+    def _publish(self, objects):
+        """커밋된 샘플을 실시간 구독자에게 전달 (실패해도 저장에는 영향 없음)"""
+        try:
+            polar_sample_broker.publish(objects)
+        except Exception as e:
+            logger.warning(f"[POLAR_QUEUE] Realtime publish failed: {str(e)}")
+
+    def _release(self, row_ids):
+        """가져간 행의 lease를 풀어 다음 drain에서 바로 다시 가져갈 수 있게 함"""
+        self._connect().executemany('UPDATE polar_queue SET claimed_at = NULL WHERE id = ?', [(row_id,) for row_id in row_ids])
+
+    def _record_failures(self, failed):
+        """실패한 행의 attempts를 올리고 max_attempts에 도달한 행은 polar_queue_dead로 이동"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('UPDATE polar_queue SET attempts = attempts + 1 WHERE id = ?', [(row_id,) for row_id, _ in failed])
+            dead = conn.executemany(
+                'INSERT OR REPLACE INTO polar_queue_dead (id, sample_count, payload, enqueued_at, attempts, failed_at, error)'
+                ' SELECT id, sample_count, payload, enqueued_at, attempts, ?, ? FROM polar_queue WHERE id = ? AND attempts >= ?',
+                [(now, error, row_id, self.max_attempts) for row_id, error in failed]
+            ).rowcount
+            conn.executemany(
+                'DELETE FROM polar_queue WHERE id = ? AND attempts >= ?',
+                [(row_id, self.max_attempts) for row_id, _ in failed]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if dead:
+            logger.error(f"[POLAR_QUEUE] Moved {dead} rows to polar_queue_dead after {self.max_attempts} failed attempts: "
+                         f"{failed[0][1]}")
+
+    def dead_count(self):
+        """polar_queue_dead로 옮겨진 행 수"""
+        return self._connect().execute('SELECT COUNT(*) FROM polar_queue_dead').fetchone()[0]
+
+    def requeue_dead(self):
+        """
+        polar_queue_dead의 행을 다시 큐에 넣음 (원인을 해결한 뒤 수동 실행, attempts는 0으로 초기화)
+
+        Returns:
+            int: 다시 넣은 행 수
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            count = conn.execute(
+                'INSERT INTO polar_queue (sample_count, payload, enqueued_at)'
+                ' SELECT sample_count, payload, enqueued_at FROM polar_queue_dead ORDER BY id'
+            ).rowcount
+            conn.execute('DELETE FROM polar_queue_dead')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def drain(self):
+        """
+        가져갈 행이 없을 때까지 drain_batch 반복 (모두 실패한 배치는 lease로 남겨 두고 다음 배치로 넘어감)
+
+        Returns:
+            int: insert한 샘플 수
+        """
+        total = 0
+        while True:
+            claimed, count = self.drain_batch()
+            if not claimed:
+                return total
+            total += count
+
+
+_queue = None
+_queue_lock = threading.Lock()
+_drainer = None
+
+
+def get_polar_queue():
+    """프로세스 공용 큐 (처음 사용할 때 생성)"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = PolarWriteQueue()
+    return _queue
+
+
+def run_drainer(queue=None, interval=None, stop_event=None):
+    """
+    drainer 루프 (큐가 비어 있으면 interval초 대기)
+
+    일시적인 DB 오류가 이어지면 대기 시간을 두 배씩 늘림 (최대 lease_seconds)
+
+    Args:
+        queue: PolarWriteQueue (없으면 프로세스 공용 큐)
+        interval: 큐가 비어 있을 때 대기 시간 (없으면 settings.POLAR_QUEUE_DRAIN_INTERVAL)
+        stop_event: 설정되면 루프 종료 (threading.Event)
+    """
+    queue = queue or get_polar_queue()
+    interval = interval or getattr(settings, 'POLAR_QUEUE_DRAIN_INTERVAL', 1.0)
+    stop_event = stop_event or threading.Event()
+
+    backoff = interval
+
+    while not stop_event.is_set():
+        try:
+            close_old_connections()
+            claimed, count = queue.drain_batch()
+            backoff = interval
+            if count:
+                logger.info(f"[POLAR_QUEUE] Inserted {count} samples")
+            if claimed:
+                continue
+        except TRANSIENT_DB_ERRORS as e:
+            backoff = min(backoff * 2, queue.lease_seconds)
+            logger.warning(f"[POLAR_QUEUE] Database unavailable, retrying in {backoff:.0f}s: {str(e)}")
+            stop_event.wait(backoff)
+            continue
+        except Exception as e:
+            logger.error(f"[POLAR_QUEUE] Drain failed: {str(e)}", exc_info=True)
+        stop_event.wait(interval)
+
+
+def ensure_drainer_started():
+    """
+    현재 프로세스에 백그라운드 drainer 스레드 시작 (gunicorn 워커마다 1개)
+    settings.POLAR_QUEUE_IN_PROCESS_DRAINER가 False면 별도 프로세스(drain_polar_queue 명령)로 실행해야 함
+    """
+    global _drainer
+    if not getattr(settings, 'POLAR_QUEUE_IN_PROCESS_DRAINER', True):
+        return
+    if _drainer is not None and _drainer.is_alive():
+        return
+
+    with _queue_lock:
+        if _drainer is None or not _drainer.is_alive():
+            _drainer = threading.Thread(target=run_drainer, name='polar-queue-drainer', daemon=True)
+            _drainer.start()
+
+
+def start_drainer_on_request(sender, **kwargs):
+    """
+    request_started 수신 (FitbitConfig.ready에서 등록)
+
+    워커 프로세스가 첫 요청을 받을 때 drainer를 시작하여 재시작 전에 쌓인 큐도 바로 저장
+    (gunicorn --preload에서 fork 전에 만든 스레드는 워커로 복사되지 않으므로 ready()에서 바로 시작하지 않음)
+    """
+    if is_write_behind_enabled():
+        ensure_drainer_started()
+
+
+def connect_drainer_signal():
+    """POLAR_WRITE_BEHIND와 POLAR_QUEUE_IN_PROCESS_DRAINER가 켜져 있으면 request_started에 drainer 시작 연결"""
+    if is_write_behind_enabled() and getattr(settings, 'POLAR_QUEUE_IN_PROCESS_DRAINER', True):
+        request_started.connect(start_drainer_on_request, dispatch_uid='polar_queue_drainer')
@@ -0,0 +1,322 @@
+"""
+Fitbit API Rate Limit 관리 (사용자별 token bucket)
+
+Fitbit은 사용자당 시간당 150회 요청 제한이 있으며 모든 응답에
+Fitbit-Rate-Limit-Limit / Remaining / Reset 헤더를 포함함.
+응답마다 헤더로 남은 요청 수를 갱신하고, 남은 예산이 없으면 리셋 시점까지 대기
+
+- 헤더로 받은 예산(남은 수, 리셋 시각)은 settings.FITBIT_RATE_LIMIT_CACHE 캐시에 저장하여
+  cron 실행마다 새로 뜨는 프로세스와 웹 워커가 같은 사용자의 예산을 공유함
+- 리셋까지 max_wait보다 오래 기다려야 하면 요청을 보내지 않고 RateLimitDeferred를 발생시켜
+  해당 사용자를 다음 실행으로 미룸 (증분 동기화는 워터마크가 그대로이므로 데이터가 빠지지 않음)
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 150
+DEFAULT_WINDOW = 3600
+MAX_TOKEN_OWNERS = 10000  # 사용자에 연결해 둘 최대 access token 수 (오래된 것부터 제거)
+
+
+class RateLimitDeferred(Exception):
+    """예산이 리셋될 때까지 max_wait보다 오래 기다려야 하여 요청을 다음 실행으로 미룸"""
+
+    def __init__(self, key, retry_after):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f'Fitbit rate limit exhausted, deferred for {retry_after:.0f}s')
+
+
+class _Bucket:
+    """사용자 1명의 요청 예산"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+        self.reset_at = None  # 서버가 알려준 리셋 시점 (monotonic)
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        """
+        시간 경과만큼 토큰 충전 (limit/window 속도)
+        서버가 리셋 시점을 알려준 경우에는 그 시점에 한 번에 가득 채움
+        """
+        if self.reset_at is not None:
+            if now >= self.reset_at:
+                self.tokens = float(self.limit)
+                self.reset_at = None
+        else:
+            elapsed = now - self.updated_at
+            self.tokens = min(float(self.limit), self.tokens + elapsed * self.limit / self.window)
+        self.updated_at = now
+
+    def wait_time(self, now):
+        """요청 1회를 보내기 위해 기다려야 하는 시간 (초)"""
+        if self.tokens >= 1:
+            return 0.0
+        if self.reset_at is not None:
+            return max(0.0, self.reset_at - now)
+        return (1 - self.tokens) * self.window / self.limit
+
+
+class FitbitRateLimiter:
+    """
+    사용자별 요청 예산을 관리하는 스케줄러
+
+    get_fitbit_data는 access token만 알기 때문에 bind()로 token -> fitbit_user_id를
+    등록해 두면 토큰이 갱신되어도 같은 사용자의 예산으로 집계됨
+    """
+
+    def __init__(self, limit=None, window=None, max_wait=None):
+        """
+        Args:
+            limit: 시간당 요청 수 (없으면 settings.FITBIT_RATE_LIMIT)
+            window: 예산 기간 (초, 기본 3600)
+            max_wait: 요청 1회당 최대 대기 시간 (없으면 settings.FITBIT_RATE_LIMIT_MAX_WAIT)
+        """
+        self._limit = limit
+        self._window = window
+        self._max_wait = max_wait
+        self._buckets = {}
+        self._token_owners = OrderedDict()  # access token -> fitbit_user_id (최근 bind 순)
+        self._user_tokens = {}  # fitbit_user_id -> 마지막으로 bind한 access token
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return self._limit or getattr(settings, 'FITBIT_RATE_LIMIT', DEFAULT_LIMIT)
+
+    @property
+    def window(self):
+        return self._window or DEFAULT_WINDOW
+
+    @property
+    def max_wait(self):
+        if self._max_wait is not None:
+            return self._max_wait
+        return getattr(settings, 'FITBIT_RATE_LIMIT_MAX_WAIT', 60)
+
+    @max_wait.setter
+    def max_wait(self, value):
+        """백필 스크립트처럼 오래 기다려도 되는 경우 리셋 시점까지 대기하도록 변경"""
+        self._max_wait = value
+
+    def bind(self, fitbit_user_id, access_token):
+        """
+        access token을 사용자에 연결 (토큰이 바뀌어도 같은 예산 사용)
+
+        사용자당 마지막 토큰만 보관하고 전체 MAX_TOKEN_OWNERS개를 넘으면 오래된 것부터 제거
+        """
+        with self._lock:
+            previous = self._user_tokens.get(fitbit_user_id)
+            if previous is not None and previous != access_token:
+                self._token_owners.pop(previous, None)
+            self._user_tokens[fitbit_user_id] = access_token
+            self._token_owners[access_token] = fitbit_user_id
+            self._token_owners.move_to_end(access_token)
+            while len(self._token_owners) > MAX_TOKEN_OWNERS:
+                token, owner = self._token_owners.popitem(last=False)
+                if self._user_tokens.get(owner) == token:
+                    del self._user_tokens[owner]
+
+    def key_for(self, access_token):
+        """access token의 예산 키 (bind된 사용자 ID, 없으면 토큰 해시)"""
+        with self._lock:
+            return self._key(access_token)
+
+    def _key(self, access_token):
+        owner = self._token_owners.get(access_token)
+        if owner:
+            return owner
+        # 등록되지 않은 토큰은 토큰 해시로 구분 (토큰 원문을 키로 보관하지 않음)
+        return 'token:' + hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+    def _bucket(self, access_token):
+        with self._lock:
+            key = self._key(access_token)
+        return self._bucket_for_key(key)
+
+    def _bucket_for_key(self, key):
+        """키의 예산 (프로세스에 처음 만들 때 공유 캐시에 저장된 예산을 불러옴)"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                return bucket
+        bucket = _Bucket(self.limit, self.window)
+        self._load_shared(key, bucket)
+        with self._lock:
+            return self._buckets.setdefault(key, bucket)
+
+    def _cache(self):
+        """공유 캐시 (settings.FITBIT_RATE_LIMIT_CACHE가 없거나 설정되지 않은 alias면 None)"""
+        alias = getattr(settings, 'FITBIT_RATE_LIMIT_CACHE', None)
+        if not alias:
+            return None
+        try:
+            return caches[alias]
+        except InvalidCacheBackendError:
+            return None
+
+    def _load_shared(self, key, bucket):
+        cache = self._cache()
+        if cache is None:
+            return
+        try:
+            state = cache.get(f'fitbit_rate_limit:{key}')
+        except Exception as e:
+            logger.warning(f"[RATE_LIMIT] Shared budget load failed: {str(e)}")
+            return
+        if not state:
+            return
+        reset_in = state['reset_at'] - time.time()
+        if reset_in <= 0:
+            return
+        now = time.monotonic()
+        bucket.limit = state['limit']
+        bucket.tokens = min(float(bucket.limit), float(state['remaining']))
+        bucket.reset_at = now + reset_in
+        bucket.updated_at = now
+
+    def _store_shared(self, key, bucket, now):
+        """서버가 알려준 예산을 공유 캐시에 저장 (리셋 시각까지 유지)"""
+        cache = self._cache()
+        if cache is None or bucket.reset_at is None:
+            return
+        reset_in = bucket.reset_at - now
+        if reset_in <= 0:
+            return
+        state = {'remaining': int(bucket.tokens), 'limit': bucket.limit, 'reset_at': time.time() + reset_in}
+        try:
+            cache.set(f'fitbit_rate_limit:{key}', state, timeout=int(reset_in) + 1)
+        except Exception as e:
+            logger.warning(f"[RATE_LIMIT] Shared budget store failed: {str(e)}")
+
+    def acquire(self, access_token, max_wait=None):
+        """
+        요청 1회 분의 예산 확보 (필요하면 대기)
+
+        Returns:
+            bool: 예산 확보 여부 (항상 True)
+
+        Raises:
+            RateLimitDeferred: max_wait 안에 예산을 확보할 수 없음 (기다리지 않고 바로 발생)
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            wait = self.try_acquire(access_token)
+            if wait == 0:
+                return True
+
+            if time.monotonic() + wait > deadline:
+                raise RateLimitDeferred(self.key_for(access_token), wait)
+            time.sleep(wait)
+
+    def get_defer_seconds(self, fitbit_user_id, max_wait=None):
+        """
+        사용자의 예산이 max_wait 안에 돌아오지 않으면 남은 시간 (cron이 사용자를 다음 실행으로 미룰 때 사용)
+
+        Returns:
+            float 또는 None: 리셋까지 남은 시간 (초), 지금 또는 max_wait 안에 요청할 수 있으면 None
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        bucket = self._bucket_for_key(fitbit_user_id)
+        with bucket.lock:
+            now = time.monotonic()
+            bucket.refill(now)
+            wait = bucket.wait_time(now)
+        return wait if wait > max_wait else None
+
+    def try_acquire(self, access_token):
+        """
+        대기하지 않고 요청 1회 분의 예산 확보 시도 (asyncio 클라이언트용)
+
+        Returns:
+            float: 0이면 확보 성공, 아니면 다시 시도하기 전 기다려야 하는 시간 (초)
+        """
+        bucket = self._bucket(access_token)
+        with bucket.lock:
+            now = time.monotonic()
+            bucket.refill(now)
+            wait = bucket.wait_time(now)
+            if wait == 0:
+                bucket.tokens -= 1
+            return wait
+
+    def update_from_headers(self, access_token, headers):
+        """
+        응답 헤더(Fitbit-Rate-Limit-*)로 남은 예산 갱신
+
+        Returns:
+            int 또는 None: 서버가 알려준 리셋까지 남은 시간 (초)
+        """
+        limit = headers.get('Fitbit-Rate-Limit-Limit')
+        remaining = headers.get('Fitbit-Rate-Limit-Remaining')
+        reset = headers.get('Fitbit-Rate-Limit-Reset')
+
+        if remaining is None and reset is None:
+            return None
+
+        bucket = self._bucket(access_token)
+        with bucket.lock:
+            now = time.monotonic()
+            bucket.refill(now)
+            try:
+                if limit is not None:
+                    bucket.limit = int(limit)
+                if remaining is not None:
+                    bucket.tokens = min(bucket.tokens, float(remaining))
+                if reset is not None:
+                    reset = int(reset)
+                    bucket.reset_at = now + reset
+            except ValueError:
+                return None
+            self._store_shared(self.key_for(access_token), bucket, now)
+
+        return reset
+
+    def penalize(self, access_token, reset_seconds):
+        """429 응답 시 리셋 시점까지 예산을 0으로 설정"""
+        bucket = self._bucket(access_token)
+        with bucket.lock:
+            now = time.monotonic()
+            bucket.tokens = 0.0
+            bucket.updated_at = now
+            bucket.reset_at = now + (reset_seconds if reset_seconds is not None else self.window)
+            self._store_shared(self.key_for(access_token), bucket, now)
+
+    def get_budget(self, fitbit_user_id):
+        """
+        사용자의 남은 요청 예산 조회
+
+        Returns:
+            dict: {'remaining': int, 'limit': int, 'reset_in': 초 또는 None}
+                  아직 요청 기록이 없으면 None
+        """
+        with self._lock:
+            bucket = self._buckets.get(fitbit_user_id)
+        if bucket is None:
+            return None
+
+        with bucket.lock:
+            now = time.monotonic()
+            bucket.refill(now)
+            return {
+                'remaining': int(bucket.tokens),
+                'limit': bucket.limit,
+                'reset_in': round(bucket.reset_at - now) if bucket.reset_at is not None else None,
+            }
+
+
+# 모듈 공용 rate limiter (fitbit_client와 함께 프로세스 내에서 공유)
+fitbit_rate_limiter = FitbitRateLimiter()
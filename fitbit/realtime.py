@@ -0,0 +1,327 @@
+"""
+Polar 실시간 샘플 pub/sub
+
+receive_polar_data가 저장(또는 write-behind 큐에 추가)한 샘플을 publish하면,
+같은 프로세스에서 해당 사용자의 SSE 스트림(stream_polar_realtime_data)을 보고 있는 대시보드로 바로 전달됨.
+구독자가 없으면 publish는 dict 조회 한 번으로 끝남.
+
+다른 gunicorn 워커의 구독자에게는 공유 이벤트 파일(settings.POLAR_REALTIME_BUS_PATH, SQLite WAL)로 전달함
+- 구독 중인 프로세스는 (사용자, pid)를 파일에 등록하고, publish는 다른 프로세스가 구독 중인 사용자의 샘플만 파일에 추가
+- 프로세스마다 poller 스레드 1개가 POLAR_REALTIME_POLL_INTERVAL마다 새 이벤트를 읽어 자기 구독자에게 전달
+  (SSE 연결 수와 무관하게 프로세스당 조회 1회이며, 구독자가 없으면 poller는 종료됨)
+- 이벤트는 POLAR_REALTIME_RETENTION_SECONDS 후 삭제
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def format_realtime_sample(dt, hr, rr, device_id=None):
+    """
+    실시간 차트용 샘플 (get_polar_realtime_data 응답의 data 항목과 같은 형식)
+
+    _dt, _device_id는 SSE 뷰에서 이미 보낸 샘플을 거르는 데만 쓰고 응답에는 포함하지 않음
+    """
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_default_timezone())
+    dt = dt.astimezone(dt_timezone.utc)  # DB에서 읽은 값과 같은 UTC 표기
+    return {'timestamp': dt.isoformat(), 'hr': hr, 'rr': rr, '_dt': dt, '_device_id': device_id}
+
+
+class SharedSampleBus:
+    """프로세스 간 실시간 샘플 전달용 SQLite(WAL) 파일"""
+
+    def __init__(self, path, retention_seconds=None, subscriber_ttl=None, pid=None):
+        """
+        Args:
+            path: 이벤트 파일 경로
+            retention_seconds: 이벤트 보관 시간 (없으면 settings.POLAR_REALTIME_RETENTION_SECONDS)
+            subscriber_ttl: 등록이 갱신되지 않은 구독 프로세스를 무시하기까지의 시간 (초)
+            pid: 프로세스 구분값 (없으면 os.getpid(), fork 후에도 맞도록 매번 조회)
+        """
+        self.path = str(path)
+        self._pid = pid
+        self.retention_seconds = retention_seconds or getattr(settings, 'POLAR_REALTIME_RETENTION_SECONDS', 60)
+        self.subscriber_ttl = subscriber_ttl or 10
+        self._local = threading.local()
+        self._remote_keys = (0.0, frozenset())  # (조회 시각, 다른 프로세스가 구독 중인 키)
+
+    def _connect(self):
+        """스레드별 SQLite 연결 (WAL 모드, 쓰기 잠금 대기 최대 1초)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # 실시간 표시용이므로 유실되어도 DB에는 남아 있음
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS polar_realtime_events ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' pid INTEGER NOT NULL,'
+                ' user_key TEXT NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' created_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS polar_realtime_subscribers ('
+                ' pid INTEGER NOT NULL,'
+                ' user_key TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' PRIMARY KEY (pid, user_key))'
+            )
+            self._local.conn = conn
+        return conn
+
+    @property
+    def pid(self):
+        return self._pid or os.getpid()
+
+    @staticmethod
+    def user_key(username, date_of_birth):
+        return json.dumps([username, date_of_birth.isoformat() if date_of_birth else None])
+
+    @staticmethod
+    def parse_user_key(user_key):
+        username, date_of_birth = json.loads(user_key)
+        return username, date.fromisoformat(date_of_birth) if date_of_birth else None
+
+    def register(self, keys):
+        """현재 프로세스가 구독 중인 사용자 등록 (poller가 주기적으로 호출해 갱신, 빠진 키는 삭제)"""
+        conn = self._connect()
+        pid = self.pid
+        now = time.time()
+        user_keys = [self.user_key(*key) for key in keys]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM polar_realtime_subscribers WHERE pid = ? OR updated_at < ?',
+                         (pid, now - self.subscriber_ttl))
+            conn.executemany('INSERT INTO polar_realtime_subscribers (pid, user_key, updated_at) VALUES (?, ?, ?)',
+                             [(pid, user_key, now) for user_key in user_keys])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def remote_keys(self, max_age=1.0):
+        """다른 프로세스가 구독 중인 user_key 집합 (max_age초 동안 캐시하여 업로드마다 조회하지 않음)"""
+        fetched_at, keys = self._remote_keys
+        now = time.time()
+        if now - fetched_at < max_age:
+            return keys
+        rows = self._connect().execute(
+            'SELECT DISTINCT user_key FROM polar_realtime_subscribers WHERE pid != ? AND updated_at >= ?',
+            (self.pid, now - self.subscriber_ttl)
+        ).fetchall()
+        keys = frozenset(row[0] for row in rows)
+        self._remote_keys = (now, keys)
+        return keys
+
+    def append(self, batches):
+        """
+        사용자별 샘플 묶음 추가
+
+        Args:
+            batches: {user_key: [format_realtime_sample 결과, ...]}
+        """
+        now = time.time()
+        pid = self.pid
+        rows = [
+            (pid, user_key, json.dumps([
+                [sample['_dt'].isoformat(), sample['hr'], sample['rr'], sample['_device_id']] for sample in batch
+            ], separators=(',', ':')), now)
+            for user_key, batch in batches.items()
+        ]
+        self._connect().executemany(
+            'INSERT INTO polar_realtime_events (pid, user_key, payload, created_at) VALUES (?, ?, ?, ?)', rows
+        )
+
+    def last_id(self):
+        row = self._connect().execute('SELECT COALESCE(MAX(id), 0) FROM polar_realtime_events').fetchone()
+        return row[0]
+
+    def read_after(self, last_id):
+        """
+        다른 프로세스가 추가한 새 이벤트
+
+        Returns:
+            tuple: (마지막 이벤트 id, [((username, date_of_birth), [샘플, ...]), ...])
+        """
+        rows = self._connect().execute(
+            'SELECT id, pid, user_key, payload FROM polar_realtime_events WHERE id > ? ORDER BY id', (last_id,)
+        ).fetchall()
+        pid = self.pid
+        events = []
+        for row_id, row_pid, user_key, payload in rows:
+            last_id = row_id
+            if row_pid == pid:
+                continue
+            samples = [
+                format_realtime_sample(datetime.fromisoformat(dt), hr, rr, device_id)
+                for dt, hr, rr, device_id in json.loads(payload)
+            ]
+            events.append((self.parse_user_key(user_key), samples))
+        return last_id, events
+
+    def prune(self):
+        """보관 시간이 지난 이벤트 삭제"""
+        self._connect().execute('DELETE FROM polar_realtime_events WHERE created_at < ?',
+                                (time.time() - self.retention_seconds,))
+
+
+class PolarSampleBroker:
+    """(username, date_of_birth)별 구독자 큐에 새 샘플 묶음을 전달"""
+
+    def __init__(self, max_pending_batches=100, bus=None, poll_interval=None):
+        """
+        Args:
+            max_pending_batches: 구독자 1명이 밀린 채로 쌓아 둘 수 있는 묶음 수 (넘으면 오래된 묶음부터 버림)
+            bus: 프로세스 간 전달용 SharedSampleBus (없으면 settings.POLAR_REALTIME_BUS_PATH로 처음 사용할 때 생성,
+                 설정이 비어 있으면 프로세스 안에서만 전달)
+            poll_interval: poller가 공유 이벤트를 확인하는 간격 (없으면 settings.POLAR_REALTIME_POLL_INTERVAL)
+        """
+        self.max_pending_batches = max_pending_batches
+        self._bus = bus
+        self._poll_interval = poll_interval
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._poller = None
+
+    @property
+    def bus(self):
+        if self._bus is None:
+            path = getattr(settings, 'POLAR_REALTIME_BUS_PATH', None)
+            if path:
+                self._bus = SharedSampleBus(path)
+        return self._bus
+
+    @property
+    def poll_interval(self):
+        return self._poll_interval or getattr(settings, 'POLAR_REALTIME_POLL_INTERVAL', 0.5)
+
+    @contextmanager
+    def subscription(self, username, date_of_birth):
+        """
+        구독 (with 블록을 벗어나면 해제)
+
+        Yields:
+            queue.Queue: 샘플 dict 리스트가 publish될 때마다 들어오는 큐
+        """
+        key = (username, date_of_birth)
+        subscriber = queue.Queue(maxsize=self.max_pending_batches)
+        with self._lock:
+            self._subscribers[key].add(subscriber)
+        self._ensure_poller()
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                self._subscribers[key].discard(subscriber)
+                if not self._subscribers[key]:
+                    del self._subscribers[key]
+
+    def publish(self, samples):
+        """
+        새 샘플 전달 (느린 구독자 때문에 업로드 요청이 막히지 않도록 대기하지 않음)
+
+        같은 프로세스의 구독자에게는 바로 넣고, 다른 프로세스가 구독 중인 사용자의 샘플은 공유 이벤트 파일에 추가
+
+        Args:
+            samples: 저장된 PolarHeartRate 리스트
+        """
+        remote_keys = frozenset()
+        bus = self.bus
+        if bus is not None:
+            try:
+                remote_keys = bus.remote_keys()
+            except Exception as e:
+                logger.warning(f"[REALTIME] Subscriber lookup failed: {str(e)}")
+        if not self._subscribers and not remote_keys:
+            return
+
+        local = defaultdict(list)
+        remote = defaultdict(list)
+        for sample in samples:
+            key = (sample.username, sample.date_of_birth)
+            formatted = None
+            if key in self._subscribers:
+                formatted = format_realtime_sample(sample.datetime, sample.hr, sample.rr, sample.device_id)
+                local[key].append(formatted)
+            if remote_keys:
+                user_key = SharedSampleBus.user_key(*key)
+                if user_key in remote_keys:
+                    remote[user_key].append(
+                        formatted or format_realtime_sample(sample.datetime, sample.hr, sample.rr, sample.device_id)
+                    )
+
+        for key, batch in local.items():
+            self._deliver(key, batch)
+        if remote:
+            try:
+                bus.append(remote)
+            except Exception as e:
+                logger.warning(f"[REALTIME] Shared publish failed: {str(e)}")
+
+    def _deliver(self, key, batch):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(batch)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _ensure_poller(self):
+        """구독자가 있는 동안 공유 이벤트를 읽는 poller 스레드 (프로세스당 1개)"""
+        if self.bus is None:
+            return
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name='polar-realtime-poller', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        bus = self.bus
+        last_id = None
+        last_prune = 0.0
+        while True:
+            with self._lock:
+                keys = list(self._subscribers)
+                if not keys:
+                    self._poller = None
+            try:
+                bus.register(keys)
+                if not keys:
+                    return
+                if last_id is None:
+                    last_id = bus.last_id()
+                last_id, events = bus.read_after(last_id)
+                for key, batch in events:
+                    self._deliver(key, batch)
+                if time.monotonic() - last_prune > bus.retention_seconds:
+                    bus.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.warning(f"[REALTIME] Shared poll failed: {str(e)}")
+                if not keys:
+                    return
+            time.sleep(self.poll_interval)
+
+
+polar_sample_broker = PolarSampleBroker()
@@ -0,0 +1,135 @@
+"""
+여러 Fitbit 사용자의 동기화를 병렬로 실행하는 함수
+(sync_all_users.py cron, 관리자 동기화 views에서 사용)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.db import connection
+
+
+def get_max_workers(max_workers=None):
+    """동시 실행 사용자 수 (인자 > settings.FITBIT_SYNC_MAX_WORKERS > 기본값 8)"""
+    return max_workers or getattr(settings, 'FITBIT_SYNC_MAX_WORKERS', 8)
+
+
+def get_user_timeout(timeout=None):
+    """사용자 1명당 최대 대기 시간(초) (인자 > settings.FITBIT_SYNC_USER_TIMEOUT > 기본값 120)"""
+    return timeout or getattr(settings, 'FITBIT_SYNC_USER_TIMEOUT', 120)
+
+
+def run_user_syncs(fitbit_users, sync_user, max_workers=None, timeout=None, on_result=None):
+    """
+    사용자별 동기화 함수를 스레드 풀에서 병렬 실행하고 결과를 집계
+
+    Args:
+        fitbit_users: FitbitUser 객체 리스트 (또는 QuerySet)
+        sync_user: FitbitUser를 받아 결과 dict({'success': bool, ...})를 반환하는 함수
+        max_workers: 동시 실행 사용자 수
+        timeout: 사용자 1명당 최대 대기 시간 (초). 초과 시 timeout으로 집계
+        on_result: 사용자별 결과가 나올 때마다 호출되는 콜백 (로그 출력용, 선택)
+
+    Returns:
+        dict: {
+            'total', 'success_count', 'fail_count', 'timeout_count', 'elapsed',
+            'results': [{'fitbit_user_id', 'success', 'result', 'error', 'elapsed', 'timed_out'}, ...]
+        }
+
+    Note:
+        Python 스레드는 강제 종료할 수 없으므로 timeout된 작업은 결과만 포기하고
+        백그라운드에서 HTTP 타임아웃(FITBIT_HTTP_READ_TIMEOUT)까지 계속 실행될 수 있음
+    """
+    fitbit_users = list(fitbit_users)
+    max_workers = get_max_workers(max_workers)
+    timeout = get_user_timeout(timeout)
+
+    started_at = {}
+    lock = threading.Lock()
+
+    def _run(fitbit_user):
+        with lock:
+            started_at[fitbit_user.fitbit_user_id] = time.monotonic()
+        try:
+            return sync_user(fitbit_user)
+        finally:
+            # 스레드별 DB 연결 정리 (연결 누수 방지)
+            connection.close()
+
+    def _record(item):
+        summary['results'].append(item)
+        if item['timed_out']:
+            summary['timeout_count'] += 1
+            summary['fail_count'] += 1
+        elif item['success']:
+            summary['success_count'] += 1
+        else:
+            summary['fail_count'] += 1
+        if on_result:
+            on_result(item)
+
+    summary = {
+        'total': len(fitbit_users),
+        'success_count': 0,
+        'fail_count': 0,
+        'timeout_count': 0,
+        'elapsed': 0.0,
+        'results': [],
+    }
+
+    if not fitbit_users:
+        return summary
+
+    begin = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fitbit-sync')
+
+    try:
+        futures = {executor.submit(_run, user): user for user in fitbit_users}
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+
+            for future in done:
+                fitbit_user_id = futures[future].fitbit_user_id
+                elapsed = now - started_at.get(fitbit_user_id, now)
+                try:
+                    result = future.result() or {}
+                    _record({
+                        'fitbit_user_id': fitbit_user_id,
+                        'success': bool(result.get('success')),
+                        'result': result,
+                        'error': result.get('error'),
+                        'elapsed': elapsed,
+                        'timed_out': False,
+                    })
+                except Exception as e:
+                    _record({
+                        'fitbit_user_id': fitbit_user_id,
+                        'success': False,
+                        'result': None,
+                        'error': str(e),
+                        'elapsed': elapsed,
+                        'timed_out': False,
+                    })
+
+            # 실행 시작 후 timeout을 넘긴 작업은 결과를 기다리지 않음
+            for future in list(pending):
+                fitbit_user_id = futures[future].fitbit_user_id
+                started = started_at.get(fitbit_user_id)
+                if started is not None and now - started > timeout:
+                    pending.discard(future)
+                    _record({
+                        'fitbit_user_id': fitbit_user_id,
+                        'success': False,
+                        'result': None,
+                        'error': f'timeout ({timeout}s)',
+                        'elapsed': now - started,
+                        'timed_out': True,
+                    })
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    summary['elapsed'] = time.monotonic() - begin
+    return summary
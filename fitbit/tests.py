@@ -1,3 +1,780 @@
-from django.test import TestCase
+"""
+fitbit 앱 테스트
 
-# Create your tests here.
+실행: python manage.py test fitbit
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import numpy as np
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .hrv import (
+    build_hrv_batch, calculate_frequency_domain, compute_hrv_batch, offsets_from_counts,
+    segment_replace_outliers, trapezoid, window_start,
+)
+from .hrv_stream import HRVStream, IncrementalHRVEngine
+from .compression import DecompressionError, RequestDecompressionMiddleware
+from .json_stream import JSONArrayStream, JSONStreamError, BodyTooLargeError
+from .bulk_upsert import bulk_upsert
+from .data_sync import KST, save_daily_summary, sync_incremental_intraday_data
+from .fitbit_api import mark_unauthorized, pop_unauthorized
+from .polar_queue import PolarWriteQueue
+from .realtime import PolarSampleBroker, SharedSampleBus, polar_sample_broker
+from .rate_limit import FitbitRateLimiter, RateLimitDeferred, fitbit_rate_limiter
+from .token_refresh import ensure_valid_token
+from .views.common_views import refresh_fitbit_token
+from .models import DailySummary, FitbitUser, IntradaySpO2, IntradaySteps, IntradaySyncWatermark, PolarHeartRate, PolarHeartRateIndex5
+
+
+def reference_hrv_window(hr_values, rr_values):
+    """구간 1개를 numpy/scipy로 직접 계산 (scripts/bench_hrv.py의 구간별 계산과 동일)"""
+    from scipy import signal
+
+    result = {
+        'mean_hr': np.mean(hr_values) if len(hr_values) else np.nan,
+        'sd_hr': np.std(hr_values, ddof=1) if len(hr_values) > 1 else np.nan,
+        'mean_rr': np.mean(rr_values) if len(rr_values) else np.nan,
+        'rmssd': np.nan, 'sdnn': np.nan, 'hf_power': np.nan, 'lf_power': np.nan,
+    }
+    if len(rr_values) >= 2:
+        result['rmssd'] = np.sqrt(np.mean(np.diff(rr_values) ** 2))
+        result['sdnn'] = np.std(rr_values, ddof=1)
+    if len(rr_values) >= 10:
+        beat_times = np.cumsum(rr_values) / 1000.0
+        grid = beat_times[0] + np.arange(int(np.floor((beat_times[-1] - beat_times[0]) * 4.0)) + 1) / 4.0
+        resampled = np.interp(grid, beat_times, rr_values)
+        freqs, psd = signal.welch(resampled, fs=4.0, nperseg=min(len(resampled), 256))
+        hf_mask = (freqs >= 0.15) & (freqs <= 0.4)
+        lf_mask = (freqs >= 0.04) & (freqs < 0.15)
+        result['hf_power'] = trapezoid(psd[hf_mask], freqs[hf_mask])
+        result['lf_power'] = trapezoid(psd[lf_mask], freqs[lf_mask])
+    return result
+
+
+class HRVBatchTests(SimpleTestCase):
+    """fitbit.hrv 배치 계산"""
+
+    def test_matches_per_window_reference(self):
+        rng = np.random.default_rng(0)
+        rr_counts = [0, 1, 5, 9, 10, 40, 300, 420]
+        hr_counts = [3, 1, 5, 9, 10, 40, 300, 420]
+        hr = rng.normal(72, 6, sum(hr_counts)).round()
+        rr = rng.normal(830, 50, sum(rr_counts)).round()
+        hr_offsets = offsets_from_counts(hr_counts)
+        rr_offsets = offsets_from_counts(rr_counts)
+
+        metrics = compute_hrv_batch(hr, hr_offsets, rr, rr_offsets)
+
+        for i in range(len(rr_counts)):
+            expected = reference_hrv_window(
+                hr[hr_offsets[i]:hr_offsets[i + 1]], rr[rr_offsets[i]:rr_offsets[i + 1]]
+            )
+            for name, value in expected.items():
+                np.testing.assert_allclose(metrics[name][i], value, rtol=1e-9, equal_nan=True,
+                                           err_msg=f'window {i} {name}')
+
+    def test_empty_rr_does_not_raise(self):
+        metrics = compute_hrv_batch(np.array([70., 71.]), np.array([0, 2]), np.array([], float), np.array([0, 0]))
+
+        self.assertEqual(metrics['mean_hr'][0], 70.5)
+        for name in ('rmssd', 'sdnn', 'hf_power', 'lf_power', 'lf_hf_ratio', 'mean_rr'):
+            self.assertTrue(np.isnan(metrics[name][0]), name)
+
+    def test_frequency_domain_needs_ten_rr(self):
+        self.assertEqual(calculate_frequency_domain([]), (None, None, None))
+        self.assertEqual(calculate_frequency_domain([800, 810, 790] * 3), (None, None, None))
+        hf_power, lf_power, _ = calculate_frequency_domain([800, 810, 790, 805, 795] * 2)
+        self.assertIsNotNone(hf_power)
+        self.assertIsNotNone(lf_power)
+
+    def test_build_batch_skips_missing_and_zero_values(self):
+        keys, row_counts, hr, hr_offsets, rr, rr_offsets = build_hrv_batch([
+            ('a', 70, 800), ('a', 0, None), ('a', 72, 0), ('b', None, 810),
+        ])
+
+        self.assertEqual(keys, ['a', 'b'])
+        self.assertEqual(row_counts.tolist(), [3, 1])
+        self.assertEqual(hr.tolist(), [70, 72])
+        self.assertEqual(hr_offsets.tolist(), [0, 2, 2])
+        self.assertEqual(rr.tolist(), [800, 810])
+        self.assertEqual(rr_offsets.tolist(), [0, 1, 2])
+
+    def test_replace_outliers_matches_cron_rule(self):
+        values = np.array([70.] * 20 + [300., 0.] + [80., 81.])
+
+        replaced = segment_replace_outliers(values, offsets_from_counts([22, 2]))
+
+        self.assertEqual(replaced[20], 81)  # 3σ 밖 -> 구간 평균(0 제외, 이상치 포함) 반올림
+        self.assertEqual(replaced[21], 0)  # 측정 실패 값은 그대로
+        self.assertEqual(replaced[22:].tolist(), [80, 81])
+
+    def test_window_start_is_aligned_in_kst(self):
+        from zoneinfo import ZoneInfo
+
+        dt = datetime(2025, 12, 17, 9, 7, 31, tzinfo=ZoneInfo('Asia/Seoul'))
+
+        self.assertEqual(window_start(dt), datetime(2025, 12, 17, 9, 5, tzinfo=ZoneInfo('Asia/Seoul')))
+
+
+WINDOW = datetime(2025, 12, 17, 0, 0, tzinfo=dt_timezone.utc)
+DOB = date(1990, 1, 1)
+
+
+class IncrementalHRVEngineTests(SimpleTestCase):
+    """fitbit.hrv_stream 구간 닫기"""
+
+    def fill(self, engine, start=WINDOW, count=20):
+        for i in range(count):
+            engine.add('kim', DOB, start + timedelta(seconds=i), 70 + i % 3, 800 + (i % 5) * 10)
+
+    def test_ready_rows_keeps_windows_until_discard(self):
+        engine = IncrementalHRVEngine(grace_seconds=60)
+        self.fill(engine)
+
+        self.assertEqual(engine.ready_rows(WINDOW + timedelta(seconds=359)), ([], []))
+        keys, rows = engine.ready_rows(WINDOW + timedelta(seconds=360))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].datetime_start, WINDOW)
+        self.assertEqual(rows[0].data_count, 20)
+        self.assertEqual(len(engine.windows), 1)
+        engine.discard(keys)
+        self.assertEqual(engine.windows, {})
+
+    def test_failed_window_is_kept_for_retry(self):
+        engine = IncrementalHRVEngine(grace_seconds=0)
+        self.fill(engine)
+        self.fill(engine, start=WINDOW + timedelta(minutes=5))
+        original = engine._compute
+
+        def compute(keys):
+            if any(key[2] == WINDOW for key in keys):
+                raise ValueError('boom')
+            return original(keys)
+
+        with mock.patch.object(engine, '_compute', side_effect=compute), \
+                self.assertLogs('fitbit.hrv_stream', 'ERROR'):
+            keys, rows = engine.ready_rows(WINDOW + timedelta(minutes=10))
+
+        self.assertEqual([row.datetime_start for row in rows], [WINDOW + timedelta(minutes=5)])
+        engine.discard(keys)
+        self.assertEqual(list(engine.windows), [('kim', DOB, WINDOW)])
+
+    def test_matches_batch_computation_after_outlier_replacement(self):
+        engine = IncrementalHRVEngine(grace_seconds=0)
+        self.fill(engine)
+        engine.add('kim', DOB, WINDOW + timedelta(seconds=30), 200, 3000)
+
+        _, rows = engine.ready_rows(WINDOW + timedelta(minutes=5))
+
+        self.assertEqual(rows[0].data_count, 21)
+        self.assertLess(rows[0].mean_hr, 72)
+        self.assertLess(rows[0].mean_rr, 1000)
+
+
+class HRVStreamTests(TestCase):
+    """fitbit.hrv_stream 수신 테이블 tailing"""
+
+    def create(self, second, **kwargs):
+        return PolarHeartRate.objects.create(
+            device_id='AA', datetime=WINDOW + timedelta(seconds=second), hr=70, rr=800 + second % 7,
+            username='kim', date_of_birth=DOB, **kwargs
+        )
+
+    def test_late_committed_rows_are_read_once(self):
+        stream = HRVStream(IncrementalHRVEngine(grace_seconds=0), overlap_rows=100)
+        stream.start(WINDOW)
+        rows = [self.create(i) for i in range(5)]
+        late = rows[2]
+        late.delete()  # id 순서보다 늦게 커밋된 행처럼 보이게 함
+
+        self.assertEqual(stream.poll(WINDOW), (4, 0))
+        PolarHeartRate.objects.create(
+            id=late.id, device_id='AA', datetime=late.datetime, hr=70, rr=800, username='kim', date_of_birth=DOB
+        )
+        self.assertEqual(stream.poll(WINDOW), (1, 0))
+        self.assertEqual(stream.poll(WINDOW), (0, 0))
+
+        self.assertEqual(stream.poll(WINDOW + timedelta(minutes=5)), (0, 1))
+        self.assertEqual(PolarHeartRateIndex5.objects.get().data_count, 5)
+        self.assertEqual(stream.engine.windows, {})
+
+
+class BulkUpsertTests(TestCase):
+    """fitbit.bulk_upsert 생성/업데이트 개수"""
+
+    def row(self, day, steps):
+        return {'fitbit_user_id': 'U1', 'date': date(2025, 12, day), 'steps': steps}
+
+    def test_counts_created_and_updated_rows(self):
+        upsert = lambda rows: bulk_upsert(DailySummary, rows, ['fitbit_user_id', 'date'], ['steps', 'updated_at'],
+                                          batch_size=2)
+
+        self.assertEqual(upsert([self.row(1, 10), self.row(2, 20), self.row(3, 30)]), (3, 0))
+        # 같은 key가 두 번 들어오면 마지막 값만 저장, 날짜 문자열도 같은 key로 봄
+        self.assertEqual(upsert([self.row(2, 21), {**self.row(3, 0), 'date': '2025-12-03'}, self.row(3, 31),
+                                 self.row(4, 40)]), (1, 2))
+        self.assertEqual(upsert([]), (0, 0))
+
+        self.assertEqual(dict(DailySummary.objects.values_list('date__day', 'steps')), {1: 10, 2: 21, 3: 31, 4: 40})
+
+    def test_save_daily_summary_returns_saved_row(self):
+        activity = {'summary': {'steps': 1000, 'caloriesOut': 2000,
+                                'distances': [{'activity': 'total', 'distance': 1.5}]}}
+
+        first = save_daily_summary('U1', '2025-12-01', activity, None)
+        activity['summary']['steps'] = 1200
+        second = save_daily_summary('U1', '2025-12-01', activity, None)
+
+        self.assertIsNotNone(first.pk)
+        self.assertEqual((second.pk, second.steps), (first.pk, 1200))
+        self.assertEqual(second.created_at, first.created_at)
+
+
+class FakeFitbitAPI:
+    """fitbit_api.get_fitbit_data 대체 (엔드포인트별 응답 생성, 호출 기록)"""
+
+    def __init__(self, last_sync=None, spo2_minutes=()):
+        self.last_sync = last_sync
+        self.spo2_minutes = list(spo2_minutes)
+        self.endpoints = []
+
+    def __call__(self, access_token, endpoint):
+        self.endpoints.append(endpoint)
+        parts = endpoint.split('/')
+        if endpoint.endswith('devices.json'):
+            if self.last_sync is None:
+                return None
+            return [{'id': '1', 'lastSyncTime': self.last_sync.strftime('%Y-%m-%dT%H:%M:%S.000')}]
+        if '/spo2/' in endpoint:
+            return {'dateTime': parts[6], 'minutes': self.spo2_minutes}
+        if '/hrv/' in endpoint:
+            return {'hrv': []}
+        resource, start, end = parts[5], parts[-2], parts[-1][:-len('.json')]
+        start_dt = datetime.strptime(start, '%H:%M')
+        minutes = int((datetime.strptime(end, '%H:%M') - start_dt).total_seconds() // 60) + 1
+        return {f'activities-{resource}-intraday': {'dataset': [
+            {'time': (start_dt + timedelta(minutes=i)).strftime('%H:%M:00'), 'value': 1} for i in range(minutes)
+        ]}}
+
+
+class IncrementalSyncWatermarkTests(TestCase):
+    """fitbit.data_sync.sync_incremental_intraday_data 워터마크"""
+
+    def setUp(self):
+        self.now = datetime.now(KST).replace(second=0, microsecond=0)
+        for metric in ('heart', 'steps', 'calories', 'distance', 'floors', 'elevation'):
+            IntradaySyncWatermark.objects.create(
+                fitbit_user_id='U1', metric=metric, last_synced_at=self.now - timedelta(minutes=30)
+            )
+
+    def sync(self, api):
+        with mock.patch('fitbit.fitbit_api.get_fitbit_data', api):
+            return sync_incremental_intraday_data('U1', 'token', lag_minutes=10)
+
+    def watermark(self, metric):
+        return IntradaySyncWatermark.objects.get(fitbit_user_id='U1', metric=metric).last_synced_at
+
+    def test_advances_to_device_sync_time(self):
+        result = self.sync(FakeFitbitAPI(last_sync=self.now - timedelta(minutes=15, seconds=-20)))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.watermark('steps'), self.now - timedelta(minutes=15))
+        self.assertEqual(IntradaySteps.objects.count(), 15)
+
+    def test_without_device_sync_time_stops_at_last_returned_minute(self):
+        api = FakeFitbitAPI()
+        original = api.__call__
+
+        def truncated(access_token, endpoint):
+            data = original(access_token, endpoint)
+            if '/activities/steps/' in endpoint:
+                data['activities-steps-intraday']['dataset'] = data['activities-steps-intraday']['dataset'][:5]
+            return data
+
+        self.sync(truncated)
+
+        self.assertEqual(self.watermark('steps'), self.now - timedelta(minutes=25))
+        self.assertEqual(self.watermark('heart'), self.now - timedelta(minutes=10))
+
+    def test_failed_save_keeps_watermark(self):
+        from . import data_sync
+
+        original = data_sync.bulk_upsert
+
+        def failing(model, rows, **kwargs):
+            if model is IntradaySteps:
+                raise RuntimeError('database is locked')
+            return original(model, rows, **kwargs)
+
+        with mock.patch.object(data_sync, 'bulk_upsert', failing):
+            result = self.sync(FakeFitbitAPI(last_sync=self.now))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.watermark('steps'), self.now - timedelta(minutes=30))
+        self.assertEqual(self.watermark('heart'), self.now - timedelta(minutes=10))
+
+    def test_daily_spo2_is_fetched_until_saved(self):
+        api = FakeFitbitAPI(last_sync=self.now)
+        self.sync(api)
+        self.assertFalse(IntradaySyncWatermark.objects.filter(metric='spo2').exists())
+
+        api = FakeFitbitAPI(last_sync=self.now, spo2_minutes=[{'minute': '2025-12-17T03:00:00', 'value': 96.5}])
+        self.sync(api)
+        self.assertEqual(IntradaySpO2.objects.count(), 1)
+
+        api = FakeFitbitAPI(last_sync=self.now)
+        self.sync(api)
+        self.assertFalse(any('/spo2/' in endpoint for endpoint in api.endpoints))
+        self.assertTrue(any('/hrv/' in endpoint for endpoint in api.endpoints))
+
+
+class PolarWriteQueueTests(TestCase):
+    """fitbit.polar_queue 저장과 dead-letter"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue = PolarWriteQueue(
+            path=os.path.join(directory.name, 'queue.sqlite3'), batch_size=2, lease_seconds=1e-6, max_attempts=2
+        )
+        self.addCleanup(lambda: self.queue._connect().close())
+
+    def enqueue(self, second):
+        return self.queue.enqueue([PolarHeartRate(
+            device_id='AA', datetime=WINDOW + timedelta(seconds=second), hr=70, rr=800,
+            username='kim', date_of_birth=DOB,
+        )])
+
+    def enqueue_poison(self):
+        sample = ['AA', 'not-a-datetime', 70, 800, 'kim', '1990-01-01']
+        self.queue._connect().execute(
+            'INSERT INTO polar_queue (sample_count, payload, enqueued_at) VALUES (1, ?, 0)', (json.dumps([sample]),)
+        )
+
+    def test_drain_moves_poison_rows_to_dead_and_continues(self):
+        self.enqueue_poison()
+        self.enqueue_poison()
+        self.enqueue(0)
+        self.enqueue(1)
+
+        with self.assertLogs('fitbit.polar_queue', 'WARNING'):
+            self.assertEqual(self.queue.drain(), 2)
+
+        self.assertEqual(PolarHeartRate.objects.count(), 2)
+        self.assertEqual(self.queue.pending_count(), 0)
+        self.assertEqual(self.queue.dead_count(), 2)
+        self.assertEqual(self.queue.requeue_dead(), 2)
+        self.assertEqual(self.queue.pending_count(), 2)
+
+    def test_transient_error_does_not_count_attempts(self):
+        self.enqueue(0)
+
+        with mock.patch.object(PolarHeartRate.objects, 'bulk_create', side_effect=OperationalError('locked')):
+            with self.assertRaises(OperationalError):
+                self.queue.drain_batch()
+
+        attempts, claimed_at = self.queue._connect().execute('SELECT attempts, claimed_at FROM polar_queue').fetchone()
+        self.assertEqual(attempts, 0)
+        self.assertIsNone(claimed_at)
+        self.assertEqual(self.queue.drain(), 1)
+        self.assertEqual(self.queue.dead_count(), 0)
+
+
+class CountingStream(io.BytesIO):
+    """읽은 바이트 수를 기록하는 본문 스트림"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class JSONArrayStreamTests(SimpleTestCase):
+    """fitbit.json_stream 항목 단위 파싱"""
+
+    def parse(self, body, read_size=7, max_size=10 ** 6):
+        return list(JSONArrayStream(io.BytesIO(body.encode()), max_size, read_size=read_size).items())
+
+    def test_values_split_across_reads(self):
+        items = [{'hr': 123, 'rr': 1.5e3, 'name': 'kim\u00e9'}, True, None, -12, 'a,]b']
+        body = json.dumps(items)
+
+        for read_size in (1, 2, 3, 7, 64):
+            self.assertEqual(self.parse(body, read_size=read_size), items)
+        self.assertEqual(self.parse(' [ ] '), [])
+
+    def test_invalid_body(self):
+        for body in ('{"hr": 1}', '[1, 2', '[1 2]', '[1] x', '[tru]', '[{"hr": 1,}]'):
+            with self.assertRaises(JSONStreamError, msg=body):
+                self.parse(body)
+        with self.assertRaises(BodyTooLargeError):
+            self.parse(json.dumps(list(range(100))), max_size=50)
+
+    def test_parse_error_fails_without_reading_rest_of_body(self):
+        body = ('[{"hr": 70}, {"hr": x}, ' + ', '.join(['{"hr": 70}'] * 100000) + ']').encode()
+        stream = CountingStream(body)
+        items = JSONArrayStream(stream, len(body), read_size=1024).items()
+
+        self.assertEqual(next(items), {'hr': 70})
+        with self.assertRaises(JSONStreamError):
+            next(items)
+        self.assertLess(stream.bytes_read, 4096)
+
+    def test_unterminated_item_is_limited(self):
+        body = ('["' + 'a' * 100000).encode()
+        stream = CountingStream(body)
+
+        with self.assertRaises(JSONStreamError):
+            list(JSONArrayStream(stream, len(body), read_size=1024, max_item_size=4096).items())
+        self.assertLess(stream.bytes_read, 8192)
+
+
+class RequestDecompressionMiddlewareTests(SimpleTestCase):
+    """fitbit.compression 압축 해제 크기 제한"""
+
+    def request(self, path, body):
+        from django.test import RequestFactory
+
+        return RequestFactory().post(path, gzip.compress(body), content_type='application/json',
+                                     HTTP_CONTENT_ENCODING='gzip')
+
+    @override_settings(MAX_DECOMPRESSED_BODY_SIZE=1000)
+    def test_buffered_path_rejects_large_body(self):
+        middleware = RequestDecompressionMiddleware(lambda request: self.fail('view should not run'))
+
+        with self.assertLogs('fitbit.compression', 'WARNING'):
+            response = middleware(self.request('/api/mobile/health/', b' ' * 1001))
+        self.assertEqual(response.status_code, 413)
+
+        middleware = RequestDecompressionMiddleware(lambda request: request.body)
+        self.assertEqual(middleware(self.request('/api/mobile/health/', b'[1]')), b'[1]')
+
+    @override_settings(POLAR_MAX_BODY_SIZE=1000)
+    def test_streaming_path_limits_while_reading(self):
+        def view(request):
+            self.assertEqual(request.compressed_body_encoding, 'gzip')
+            return request.read()
+
+        middleware = RequestDecompressionMiddleware(view)
+        self.assertEqual(middleware(self.request('/data/polar/heartrate/', b'[1]')), b'[1]')
+
+        with self.assertRaises(DecompressionError) as raised:
+            middleware(self.request('/data/polar/heartrate/', b' ' * 5000))
+        self.assertEqual(raised.exception.status, 413)
+
+
+def polar_item(second, **fields):
+    """Polar 업로드 항목 1개 (WINDOW + second초)"""
+    return {'hr': 70, 'rr': 850, 'timestamp': (WINDOW.timestamp() + second) * 1000,
+            'deviceId': 'AA', 'username': 'kim', 'dateofbirth': DOB.isoformat(), **fields}
+
+
+def post_polar(client, body, headers=None):
+    """API 키를 붙여 /data/polar/heartrate/로 업로드 (body가 문자열이 아니면 JSON으로 인코딩)"""
+    from .views.polar_views import API_KEYS
+
+    if not isinstance(body, str):
+        body = json.dumps(body)
+    return client.post('/data/polar/heartrate/', body, content_type='application/json',
+                       headers={'X-API-Key': API_KEYS[0].decode(), **(headers or {})})
+
+
+class PolarIngestTests(TestCase):
+    """receive_polar_data 검증, 중복 제외, ack 응답"""
+
+    def test_valid_items_are_saved_with_one_insert(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        items = [polar_item(0), polar_item(1, hr=400), polar_item(2, rr=None), {'hr': 70}]
+        with CaptureQueriesContext(connection) as queries:
+            response = post_polar(self.client, items)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['saved_count'], response.json()['error_count']), (2, 2))
+        self.assertEqual([sample['rr'] for sample in response.json()['data']], [850, None])
+        self.assertEqual(sum(query['sql'].startswith('INSERT') for query in queries.captured_queries), 1)
+
+    def test_all_invalid_items_return_400(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = post_polar(self.client, [polar_item(0, hr='x'), polar_item(1, dateofbirth='1990/01/01')])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['errors']), 2)
+        self.assertFalse(PolarHeartRate.objects.exists())
+
+    def test_resent_and_repeated_items_are_duplicates(self):
+        self.assertEqual(post_polar(self.client, [polar_item(0)]).status_code, 201)
+
+        response = post_polar(self.client, [polar_item(0), polar_item(1), polar_item(1)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['saved_count'], response.json()['duplicate_count']), (1, 2))
+
+        response = post_polar(self.client, [polar_item(0)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['saved_count'], response.json()['duplicate_count']), (0, 1))
+        self.assertEqual(PolarHeartRate.objects.count(), 2)
+
+    def test_concurrent_insert_is_counted_as_duplicate(self):
+        from .views import polar_views
+
+        split_existing = polar_views._split_existing
+        calls = []
+
+        def stale_split(unique_pending, duplicates):
+            # 첫 조회 직후 다른 요청이 같은 샘플을 저장한 것처럼 첫 조회는 빈 결과로 둠
+            calls.append(1)
+            if len(calls) == 1:
+                return list(unique_pending.values())
+            return split_existing(unique_pending, duplicates)
+
+        post_polar(self.client, [polar_item(0)])
+        with mock.patch.object(polar_views, '_split_existing', stale_split):
+            response = post_polar(self.client, [polar_item(0), polar_item(1)])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['saved_count'], response.json()['duplicate_count']), (1, 1))
+        self.assertEqual([sample['id'] is not None for sample in response.json()['data']], [True])
+        self.assertEqual(PolarHeartRate.objects.count(), 2)
+
+    def test_ack_mode_returns_counts_and_rejected_positions(self):
+        items = [polar_item(0), polar_item(1, hr=-1), polar_item(2)]
+
+        for headers in ({'X-Response-Mode': 'ack'}, {'Prefer': 'return=minimal'}):
+            PolarHeartRate.objects.all().delete()
+            response = post_polar(self.client, items, headers)
+
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json(), {
+                'status': 'success', 'saved_count': 2, 'duplicate_count': 0, 'rejected': [1],
+                'first_timestamp': items[0]['timestamp'], 'last_timestamp': items[2]['timestamp'],
+            })
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = post_polar(self.client, [polar_item(0, hr=-1)], {'X-Response-Mode': 'ack'})
+        self.assertEqual((response.status_code, response.json()['rejected']), (400, [0]))
+
+
+@override_settings(POLAR_STREAMING_THRESHOLD=10, POLAR_STREAM_CHUNK_SIZE=1)
+class PolarStreamUploadTests(TestCase):
+    """큰 배열 스트리밍 업로드의 부분 저장 응답"""
+
+    def test_parse_error_reports_committed_items(self):
+        body = '[' + json.dumps(polar_item(0)) + ', {"hr": x}]'
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = post_polar(self.client, body)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.json()['partial'], response.json()['processed_count']), (True, 1))
+        self.assertEqual(PolarHeartRate.objects.count(), 1)
+
+
+@override_settings(POLAR_WRITE_BEHIND=True)
+class PolarWriteBehindTests(TestCase):
+    """write-behind 업로드 응답과 실시간 전달 시점"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue = PolarWriteQueue(path=os.path.join(directory.name, 'queue.sqlite3'))
+        self.addCleanup(lambda: self.queue._connect().close())
+        for target, value in (('get_polar_queue', self.queue), ('ensure_drainer_started', None)):
+            patcher = mock.patch(f'fitbit.views.polar_views.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, items):
+        return post_polar(self.client, items)
+
+    def test_duplicates_are_counted_and_samples_published_after_drain(self):
+        self.assertEqual(self.post([polar_item(0)]).status_code, 202)
+        self.queue.drain()
+
+        with polar_sample_broker.subscription('kim', DOB) as subscriber:
+            response = self.post([polar_item(0), polar_item(1)])
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual((response.json()['queued_count'], response.json()['duplicate_count']), (1, 1))
+            self.assertTrue(subscriber.empty())
+
+            self.assertEqual(self.queue.drain(), 1)
+            self.assertEqual(len(subscriber.get_nowait()), 1)
+
+        response = self.post([polar_item(0)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['duplicate_count'], 1)
+        self.assertEqual(self.queue.pending_count(), 0)
+
+
+class PolarRealtimeBrokerTests(SimpleTestCase):
+    """fitbit.realtime 프로세스 간 전달"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'realtime.sqlite3')
+
+    def test_sample_reaches_subscriber_in_other_process(self):
+        publisher = PolarSampleBroker(bus=SharedSampleBus(self.path, pid=1))
+        subscriber_bus = SharedSampleBus(self.path, pid=2)
+        subscriber_broker = PolarSampleBroker(bus=subscriber_bus, poll_interval=0.01)
+        sample = PolarHeartRate(device_id='AA', datetime=WINDOW, hr=72, rr=830, username='kim', date_of_birth=DOB)
+
+        with subscriber_broker.subscription('kim', DOB) as subscriber:
+            for _ in range(200):
+                if publisher.bus.remote_keys(max_age=0):
+                    break
+                time.sleep(0.01)
+            publisher.publish([sample])
+            batch = subscriber.get(timeout=5)
+
+        self.assertEqual([(item['hr'], item['rr'], item['_device_id']) for item in batch], [(72, 830, 'AA')])
+        self.assertEqual(batch[0]['_dt'], WINDOW)
+
+    def test_publish_skips_users_without_remote_subscribers(self):
+        bus = SharedSampleBus(self.path, pid=1)
+        PolarSampleBroker(bus=bus).publish([
+            PolarHeartRate(device_id='AA', datetime=WINDOW, hr=72, rr=830, username='kim', date_of_birth=DOB)
+        ])
+
+        self.assertEqual(bus.last_id(), 0)
+
+
+class PolarRealtimeViewTests(TestCase):
+    """manager/polar/realtime-* 파라미터 검증"""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+
+    def test_invalid_initial_minutes_returns_400(self):
+        for url in ('/manager/polar/realtime-data/', '/manager/polar/realtime-stream/'):
+            for value in ('abc', '0', '100000'):
+                with self.assertLogs('django.request', 'WARNING'):
+                    response = self.client.get(url, {'user_id': '1', 'initial_minutes': value})
+                self.assertEqual(response.status_code, 400, (url, value))
+
+    @override_settings(POLAR_SSE_MAX_STREAMS=1, POLAR_SSE_RETRY_AFTER=7)
+    def test_stream_limit_returns_503(self):
+        from .models import PolarUser
+        from .views.admin_views import _sse_stream_slots
+
+        polar_user = PolarUser.objects.create(username='kim', password='x', date_of_birth=DOB)
+        self.assertTrue(_sse_stream_slots.acquire(1))
+        self.addCleanup(_sse_stream_slots.release)
+
+        with self.assertLogs('django.request', 'ERROR'):
+            response = self.client.get('/manager/polar/realtime-stream/', {'user_id': polar_user.id})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'fitbit_rate_limit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rl-test'}},
+    FITBIT_RATE_LIMIT_CACHE='fitbit_rate_limit',
+)
+class FitbitRateLimiterTests(SimpleTestCase):
+    """fitbit.rate_limit 예산 공유와 연기"""
+
+    def test_exhausted_budget_is_shared_and_deferred(self):
+        limiter = FitbitRateLimiter(max_wait=60)
+        limiter.bind('U1', 'token-a')
+        limiter.update_from_headers('token-a', {'Fitbit-Rate-Limit-Remaining': '0', 'Fitbit-Rate-Limit-Reset': '1800'})
+
+        # 다른 프로세스(새 limiter)도 공유 캐시에서 소진된 예산을 봄
+        other = FitbitRateLimiter(max_wait=60)
+        other.bind('U1', 'token-b')
+        self.assertGreater(other.get_defer_seconds('U1'), 1700)
+        with self.assertRaises(RateLimitDeferred) as raised:
+            other.acquire('token-b')
+        self.assertEqual(raised.exception.key, 'U1')
+        self.assertIsNone(FitbitRateLimiter(max_wait=3600).get_defer_seconds('U1'))
+
+    def test_bind_keeps_latest_token_per_user(self):
+        limiter = FitbitRateLimiter()
+        limiter.bind('U1', 'token-a')
+        limiter.bind('U1', 'token-b')
+
+        self.assertEqual(list(limiter._token_owners), ['token-b'])
+        self.assertTrue(limiter.key_for('token-a').startswith('token:'))
+
+    def test_unauthorized_is_tracked_per_user(self):
+        fitbit_rate_limiter.bind('U-401', 'old-token')
+        mark_unauthorized('old-token')
+        fitbit_rate_limiter.bind('U-401', 'new-token')
+        mark_unauthorized('new-token')
+
+        self.assertFalse(pop_unauthorized('old-token'))
+        self.assertTrue(pop_unauthorized('new-token'))
+        self.assertFalse(pop_unauthorized('new-token'))
+
+
+class TokenResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = json.dumps(self._data)
+
+    def json(self):
+        return self._data
+
+
+class EnsureValidTokenTests(TestCase):
+    """fitbit.token_refresh.ensure_valid_token"""
+
+    def setUp(self):
+        from django.utils import timezone
+
+        self.user = FitbitUser.objects.create(
+            fitbit_user_id='U1', access_token='access-1', refresh_token='refresh-1',
+            token_expires_at=timezone.now() + timedelta(hours=8),
+        )
+
+    def test_valid_token_is_not_refreshed(self):
+        with mock.patch('fitbit.token_refresh.fitbit_client.post') as post:
+            self.assertTrue(ensure_valid_token(self.user))
+        post.assert_not_called()
+
+    def test_uses_token_refreshed_by_another_process(self):
+        def post(url, headers, data):
+            # 같은 refresh token으로 다른 프로세스가 먼저 갱신함
+            FitbitUser.objects.filter(pk=self.user.pk).update(access_token='access-2', refresh_token='refresh-2')
+            return TokenResponse(400, {'errors': [{'errorType': 'invalid_grant'}]})
+
+        with mock.patch('fitbit.token_refresh.fitbit_client.post', side_effect=post):
+            self.assertTrue(ensure_valid_token(self.user, force=True))
+
+        self.assertEqual(self.user.access_token, 'access-2')
+
+    def test_session_refresh_updates_user_expiry(self):
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        request.session.update({'user_id': 'U1', 'access_token': 'access-1', 'refresh_token': 'refresh-1'})
+        response = TokenResponse(200, {'access_token': 'access-3', 'refresh_token': 'refresh-3', 'expires_in': 28800})
+
+        with mock.patch('fitbit.token_refresh.fitbit_client.post', return_value=response):
+            self.assertTrue(refresh_fitbit_token(request))
+
+        self.user.refresh_from_db()
+        self.assertEqual(request.session['refresh_token'], 'refresh-3')
+        self.assertEqual(self.user.refresh_token, 'refresh-3')
+        self.assertGreater(self.user.token_expires_at, self.user.updated_at + timedelta(hours=7))
@@ -1,9 +1,59 @@
 """
 Fitbit Access Token 자동 갱신 함수
+
+토큰 만료 시각(token_expires_at)을 저장해 두고 만료가 가까울 때나 401 응답을 받았을 때만 갱신.
+Fitbit refresh token은 1회용이므로 같은 사용자의 갱신은 프로세스 안에서는 사용자별 잠금으로 직렬화하고
+(동시에 갱신하면 먼저 갱신한 쪽의 refresh token이 무효화됨), 다른 프로세스와 겹쳐 갱신에 실패하면
+DB를 다시 읽어 먼저 갱신된 토큰을 사용 (HTTP 요청 중에는 DB 잠금을 잡지 않음)
 """
-import requests
 import base64
+import threading
+from datetime import timedelta
 from django.conf import settings
+from django.utils import timezone
+from .fitbit_api import fitbit_client, pop_unauthorized
+from .models import FitbitUser
+
+
+_user_locks = {}
+_user_locks_lock = threading.Lock()
+
+
+def _get_user_lock(fitbit_user_id):
+    """사용자별 갱신 잠금 (같은 스레드에서 다시 잡을 수 있도록 RLock)"""
+    with _user_locks_lock:
+        lock = _user_locks.get(fitbit_user_id)
+        if lock is None:
+            lock = _user_locks[fitbit_user_id] = threading.RLock()
+        return lock
+
+
+def get_token_expiry(token_data):
+    """
+    토큰 응답의 expires_in(초)으로 만료 시각 계산
+
+    Returns:
+        datetime 또는 None: expires_in이 없으면 None
+    """
+    expires_in = token_data.get('expires_in')
+    if expires_in is None:
+        return None
+    return timezone.now() + timedelta(seconds=int(expires_in))
+
+
+def token_needs_refresh(fitbit_user, margin=None):
+    """
+    access token 갱신이 필요한지 확인 (만료 시각을 모르거나 만료까지 margin초 이내)
+
+    Args:
+        fitbit_user: FitbitUser 모델 인스턴스
+        margin: 만료 전 여유 시간 (초, 없으면 settings.FITBIT_TOKEN_REFRESH_MARGIN)
+    """
+    if fitbit_user.token_expires_at is None:
+        return True
+    if margin is None:
+        margin = getattr(settings, 'FITBIT_TOKEN_REFRESH_MARGIN', 600)
+    return timezone.now() + timedelta(seconds=margin) >= fitbit_user.token_expires_at
 
 
 def refresh_access_token(fitbit_user):
@@ -25,28 +75,102 @@ def refresh_access_token(fitbit_user):
         'Content-Type': 'application/x-www-form-urlencoded'
     }
 
-    data = {
-        'grant_type': 'refresh_token',
-        'refresh_token': fitbit_user.refresh_token
-    }
+    with _get_user_lock(fitbit_user.fitbit_user_id):
+        data = {
+            'grant_type': 'refresh_token',
+            'refresh_token': fitbit_user.refresh_token
+        }
 
-    try:
-        response = requests.post(settings.FITBIT_TOKEN_URL, headers=headers, data=data)
+        try:
+            response = fitbit_client.post(settings.FITBIT_TOKEN_URL, headers=headers, data=data)
 
-        if response.status_code == 200:
-            token_data = response.json()
+            if response.status_code == 200:
+                token_data = response.json()
 
-            # DB에 새 토큰 저장
-            fitbit_user.access_token = token_data['access_token']
-            fitbit_user.refresh_token = token_data['refresh_token']
-            fitbit_user.save()
+                # DB에 새 토큰 저장
+                fitbit_user.access_token = token_data['access_token']
+                fitbit_user.refresh_token = token_data['refresh_token']
+                fitbit_user.token_expires_at = get_token_expiry(token_data)
+                fitbit_user.save(update_fields=['access_token', 'refresh_token', 'token_expires_at', 'updated_at'])
 
-            print(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 성공")
-            return True
-        else:
-            print(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패: {response.status_code} - {response.text}")
+                print(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 성공")
+                return True
+            else:
+                print(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패: {response.status_code} - {response.text}")
+                return False
+
+        except Exception as e:
+            print(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 중 예외 발생: {e}")
             return False
 
-    except Exception as e:
-        print(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 중 예외 발생: {e}")
+
+def _load_latest_token(fitbit_user):
+    """DB의 최신 토큰을 fitbit_user에 반영"""
+    latest = FitbitUser.objects.only('access_token', 'refresh_token', 'token_expires_at').get(pk=fitbit_user.pk)
+    fitbit_user.access_token = latest.access_token
+    fitbit_user.refresh_token = latest.refresh_token
+    fitbit_user.token_expires_at = latest.token_expires_at
+
+
+def ensure_valid_token(fitbit_user, force=False):
+    """
+    필요할 때만 access token 갱신
+
+    다른 스레드/프로세스가 이미 갱신했을 수 있으므로 잠금을 잡은 뒤 DB의 최신 토큰을 다시 읽고 판단.
+    갱신 요청(HTTP)은 DB 행 잠금이나 트랜잭션 없이 보내고, 다른 프로세스(cron, 관리자 동기화)가 같은
+    refresh token으로 먼저 갱신해 실패한 경우에는 DB를 다시 읽어 그 토큰을 사용
+
+    Args:
+        fitbit_user: FitbitUser 모델 인스턴스 (최신 토큰으로 갱신됨)
+        force: True면 만료 시각과 관계없이 갱신 (401 응답을 받은 경우).
+               단, 그 사이 다른 곳에서 이미 갱신했다면 새 토큰을 그대로 사용
+
+    Returns:
+        bool: 유효한 토큰 확보 여부
+    """
+    with _get_user_lock(fitbit_user.fitbit_user_id):
+        stale_token = fitbit_user.access_token
+        _load_latest_token(fitbit_user)
+
+        if force:
+            if fitbit_user.access_token != stale_token:
+                return True
+        elif not token_needs_refresh(fitbit_user):
+            return True
+
+        used_refresh_token = fitbit_user.refresh_token
+        if refresh_access_token(fitbit_user):
+            return True
+
+        # 다른 프로세스가 먼저 갱신했다면 (refresh token은 1회용) 그 결과를 사용
+        _load_latest_token(fitbit_user)
+        if fitbit_user.refresh_token != used_refresh_token:
+            print(f"[{fitbit_user.fitbit_user_id}] 다른 프로세스가 갱신한 토큰 사용")
+            return True
         return False
+
+
+def run_with_valid_token(fitbit_user, sync_func):
+    """
+    유효한 토큰을 확보한 뒤 동기화 함수 실행 (401 응답 시 토큰을 갱신하고 1회 재시도)
+
+    Args:
+        fitbit_user: FitbitUser 모델 인스턴스
+        sync_func: FitbitUser를 받아 결과 dict를 반환하는 함수 (fitbit_user.access_token 사용)
+
+    Returns:
+        dict: sync_func 결과 (토큰 확보 실패 시 {'success': False, 'error': ...})
+    """
+    if not ensure_valid_token(fitbit_user):
+        return {'success': False, 'error': '토큰 갱신 실패'}
+
+    access_token = fitbit_user.access_token
+    result = sync_func(fitbit_user)
+
+    if pop_unauthorized(access_token):
+        print(f"[{fitbit_user.fitbit_user_id}] 401 응답 - 토큰 갱신 후 재시도")
+        if not ensure_valid_token(fitbit_user, force=True):
+            return {'success': False, 'error': '토큰 갱신 실패 (401)'}
+        result = sync_func(fitbit_user)
+
+    return result
@@ -48,6 +48,7 @@ urlpatterns = [
     path('manager/polar/hrv-index/', polar_views.get_polar_hrv_index_data, name='get_polar_hrv_index'),
     path('manager/polar/search-users/', admin_views.search_polar_users, name='search_polar_users'),
     path('manager/polar/realtime-data/', admin_views.get_polar_realtime_data, name='get_polar_realtime_data'),
+    path('manager/polar/realtime-stream/', admin_views.stream_polar_realtime_data, name='stream_polar_realtime_data'),
 
     # 모바일 앱 API (JWT 인증)
     path('api/mobile/register/', mobile_views.register, name='mobile_register'),
@@ -3,7 +3,7 @@
 """
 import json
 import logging
-import requests
+import threading
 import pytz
 from datetime import datetime, date, timedelta, time
 from django.shortcuts import render, redirect
@@ -13,6 +13,7 @@ from django.db.models import Avg, Count, Max, OuterRef, Subquery
 from django.db.models.functions import TruncDate
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
 from django.conf import settings
 from django.utils import timezone
 import numpy as np
@@ -29,7 +30,9 @@ from ..models import (
 )
 from ..compliance import calculate_compliance_rate, calculate_compliance_rate_polar
 from ..data_sync import sync_fitbit_data_for_date
-from ..token_refresh import refresh_access_token
+from ..fitbit_api import fitbit_client
+from ..sync_executor import run_user_syncs
+from ..token_refresh import run_with_valid_token
 
 # KST Timezone 설정
 KST = pytz.timezone('Asia/Seoul')
@@ -63,6 +66,7 @@ def admin_dashboard(request):
 
 
 @staff_member_required
+@gzip_page
 def get_dashboard_data(request):
     """대시보드 데이터 API (JSON 반환) - Polar 데이터 기반"""
     
@@ -239,6 +243,7 @@ def admin_polar_heart_rate(request):
 
 
 @staff_member_required
+@gzip_page
 def get_fitbit_heart_rate_data(request):
     """심박수/걸음수 Intraday 데이터 API (JSON 반환)"""
     user_id = request.GET.get('user_id')
@@ -420,6 +425,7 @@ def get_fitbit_heart_rate_data(request):
 
 
 @staff_member_required
+@gzip_page
 def get_last_hour_data(request):
     """최근 1시간 데이터 API (JSON 반환) - 시간별 심박수"""
     # 현재 시간 기준 1시간 전
@@ -460,6 +466,7 @@ def get_last_hour_data(request):
 
 
 @staff_member_required
+@gzip_page
 def get_date_range_data(request):
     """날짜 범위 데이터 API (JSON 반환) - 심박수, 걸음수, 칼로리 데이터 (심박수 기준 조인)"""
     # 파라미터 받기
@@ -594,39 +601,33 @@ def sync_last_hour(request):
     end_time = now.strftime('%H:%M')
     today = now.strftime('%Y-%m-%d')
 
-    users = FitbitUser.objects.all()
-    success_count = 0
-    fail_count = 0
-
-    for fitbit_user in users:
-        try:
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
-                fail_count += 1
-                continue
+    def sync_fitbit_user(fitbit_user):
+        # 최근 1시간 데이터 동기화
+        return sync_fitbit_data_for_date(
+            fitbit_user.fitbit_user_id,
+            fitbit_user.access_token,
+            date=today,
+            start_time=start_time,
+            end_time=end_time
+        )
 
-            # 최근 1시간 데이터 동기화
-            result = sync_fitbit_data_for_date(
-                fitbit_user.fitbit_user_id,
-                fitbit_user.access_token,
-                date=today,
-                start_time=start_time,
-                end_time=end_time
-            )
+    def sync_user(fitbit_user):
+        # 토큰은 만료가 가까울 때나 401 응답 시에만 갱신
+        return run_with_valid_token(fitbit_user, sync_fitbit_user)
 
-            if result['success']:
-                success_count += 1
-            else:
-                fail_count += 1
+    summary = run_user_syncs(FitbitUser.objects.all(), sync_user)
+    success_count = summary['success_count']
+    fail_count = summary['fail_count']
 
-        except Exception as e:
-            fail_count += 1
-            print(f"최근 1시간 데이터 동기화 오류 ({fitbit_user.fitbit_user_id}): {e}")
+    for item in summary['results']:
+        if item['error'] and not item['success']:
+            print(f"최근 1시간 데이터 동기화 오류 ({item['fitbit_user_id']}): {item['error']}")
 
     return JsonResponse({
         'success': True,
         'success_count': success_count,
         'fail_count': fail_count,
+        'timeout_count': summary['timeout_count'],
         'start_time': start_time,
         'end_time': end_time
     })
@@ -642,58 +643,54 @@ def sync_today_data(request):
     # KST 기준 오늘 날짜
     today = datetime.now(KST).strftime('%Y-%m-%d')
     
-    users = FitbitUser.objects.all()
-    success_count = 0
-    fail_count = 0
-    failed_items = set()  # 실패한 데이터 타입 추적
+    def sync_fitbit_user(fitbit_user):
+        # 오늘 데이터 전체 동기화
+        return sync_fitbit_data_for_date(
+            fitbit_user.fitbit_user_id,
+            fitbit_user.access_token,
+            date=today,
+            start_time=None,  # 하루 전체
+            end_time=None
+        )
 
-    for fitbit_user in users:
-        try:
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
-                fail_count += 1
-                continue
-
-            # 오늘 데이터 전체 동기화
-            result = sync_fitbit_data_for_date(
-                fitbit_user.fitbit_user_id,
-                fitbit_user.access_token,
-                date=today,
-                start_time=None,  # 하루 전체
-                end_time=None
-            )
+    def sync_user(fitbit_user):
+        # 토큰은 만료가 가까울 때나 401 응답 시에만 갱신
+        return run_with_valid_token(fitbit_user, sync_fitbit_user)
 
-            if result['success']:
-                success_count += 1
-            else:
-                fail_count += 1
+    summary = run_user_syncs(FitbitUser.objects.all(), sync_user)
+    success_count = summary['success_count']
+    fail_count = summary['fail_count']
+    failed_items = set()  # 실패한 데이터 타입 추적
 
-            # 실패한 항목 수집
-            for key, value in result.items():
-                if key.startswith('intraday_') or key == 'daily_summary':
-                    if value is False:
-                        # 데이터 타입 이름 변환
-                        item_name = {
-                            'daily_summary': '일일 요약',
-                            'intraday_heart_rate': '심박수',
-                            'intraday_steps': '걸음수',
-                            'intraday_calories': '칼로리',
-                            'intraday_distance': '거리',
-                            'intraday_floors': '층수',
-                            'intraday_elevation': '고도',
-                            'intraday_spo2': 'SpO2',
-                            'intraday_hrv': 'HRV'
-                        }.get(key, key)
-                        failed_items.add(item_name)
+    for item in summary['results']:
+        result = item['result']
+        if result is None:
+            print(f"오늘 데이터 동기화 오류 ({item['fitbit_user_id']}): {item['error']}")
+            continue
 
-        except Exception as e:
-            fail_count += 1
-            print(f"오늘 데이터 동기화 오류 ({fitbit_user.fitbit_user_id}): {e}")
+        # 실패한 항목 수집
+        for key, value in result.items():
+            if key.startswith('intraday_') or key == 'daily_summary':
+                if value is False:
+                    # 데이터 타입 이름 변환
+                    item_name = {
+                        'daily_summary': '일일 요약',
+                        'intraday_heart_rate': '심박수',
+                        'intraday_steps': '걸음수',
+                        'intraday_calories': '칼로리',
+                        'intraday_distance': '거리',
+                        'intraday_floors': '층수',
+                        'intraday_elevation': '고도',
+                        'intraday_spo2': 'SpO2',
+                        'intraday_hrv': 'HRV'
+                    }.get(key, key)
+                    failed_items.add(item_name)
 
     return JsonResponse({
         'success': True,
         'success_count': success_count,
         'fail_count': fail_count,
+        'timeout_count': summary['timeout_count'],
         'date': today,
         'failed_items': list(failed_items) if failed_items else []
     })
@@ -714,7 +711,7 @@ def sync_profiles(request):
         try:
             # Fitbit 프로필 API 호출
             headers = {'Authorization': f'Bearer {fitbit_user.access_token}'}
-            response = requests.get(
+            response = fitbit_client.get(
                 f"{settings.FITBIT_API_BASE_URL}/1/user/-/profile.json",
                 headers=headers
             )
@@ -945,17 +942,36 @@ def search_polar_users(request):
     })
 
 
+INITIAL_MINUTES_MAX = 1440
+INITIAL_MINUTES_ERROR = f'initial_minutes는 1~{INITIAL_MINUTES_MAX} 사이의 정수여야 합니다'
+
+
+def _parse_initial_minutes(request, default=10):
+    """initial_minutes 쿼리 파라미터 (없으면 default, 정수가 아니거나 범위를 벗어나면 None)"""
+    value = request.GET.get('initial_minutes')
+    if value in (None, ''):
+        return default
+    try:
+        minutes = int(value)
+    except ValueError:
+        return None
+    return minutes if 1 <= minutes <= INITIAL_MINUTES_MAX else None
+
+
 @staff_member_required
+@gzip_page
 def get_polar_realtime_data(request):
     """Polar 실시간 데이터 스트리밍 API - 신규 데이터만 반환 (username + date_of_birth 기반)"""
     from ..models import PolarHeartRate
 
     user_id = request.GET.get('user_id')
     last_timestamp = request.GET.get('last_timestamp')  # 마지막 조회 시점
-    initial_minutes = int(request.GET.get('initial_minutes', 10))  # 초기 로드 시 조회 기간
+    initial_minutes = _parse_initial_minutes(request)  # 초기 로드 시 조회 기간
 
     if not user_id:
         return JsonResponse({'success': False, 'error': 'user_id는 필수입니다'}, status=400)
+    if initial_minutes is None:
+        return JsonResponse({'success': False, 'error': INITIAL_MINUTES_ERROR}, status=400)
 
     try:
         # 사용자 조회
@@ -1010,6 +1026,190 @@ def get_polar_realtime_data(request):
 
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+def _sse_event(event, data, event_id=None):
+    """SSE 이벤트 1개 (id는 EventSource가 재연결 시 Last-Event-ID 헤더로 돌려줌)"""
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class _SSEStreamSlots:
+    """프로세스 안의 동시 SSE 연결 수 (연결 1개가 워커 스레드 1개를 점유하므로 상한을 둠)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def acquire(self, limit):
+        with self._lock:
+            if limit and self.count >= limit:
+                return False
+            self.count += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.count -= 1
+
+
+_sse_stream_slots = _SSEStreamSlots()
+
+
+class _SSEStream:
+    """
+    SSE 이벤트 iterator (응답이 닫히면 연결 슬롯 반환)
+
+    제너레이터는 한 번도 실행되지 않은 채 닫히면 finally가 실행되지 않으므로,
+    Django가 응답 종료 시 호출하는 close()에서 슬롯을 반환함
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.events)
+
+    def close(self):
+        try:
+            self.events.close()
+        finally:
+            if not self.released:
+                self.released = True
+                _sse_stream_slots.release()
+
+
+@staff_member_required
+def stream_polar_realtime_data(request):
+    """
+    Polar 실시간 데이터 SSE 스트림 (get_polar_realtime_data 폴링 대체)
+
+    receive_polar_data가 저장한 샘플을 pub/sub(fitbit.realtime)으로 받아 바로 전달함
+    (다른 워커 프로세스가 받은 샘플도 공유 이벤트 파일을 거쳐 같은 구독 큐로 들어오므로 주기적인 DB 조회는 없음).
+    DB는 연결 시 한 번만 조회하며, 재연결 시에는 Last-Event-ID 이전 POLAR_SSE_CATCHUP_WINDOW_SECONDS 구간을
+    함께 읽어 이미 보낸 샘플을 (시각, 기기)로 걸러냄.
+    연결은 POLAR_SSE_MAX_SECONDS 후 닫히며 EventSource가 Last-Event-ID로 재연결해 빠진 샘플만 이어받음.
+    워커 프로세스당 동시 연결은 POLAR_SSE_MAX_STREAMS개까지이며, 넘으면 503 + Retry-After
+
+    이벤트:
+        initial: 최근 initial_minutes분 데이터 (첫 연결)
+        samples: 새 샘플 (재연결 시 Last-Event-ID 이후 데이터 포함)
+    """
+    import time as time_module
+    from queue import Empty
+    from django.http import StreamingHttpResponse
+    from dateutil import parser
+    from ..models import PolarHeartRate, PolarUser
+    from ..realtime import format_realtime_sample, polar_sample_broker
+
+    user_id = request.GET.get('user_id')
+    initial_minutes = _parse_initial_minutes(request)
+    last_event_id = request.headers.get('Last-Event-ID')
+
+    if not user_id:
+        return JsonResponse({'success': False, 'error': 'user_id는 필수입니다'}, status=400)
+    if initial_minutes is None:
+        return JsonResponse({'success': False, 'error': INITIAL_MINUTES_ERROR}, status=400)
+
+    polar_user = PolarUser.objects.filter(id=user_id).first()
+    if not polar_user:
+        return JsonResponse({'success': False, 'error': '사용자를 찾을 수 없습니다'}, status=404)
+
+    if not _sse_stream_slots.acquire(getattr(settings, 'POLAR_SSE_MAX_STREAMS', 20)):
+        response = JsonResponse({'success': False, 'error': '실시간 연결이 너무 많습니다. 잠시 후 다시 시도하세요'},
+                                status=503)
+        response['Retry-After'] = str(getattr(settings, 'POLAR_SSE_RETRY_AFTER', 5))
+        return response
+
+    username = polar_user.username
+    date_of_birth = polar_user.date_of_birth
+    heartbeat = getattr(settings, 'POLAR_SSE_HEARTBEAT_SECONDS', 15)
+    catchup_window = timedelta(seconds=getattr(settings, 'POLAR_SSE_CATCHUP_WINDOW_SECONDS', 120))
+    max_seconds = getattr(settings, 'POLAR_SSE_MAX_SECONDS', 300)
+
+    def load_samples(**filters):
+        hr_data = PolarHeartRate.objects.filter(
+            username=username,
+            date_of_birth=date_of_birth,
+            **filters
+        ).order_by('datetime').values_list('datetime', 'hr', 'rr', 'device_id')
+        return [format_realtime_sample(dt, hr, rr, device_id) for dt, hr, rr, device_id in hr_data]
+
+    def send(event, samples, last_dt):
+        # id는 지금까지 보낸 가장 늦은 샘플 시각 (재연결 시 Last-Event-ID로 돌아옴)
+        return _sse_event(event, [{key: sample[key] for key in ('timestamp', 'hr', 'rr')} for sample in samples],
+                          last_dt.isoformat() if last_dt else None)
+
+    def event_stream():
+        # 구독을 먼저 시작한 뒤 DB를 조회해야 조회 중에 들어온 샘플을 놓치지 않음
+        with polar_sample_broker.subscription(username, date_of_birth) as subscriber:
+            yield 'retry: 1000\n\n'  # 연결이 끊기거나 max_seconds로 닫히면 1초 후 재연결
+
+            last_dt = None
+            if last_event_id:
+                try:
+                    last_dt = parser.isoparse(last_event_id)
+                except ValueError:
+                    last_dt = None
+
+            if last_dt:
+                # 재연결: Last-Event-ID까지의 최근 구간은 이전 연결에서 보낸 것으로 보고 이후 샘플만 전달
+                recent = load_samples(datetime__gte=last_dt - catchup_window)
+                sent = {(sample['_dt'], sample['_device_id']) for sample in recent if sample['_dt'] <= last_dt}
+                samples = [sample for sample in recent if sample['_dt'] > last_dt]
+                event = 'samples'
+            else:
+                samples = load_samples(datetime__gte=timezone.now() - timedelta(minutes=initial_minutes))
+                sent = set()
+                event = 'initial'
+            # 연결 시 조회한 구간과 구독으로 받은 샘플이 겹칠 수 있으므로 보낸 샘플 (시각, 기기)로 중복만 거름
+            sent.update((sample['_dt'], sample['_device_id']) for sample in samples)
+            if samples:
+                last_dt = max(last_dt, samples[-1]['_dt']) if last_dt else samples[-1]['_dt']
+            if samples or event == 'initial':
+                yield send(event, samples, last_dt)
+
+            started = time_module.monotonic()
+            while time_module.monotonic() - started < max_seconds:
+                pushed = []
+                try:
+                    pushed.extend(subscriber.get(timeout=heartbeat))
+                    while True:
+                        pushed.extend(subscriber.get_nowait())
+                except Empty:
+                    pass
+
+                new_samples = []
+                for sample in sorted(pushed, key=lambda sample: sample['_dt']):
+                    key = (sample['_dt'], sample['_device_id'])
+                    if key not in sent:
+                        sent.add(key)
+                        new_samples.append(sample)
+
+                if new_samples:
+                    last_dt = max(last_dt, new_samples[-1]['_dt']) if last_dt else new_samples[-1]['_dt']
+                    yield send('samples', new_samples, last_dt)
+                    # 중복 확인은 연결 시 조회 구간과 겹치는 동안만 필요하므로 오래된 키는 정리
+                    floor = last_dt - catchup_window
+                    if len(sent) > 1000:
+                        sent = {key for key in sent if key[0] >= floor}
+                else:
+                    yield ': keepalive\n\n'
+
+    response = StreamingHttpResponse(_SSEStream(event_stream()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx 프록시 버퍼링 해제
+    return response
+
+
 @staff_member_required
 @csrf_exempt
 
@@ -10,39 +10,35 @@ from datetime import datetime
 import base64
 import requests
 from ..models import FitbitUser
+from ..token_refresh import ensure_valid_token, get_token_expiry
 
 
 def refresh_fitbit_token(request):
-    """Fitbit 토큰 갱신"""
+    """
+    Fitbit 토큰 갱신 (세션 사용자의 FitbitUser와 함께 갱신)
+
+    refresh token은 1회용이므로 세션에만 저장하면 cron이 가진 DB의 refresh token이 무효화됨.
+    ensure_valid_token으로 DB의 토큰과 만료 시각(token_expires_at)을 갱신하고 세션에 복사
+    """
     if 'refresh_token' not in request.session:
         return False
 
-    auth_header = base64.b64encode(
-        f"{settings.FITBIT_CLIENT_ID}:{settings.FITBIT_CLIENT_SECRET}".encode()
-    ).decode()
-
-    headers = {
-        'Authorization': f'Basic {auth_header}',
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-
-    data = {
-        'grant_type': 'refresh_token',
-        'refresh_token': request.session['refresh_token']
-    }
-
-    token_response = requests.post(settings.FITBIT_TOKEN_URL, headers=headers, data=data)
+    fitbit_user = FitbitUser.objects.filter(fitbit_user_id=request.session.get('user_id')).first()
+    if fitbit_user is None:
+        print("토큰 갱신 실패: 세션 사용자의 FitbitUser가 없습니다.")
+        return False
 
-    if token_response.status_code == 200:
-        new_token_data = token_response.json()
-        request.session['access_token'] = new_token_data['access_token']
-        request.session['refresh_token'] = new_token_data['refresh_token']
-        print("토큰이 성공적으로 갱신되었습니다.")
-        return True
-    else:
-        print("토큰 갱신 실패:", token_response.text)
+    # 세션의 토큰이 401을 받았으므로 DB에 더 새 토큰이 없으면 강제 갱신
+    fitbit_user.access_token = request.session.get('access_token')
+    if not ensure_valid_token(fitbit_user, force=True):
+        print("토큰 갱신 실패")
         return False
 
+    request.session['access_token'] = fitbit_user.access_token
+    request.session['refresh_token'] = fitbit_user.refresh_token
+    print("토큰이 성공적으로 갱신되었습니다.")
+    return True
+
 
 def login(request):
     """Fitbit 로그인"""
@@ -108,6 +104,7 @@ def callback(request):
             defaults={
                 'access_token': token_data['access_token'],
                 'refresh_token': token_data['refresh_token'],
+                'token_expires_at': get_token_expiry(token_data),
                 'granted_scope': token_data.get('scope', '')
             }
         )
@@ -115,6 +112,7 @@ def callback(request):
         if not created:
             fitbit_user.access_token = token_data['access_token']
             fitbit_user.refresh_token = token_data['refresh_token']
+            fitbit_user.token_expires_at = get_token_expiry(token_data)
             fitbit_user.granted_scope = token_data.get('scope', '')
             fitbit_user.save()
 
@@ -1,24 +1,37 @@
 import os
+import hmac
 import json
 import logging
+import random
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_http_methods
 from django.contrib.admin.views.decorators import staff_member_required
+from django.db import DatabaseError, IntegrityError, transaction
 from django.db.models import Avg, Max, Min, Count
 from django.utils import timezone
 import pytz
 from ..models import PolarHeartRate, PolarUser, PolarHeartRateIndex5
+from ..json_stream import BodyTooLargeError, JSONArrayStream, JSONStreamError, iter_chunks
+from ..compression import DecompressionError
+from ..polar_queue import QueueFullError, ensure_drainer_started, get_polar_queue, is_write_behind_enabled
+from ..realtime import polar_sample_broker
 
 logger = logging.getLogger(__name__)
 
-# .env에서 API 키 로드
+# .env에서 API 키 로드 (쉼표로 구분하여 여러 개 지정 가능 - 키 교체 기간에 이전 키와 함께 사용)
 API_KEY = os.getenv('DATA_POLAR_ENDPOINT_API_KEY', 'datapolarendpointapikey')
+API_KEYS = tuple(key.strip().encode() for key in API_KEY.split(',') if key.strip())
 
 
 def verify_api_key(request):
-    """API 키 검증"""
+    """API 키 검증 (타이밍 공격 방지를 위해 모든 키와 상수 시간 비교)"""
     # Header에서 API 키 확인 (X-API-Key 또는 Authorization)
     api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization')
 
@@ -26,7 +39,497 @@ def verify_api_key(request):
     if api_key and api_key.startswith('Bearer '):
         api_key = api_key[7:]
 
-    return api_key == API_KEY
+    if not api_key:
+        return False
+
+    api_key = api_key.encode()
+    matched = False
+    for key in API_KEYS:
+        matched |= hmac.compare_digest(api_key, key)
+    return matched
+
+
+class PolarPayloadError(Exception):
+    """요청 본문을 해석할 수 없음 (status: 응답 코드)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+MSGPACK_CONTENT_TYPES = ('application/msgpack', 'application/x-msgpack')
+COLUMNAR_HEADER_FIELDS = ('deviceId', 'username', 'dateofbirth')
+
+
+def parse_polar_payload(request):
+    """
+    요청 본문을 JSON 또는 msgpack(Content-Type: application/msgpack)으로 해석
+    (Content-Encoding: gzip/deflate 본문은 RequestDecompressionMiddleware의 스트림이 읽으면서 압축 해제)
+
+    Raises:
+        PolarPayloadError: 형식 오류, msgpack 패키지 미설치
+    """
+    body = request.body
+    content_type = request.content_type or ''
+
+    if content_type in MSGPACK_CONTENT_TYPES:
+        try:
+            import msgpack
+        except ImportError:
+            raise PolarPayloadError('msgpack payloads are not supported on this server', status=415)
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except Exception:
+            raise PolarPayloadError('Invalid msgpack format')
+
+    try:
+        return json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise PolarPayloadError('Invalid JSON format')
+
+
+def is_columnar_payload(data):
+    """헤더 + 배열 형식 여부 (hr가 배열인 단일 객체)"""
+    return isinstance(data, dict) and isinstance(data.get('hr'), list)
+
+
+def expand_columnar_payload(data):
+    """
+    헤더 + 배열 형식을 기존 항목 리스트 형식으로 변환
+
+    {"deviceId", "username", "dateofbirth", "hr": [...], "rr": [...],
+     "timestamps": [...] 또는 "timestamp": 시작값 + "dt": [이전 값과의 차이, ...]}
+
+    Raises:
+        PolarPayloadError: 필수 필드 누락, 배열 길이 불일치
+    """
+    missing_fields = [field for field in COLUMNAR_HEADER_FIELDS if field not in data]
+    if missing_fields:
+        raise PolarPayloadError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    hr_values = data['hr']
+    rr_values = data.get('rr')
+    if rr_values is None:
+        rr_values = [None] * len(hr_values)
+
+    if 'timestamps' in data:
+        timestamps = data['timestamps']
+    elif 'dt' in data and 'timestamp' in data:
+        # delta 인코딩: 첫 값은 timestamp 기준 차이, 이후는 이전 값 기준 차이
+        try:
+            timestamps = list(accumulate(data['dt'], initial=data['timestamp']))[1:]
+        except TypeError:
+            raise PolarPayloadError('Invalid dt values')
+    else:
+        raise PolarPayloadError('Missing required fields: timestamps (or timestamp + dt)')
+
+    if not (isinstance(timestamps, list) and isinstance(rr_values, list)) or not (
+        len(hr_values) == len(timestamps) == len(rr_values)
+    ):
+        raise PolarPayloadError('hr, rr and timestamps must be arrays of the same length')
+
+    header = {field: data[field] for field in COLUMNAR_HEADER_FIELDS}
+    return [
+        {'hr': hr, 'rr': rr, 'timestamp': timestamp, **header}
+        for hr, rr, timestamp in zip(hr_values, rr_values, timestamps)
+    ]
+
+
+def get_content_length(request):
+    """요청 본문 크기 (Content-Length, 없거나 잘못된 값이면 0)"""
+    try:
+        return int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return 0
+
+
+def is_streaming_upload(request, content_length):
+    """
+    본문이 POLAR_STREAMING_THRESHOLD보다 큰 JSON이면 스트리밍으로 처리 (msgpack은 본문 전체를 디코딩)
+
+    압축된 본문(RequestDecompressionMiddleware)은 압축 해제 후 크기를 미리 알 수 없으므로 항상 스트리밍으로 처리
+    """
+    if request.content_type in MSGPACK_CONTENT_TYPES:
+        return False
+    if getattr(request, 'compressed_body_encoding', None):
+        return True
+    threshold = getattr(settings, 'POLAR_STREAMING_THRESHOLD', 1024 * 1024)
+    return content_length > threshold
+
+
+def get_payload_error_status(error):
+    """본문 해석 에러 -> 응답 코드 (크기 초과 413, 그 외 형식 오류 400)"""
+    if isinstance(error, BodyTooLargeError):
+        return 413
+    return getattr(error, 'status', 400)
+
+
+@lru_cache(maxsize=256)
+def parse_date_of_birth(dateofbirth_str):
+    """생년월일 문자열(YYYY-MM-DD) -> date (배치 안에서 같은 값이 반복되므로 캐시)"""
+    return datetime.strptime(dateofbirth_str, '%Y-%m-%d').date()
+
+
+def build_polar_heart_rate(idx, item):
+    """
+    수신 데이터 1개 항목 검증 후 저장 전 PolarHeartRate 객체 생성
+
+    Args:
+        idx: 배열 내 위치 (에러 메시지용)
+        item: 수신 JSON 항목
+
+    Returns:
+        tuple: (PolarHeartRate 또는 None, 에러 메시지 또는 None)
+    """
+    # 필수 필드 검증
+    required_fields = ['hr', 'timestamp', 'deviceId', 'username', 'dateofbirth']
+    missing_fields = [field for field in required_fields if field not in item]
+
+    if missing_fields:
+        return None, f"Item {idx}: Missing required fields: {', '.join(missing_fields)}"
+
+    # 데이터 추출
+    hr = item['hr']
+    rr = item.get('rr')  # Optional
+    timestamp = item['timestamp']
+    device_id = item['deviceId']
+    username = item['username']
+    dateofbirth_str = item['dateofbirth']
+
+    # 타임스탬프 변환 (milliseconds to datetime)
+    try:
+        dt = datetime.fromtimestamp(timestamp / 1000.0)
+    except (ValueError, OSError) as e:
+        return None, f"Item {idx}: Invalid timestamp: {timestamp}, error: {e}"
+
+    # 생년월일 변환 (YYYY-MM-DD to date)
+    try:
+        date_of_birth = parse_date_of_birth(dateofbirth_str)
+    except (ValueError, TypeError):
+        return None, f"Item {idx}: Invalid dateofbirth format: {dateofbirth_str}, expected YYYY-MM-DD"
+
+    # 데이터 유효성 검증
+    if not isinstance(hr, (int, float)) or hr < 0 or hr > 300:
+        return None, f"Item {idx}: Invalid heart rate value: {hr}"
+
+    if rr is not None and (not isinstance(rr, (int, float)) or rr < 0):
+        return None, f"Item {idx}: Invalid RR interval value: {rr}"
+
+    polar_data = PolarHeartRate(
+        device_id=device_id,
+        datetime=dt,
+        hr=int(hr),
+        rr=int(rr) if rr is not None else None,
+        username=username,
+        date_of_birth=date_of_birth
+    )
+    return polar_data, None
+
+
+def validate_polar_items(items, offset=0, verbose=False):
+    """
+    항목 검증 후 저장 전 PolarHeartRate 생성 (DB 접근 없음)
+
+    Args:
+        items: 수신 항목 리스트
+        offset: items[0]의 요청 배열 내 위치 (청크 단위로 처리할 때)
+        verbose: 항목별 에러를 로그에 기록할지
+
+    Returns:
+        tuple: (저장 대기 (idx, PolarHeartRate) 리스트, 거부된 항목 위치 리스트, 에러 메시지 리스트)
+    """
+    pending = []
+    rejected = []
+    errors = []
+
+    for idx, item in enumerate(items, start=offset):
+        try:
+            polar_data, error_msg = build_polar_heart_rate(idx, item)
+        except Exception as e:
+            polar_data, error_msg = None, f"Item {idx}: {str(e)}"
+
+        if error_msg:
+            if verbose:
+                logger.error(error_msg)
+            errors.append(error_msg)
+            rejected.append(idx)
+        else:
+            pending.append((idx, polar_data))
+
+    return pending, rejected, errors
+
+
+RESPONSE_MODE_ACK = 'ack'
+RESPONSE_MODE_VERBOSE = 'verbose'
+
+
+def get_response_mode(request):
+    """
+    응답 형식 결정 (기본: verbose)
+
+    - Header: X-Response-Mode: ack 또는 Prefer: return=minimal
+    - Query: ?response=ack
+    """
+    mode = request.headers.get('X-Response-Mode') or request.GET.get('response')
+    if mode:
+        return RESPONSE_MODE_ACK if mode.strip().lower() == RESPONSE_MODE_ACK else RESPONSE_MODE_VERBOSE
+
+    if 'return=minimal' in request.headers.get('Prefer', '').lower():
+        return RESPONSE_MODE_ACK
+    return RESPONSE_MODE_VERBOSE
+
+
+def build_ack_response(data_list, saved, rejected, duplicates=()):
+    """
+    ack 모드 응답 (저장된 행을 돌려주지 않고 개수, 첫/마지막 timestamp, 거부된 항목 위치만 반환)
+
+    Args:
+        data_list: 수신한 항목 리스트
+        saved: 저장된 (idx, PolarHeartRate) 리스트
+        rejected: 저장하지 못한 항목 위치 리스트
+        duplicates: 이미 저장되어 있어 건너뛴 항목 위치 리스트 (재전송, 실패로 보지 않음)
+    """
+    if saved or duplicates:
+        response = {
+            'status': 'success',
+            'saved_count': len(saved),
+            'duplicate_count': len(duplicates),
+            'rejected': sorted(rejected),
+        }
+        if saved:
+            timestamps = [data_list[idx]['timestamp'] for idx, _ in saved]
+            response['first_timestamp'] = min(timestamps)
+            response['last_timestamp'] = max(timestamps)
+
+        return JsonResponse(response, status=201 if saved else 200)
+
+    return JsonResponse({
+        'status': 'error',
+        'saved_count': 0,
+        'rejected': sorted(rejected),
+    }, status=400)
+
+
+def _polar_natural_key(polar_data):
+    """PolarHeartRate 자연키 (unique_together와 동일, datetime은 DB에 저장되는 aware 값으로 정규화)"""
+    dt = polar_data.datetime
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_default_timezone())
+    return (polar_data.username, polar_data.date_of_birth, polar_data.device_id, dt)
+
+
+def split_polar_duplicates(pending, check_existing=True):
+    """
+    요청 내 중복과 이미 저장된 샘플(클라이언트 재전송)을 제외
+
+    Args:
+        pending: 저장 대기 중인 (idx, PolarHeartRate) 리스트
+        check_existing: False면 요청 내 중복만 제외 (DB 조회 없음)
+
+    Returns:
+        tuple: (저장할 (idx, PolarHeartRate) 리스트, 중복 항목 위치 리스트)
+    """
+    # 요청 내 중복 (같은 샘플이 배열에 두 번) - 첫 항목만 저장
+    unique_pending = {}
+    duplicates = []
+    for idx, polar_data in pending:
+        key = _polar_natural_key(polar_data)
+        if key in unique_pending:
+            duplicates.append(idx)
+        else:
+            unique_pending[key] = (idx, polar_data)
+
+    if not check_existing:
+        return list(unique_pending.values()), duplicates
+
+    # 이미 저장된 샘플 - SELECT 1회
+    return _split_existing(unique_pending, duplicates), duplicates
+
+
+def queue_polar_heart_rates(pending):
+    """
+    write-behind 큐에 추가 (이미 저장된 샘플은 제외하고 중복으로 반환)
+
+    DB를 조회할 수 없으면 요청 내 중복만 제외하고 모두 큐에 넣음
+    (큐에 이미 있거나 DB에 있는 샘플은 drainer가 ignore_conflicts로 건너뜀)
+
+    Returns:
+        tuple: (큐에 추가된 (idx, PolarHeartRate) 리스트, 중복 항목 위치 리스트)
+
+    Raises:
+        QueueFullError: 큐가 가득 찬 경우
+    """
+    try:
+        queued, duplicates = split_polar_duplicates(pending)
+    except DatabaseError as e:
+        logger.warning(f"[POLAR] Duplicate check failed, queueing without it: {str(e)}")
+        queued, duplicates = split_polar_duplicates(pending, check_existing=False)
+
+    if queued:
+        get_polar_queue().enqueue([polar_data for _, polar_data in queued])
+    return queued, duplicates
+
+
+def save_polar_heart_rates(pending):
+    """
+    검증된 PolarHeartRate를 중복을 제외하고 저장 (INSERT ... ON CONFLICT DO NOTHING과 같은 결과)
+
+    Args:
+        pending: 저장 대기 중인 (idx, PolarHeartRate) 리스트
+
+    Returns:
+        tuple: (생성된 PolarHeartRate 리스트, 저장된 (idx, PolarHeartRate) 리스트, 중복 항목 위치 리스트)
+    """
+    to_save, duplicates = split_polar_duplicates(pending)
+    if not to_save:
+        return [], [], duplicates
+
+    try:
+        with transaction.atomic():
+            created = PolarHeartRate.objects.bulk_create([polar_data for _, polar_data in to_save])
+    except IntegrityError:
+        # SELECT 이후 같은 샘플이 다른 요청/drainer에서 동시에 저장된 경우:
+        # 다시 조회해서 그 샘플은 중복으로 돌리고 나머지만 저장 (응답/실시간 전달에는 실제 저장된 행만 포함)
+        to_save = _split_existing(dict(
+            (_polar_natural_key(polar_data), (idx, polar_data)) for idx, polar_data in to_save
+        ), duplicates)
+        created = _save_polar_heart_rates_one_by_one(to_save, duplicates)
+        saved_objects = set(map(id, created))
+        to_save = [(idx, polar_data) for idx, polar_data in to_save if id(polar_data) in saved_objects]
+
+    return created, to_save, duplicates
+
+
+def _split_existing(unique_pending, duplicates):
+    """
+    자연키가 이미 DB에 있는 항목을 duplicates에 추가하고 나머지 (idx, PolarHeartRate) 리스트를 반환
+
+    Args:
+        unique_pending: {자연키: (idx, PolarHeartRate)}
+        duplicates: 중복 항목 위치 리스트 (이 함수가 추가함)
+    """
+    if not unique_pending:
+        return []
+
+    keys = list(unique_pending)
+    existing = set(
+        PolarHeartRate.objects.filter(
+            username__in={key[0] for key in keys},
+            date_of_birth__in={key[1] for key in keys},
+            device_id__in={key[2] for key in keys},
+            datetime__range=(min(key[3] for key in keys), max(key[3] for key in keys)),
+        ).values_list('username', 'date_of_birth', 'device_id', 'datetime')
+    )
+
+    to_save = []
+    for key, (idx, polar_data) in unique_pending.items():
+        if key in existing:
+            duplicates.append(idx)
+        else:
+            to_save.append((idx, polar_data))
+    return to_save
+
+
+def _save_polar_heart_rates_one_by_one(to_save, duplicates):
+    """
+    다시 조회한 뒤 남은 항목 저장 (그 사이에 또 충돌하면 항목별 savepoint로 충돌 행만 중복 처리)
+
+    Returns:
+        list: 실제로 저장된 PolarHeartRate 리스트 (pk 포함)
+    """
+    if not to_save:
+        return []
+
+    try:
+        with transaction.atomic():
+            return PolarHeartRate.objects.bulk_create([polar_data for _, polar_data in to_save])
+    except IntegrityError:
+        for _, polar_data in to_save:
+            polar_data.pk = None
+            polar_data._state.adding = True
+
+    created = []
+    for idx, polar_data in to_save:
+        try:
+            with transaction.atomic():
+                polar_data.save(force_insert=True)
+        except IntegrityError:
+            polar_data.pk = None
+            duplicates.append(idx)
+        else:
+            created.append(polar_data)
+    return created
+
+
+def build_queued_response(request, data_list, queued, rejected, errors, duplicates=()):
+    """
+    write-behind 모드 응답 (202, 큐에 추가된 개수만 반환 - id는 drainer가 저장한 뒤에 생김)
+
+    Args:
+        request: 요청 (응답 형식 결정용)
+        data_list: 수신한 항목 리스트
+        queued: 큐에 추가된 (idx, PolarHeartRate) 리스트
+        rejected: 검증에 실패한 항목 위치 리스트
+        errors: 검증 에러 메시지 리스트
+        duplicates: 이미 저장되어 있어 큐에 넣지 않은 항목 위치 리스트
+    """
+    timestamps = [data_list[idx]['timestamp'] for idx, _ in queued]
+    response = {
+        'status': 'accepted',
+        'queued_count': len(queued),
+        'duplicate_count': len(duplicates),
+        'first_timestamp': min(timestamps),
+        'last_timestamp': max(timestamps),
+    }
+    if get_response_mode(request) == RESPONSE_MODE_ACK:
+        response['rejected'] = sorted(rejected)
+    else:
+        response['message'] = f'{len(queued)} record(s) queued'
+        if errors:
+            response['errors'] = errors
+            response['error_count'] = len(errors)
+
+    return JsonResponse(response, status=202)
+
+
+def is_verbose_logging():
+    """POLAR_VERBOSE_LOGGING: 요청 본문, 항목별 에러, 저장된 샘플을 모두 기록 (디버깅용)"""
+    return getattr(settings, 'POLAR_VERBOSE_LOGGING', False)
+
+
+def should_log_body():
+    """이번 요청의 본문을 기록할지 결정 (verbose 모드가 아니면 POLAR_LOG_BODY_SAMPLE_RATE 비율로 샘플링)"""
+    if is_verbose_logging():
+        return True
+    rate = getattr(settings, 'POLAR_LOG_BODY_SAMPLE_RATE', 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def log_ingest_summary(request, stats, status, started):
+    """
+    요청 1건당 요약 로그 1줄 (key=value 형식, 4xx/5xx는 WARNING)
+
+    예: [POLAR] ingest status=201 items=300 saved=298 duplicates=0 queued=0 rejected=2 bytes=3721 ms=12.4 remote=1.2.3.4
+    """
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    fields = [
+        f"status={status}",
+        f"items={stats['items']}",
+        f"saved={stats['saved']}",
+        f"duplicates={stats['duplicates']}",
+        f"queued={stats['queued']}",
+        f"rejected={stats['rejected']}",
+        f"bytes={stats['bytes']}",
+        f"ms={elapsed_ms:.1f}",
+        f"remote={request.META.get('REMOTE_ADDR')}",
+    ]
+    if stats.get('format'):
+        fields.append(f"format={stats['format']}")
+    if stats.get('error'):
+        fields.append(f"error={json.dumps(stats['error'][:200], ensure_ascii=False)}")
+
+    level = logging.WARNING if status >= 400 else logging.INFO
+    logger.log(level, '[POLAR] ingest ' + ' '.join(fields))
 
 
 @csrf_exempt
@@ -50,114 +553,144 @@ def receive_polar_data(request):
         {"hr": 75, "rr": 800, "timestamp": 1678886400000, "deviceId": "00:22:D0:8A:47:7A", "username": "john", "dateofbirth": "1993-01-30"},
         {"hr": 76, "rr": 790, "timestamp": 1678886401000, "deviceId": "00:22:D0:8A:47:7A", "username": "john", "dateofbirth": "1993-01-30"}
     ]
+
+    Or columnar object (헤더 1개 + 배열, timestamps 대신 timestamp + dt 델타 인코딩 가능):
+    {
+        "deviceId": "00:22:D0:8A:47:7A", "username": "john", "dateofbirth": "1993-01-30",
+        "timestamp": 1678886400000, "dt": [0, 1000], "hr": [75, 76], "rr": [800, 790]
+    }
+
+    본문은 Content-Type: application/msgpack (msgpack 설치 시), Content-Encoding: gzip/deflate도 지원.
+    POLAR_STREAMING_THRESHOLD보다 큰 JSON 배열은 스트리밍으로 읽어 청크 단위로 저장 (_receive_polar_stream)
+
+    응답 형식: 기본은 저장된 행 전체를 반환(verbose),
+    X-Response-Mode: ack / Prefer: return=minimal / ?response=ack 이면 개수와 거부된 항목 위치만 반환(ack)
+
+    로그: 요청마다 요약 1줄(log_ingest_summary), 본문은 POLAR_LOG_BODY_SAMPLE_RATE 비율로만 기록.
+    POLAR_VERBOSE_LOGGING=True면 본문/항목별 에러/저장된 샘플을 모두 기록 (디버깅용)
     """
+    started = time.perf_counter()
+    stats = {'items': 0, 'saved': 0, 'duplicates': 0, 'queued': 0, 'rejected': 0, 'bytes': 0}
+    response = _receive_polar_data(request, stats)
+    log_ingest_summary(request, stats, response.status_code, started)
+    return response
+
+
+def _receive_polar_data(request, stats):
+    """receive_polar_data 본문 (stats에 처리 결과 개수를 기록)"""
+    verbose = is_verbose_logging()
     try:
-        # 요청 수신 로그
-        logger.info(f"[POLAR] Received POST request from {request.META.get('REMOTE_ADDR')}")
-        logger.info(f"[POLAR] Request body: {request.body.decode('utf-8', errors='ignore')[:500]}")
+        stats['bytes'] = get_content_length(request)
+        streaming = is_streaming_upload(request, stats['bytes'])
+        if not streaming and should_log_body():
+            logger.info(f"[POLAR] Request body from {request.META.get('REMOTE_ADDR')}: "
+                        f"{request.body.decode('utf-8', errors='ignore')[:500]}")
 
         # API 키 검증
         if not verify_api_key(request):
-            logger.warning(f"Unauthorized access attempt from {request.META.get('REMOTE_ADDR')}")
+            stats['error'] = 'Invalid or missing API key'
             return JsonResponse({
                 'status': 'error',
                 'message': 'Invalid or missing API key'
             }, status=401)
 
-        # JSON 데이터 파싱
+        # 요청 데이터 파싱 (JSON/msgpack, 헤더 + 배열 형식)
+        # 큰 JSON 배열은 본문 전체를 메모리에 올리지 않고 청크 단위로 검증/저장
         try:
-            data = json.loads(request.body)
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON format received")
+            if streaming:
+                parser = JSONArrayStream(request, getattr(settings, 'POLAR_MAX_BODY_SIZE', 50 * 1024 * 1024))
+                if parser.is_array():
+                    return _receive_polar_stream(request, parser, stats, verbose)
+                data = parser.read_value()
+            else:
+                data = parse_polar_payload(request)
+
+            if is_columnar_payload(data):
+                data = expand_columnar_payload(data)
+                stats['format'] = 'columnar'
+        except (PolarPayloadError, JSONStreamError, DecompressionError) as e:
+            stats['error'] = str(e)
             return JsonResponse({
                 'status': 'error',
-                'message': 'Invalid JSON format'
-            }, status=400)
+                'message': str(e)
+            }, status=get_payload_error_status(e))
 
         # 배열인지 단일 객체인지 확인
         if isinstance(data, list):
             # 배열 처리
             if not data:
-                logger.error("Empty array received")
+                stats['error'] = 'Empty array'
                 return JsonResponse({
                     'status': 'error',
                     'message': 'Empty array'
                 }, status=400)
 
             data_list = data
-            logger.info(f"[POLAR] Processing array with {len(data_list)} items")
         else:
             # 단일 객체를 배열로 변환
             data_list = [data]
-            logger.info("[POLAR] Processing single object")
+        stats['items'] = len(data_list)
 
-        # 저장된 데이터 목록
-        saved_data = []
-        errors = []
+        # 1단계: 전체 항목 검증 (DB 접근 없음)
+        # pending: (idx, PolarHeartRate) 저장 대기 중인 항목, rejected: 저장하지 못한 항목의 배열 내 위치
+        pending, rejected, errors = validate_polar_items(data_list, verbose=verbose)
+        created = []
+        duplicates = []  # 이미 저장되어 있어 건너뛴 항목의 배열 내 위치
 
-        # 각 데이터 항목 처리
-        for idx, item in enumerate(data_list):
+        # write-behind 모드: 로컬 큐에 추가만 하고 응답
+        # (DB 저장과 실시간 대시보드 전달은 drainer가 커밋한 뒤 처리)
+        if pending and is_write_behind_enabled():
             try:
-                # 필수 필드 검증
-                required_fields = ['hr', 'timestamp', 'deviceId', 'username', 'dateofbirth']
-                missing_fields = [field for field in required_fields if field not in item]
-
-                if missing_fields:
-                    error_msg = f"Item {idx}: Missing required fields: {', '.join(missing_fields)}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
-
-                # 데이터 추출
-                hr = item['hr']
-                rr = item.get('rr')  # Optional
-                timestamp = item['timestamp']
-                device_id = item['deviceId']
-                username = item['username']
-                dateofbirth_str = item['dateofbirth']
-
-                # 타임스탬프 변환 (milliseconds to datetime)
-                try:
-                    dt = datetime.fromtimestamp(timestamp / 1000.0)
-                except (ValueError, OSError) as e:
-                    error_msg = f"Item {idx}: Invalid timestamp: {timestamp}, error: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
-
-                # 생년월일 변환 (YYYY-MM-DD to date)
-                try:
-                    date_of_birth = datetime.strptime(dateofbirth_str, '%Y-%m-%d').date()
-                except (ValueError, TypeError) as e:
-                    error_msg = f"Item {idx}: Invalid dateofbirth format: {dateofbirth_str}, expected YYYY-MM-DD"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
-
-                # 데이터 유효성 검증
-                if not isinstance(hr, (int, float)) or hr < 0 or hr > 300:
-                    error_msg = f"Item {idx}: Invalid heart rate value: {hr}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
+                queued, queue_duplicates = queue_polar_heart_rates(pending)
+            except QueueFullError as e:
+                stats['error'] = str(e)
+                response = JsonResponse({
+                    'status': 'error',
+                    'message': 'Server busy, retry later'
+                }, status=503)
+                response['Retry-After'] = str(getattr(settings, 'POLAR_QUEUE_RETRY_AFTER', 5))
+                return response
+            except Exception as e:
+                # 큐 파일에 쓸 수 없으면 기존처럼 바로 DB에 저장
+                logger.error(f"[POLAR] Enqueue failed, saving directly: {str(e)}", exc_info=True)
+            else:
+                if queued:
+                    ensure_drainer_started()
+                    stats.update(queued=len(queued), duplicates=len(queue_duplicates), rejected=len(rejected))
+                    stats['error'] = errors[0] if errors else None
+                    return build_queued_response(request, data_list, queued, rejected, errors, queue_duplicates)
+                # 모두 이미 저장된 샘플이면 바로 저장한 경우와 같은 응답 (200, 중복 개수)
+                pending, duplicates = [], queue_duplicates
+
+        # 2단계: 이미 저장된 샘플(재전송)을 제외하고 한 트랜잭션에서 bulk_create로 저장 (요청당 INSERT 1회)
+        if pending:
+            try:
+                created, pending, duplicates = save_polar_heart_rates(pending)
+            except Exception as e:
+                logger.error(f"[POLAR] Bulk insert failed: {str(e)}", exc_info=True)
+                errors.extend(f"Item {idx}: {str(e)}" for idx, _ in pending)
+                rejected.extend(idx for idx, _ in pending)
+                pending = []
+            else:
+                polar_sample_broker.publish(created)
+
+            if verbose:
+                for polar_data in created:
+                    logger.info(
+                        f"Polar data saved: Device={polar_data.device_id}, User={polar_data.username}, "
+                        f"DOB={polar_data.date_of_birth}, HR={polar_data.hr}, RR={polar_data.rr}, Time={polar_data.datetime}"
+                    )
+
+        stats.update(saved=len(created), duplicates=len(duplicates), rejected=len(rejected))
+        stats['error'] = errors[0] if errors else None
 
-                if rr is not None and (not isinstance(rr, (int, float)) or rr < 0):
-                    error_msg = f"Item {idx}: Invalid RR interval value: {rr}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
+        # 응답 생성
+        if get_response_mode(request) == RESPONSE_MODE_ACK:
+            return build_ack_response(data_list, pending, rejected, duplicates)
 
-                # 데이터베이스에 저장
-                polar_data = PolarHeartRate.objects.create(
-                    device_id=device_id,
-                    datetime=dt,
-                    hr=int(hr),
-                    rr=int(rr) if rr is not None else None,
-                    username=username,
-                    date_of_birth=date_of_birth
-                )
-
-                saved_data.append({
+        if created or duplicates:
+            saved_data = [
+                {
                     'id': polar_data.id,
                     'device_id': polar_data.device_id,
                     'datetime': polar_data.datetime.isoformat(),
@@ -165,31 +698,23 @@ def receive_polar_data(request):
                     'rr': polar_data.rr,
                     'username': polar_data.username,
                     'date_of_birth': polar_data.date_of_birth.isoformat()
-                })
-
-                logger.info(f"Polar data saved: Device={device_id}, User={username}, DOB={date_of_birth}, HR={hr}, RR={rr}, Time={dt}")
-
-            except Exception as e:
-                error_msg = f"Item {idx}: {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                errors.append(error_msg)
-
-        # 응답 생성
-        if saved_data:
+                }
+                for polar_data in created
+            ]
             response = {
                 'status': 'success',
                 'message': f'{len(saved_data)} record(s) saved successfully',
                 'saved_count': len(saved_data),
                 'data': saved_data
             }
+            if duplicates:
+                response['duplicate_count'] = len(duplicates)
             if errors:
                 response['errors'] = errors
                 response['error_count'] = len(errors)
 
-            logger.info(f"[POLAR] Saved {len(saved_data)} records, {len(errors)} errors")
-            return JsonResponse(response, status=201)
+            return JsonResponse(response, status=201 if created else 200)
         else:
-            logger.error(f"[POLAR] No data saved. Errors: {errors}")
             return JsonResponse({
                 'status': 'error',
                 'message': 'No data saved',
@@ -198,12 +723,140 @@ def receive_polar_data(request):
 
     except Exception as e:
         logger.error(f"Error processing Polar data: {str(e)}", exc_info=True)
+        stats['error'] = str(e)
         return JsonResponse({
             'status': 'error',
             'message': 'Internal server error'
         }, status=500)
 
 
+def _receive_polar_stream(request, parser, stats, verbose):
+    """
+    큰 JSON 배열 업로드를 POLAR_STREAM_CHUNK_SIZE개씩 읽어 검증/저장 (메모리 사용량이 배열 크기와 무관)
+
+    청크마다 따로 커밋되므로 중간에 본문 오류가 나면 앞 청크는 저장된 상태로 에러를 반환함.
+    에러 응답의 partial과 processed_count(처리가 끝난 앞쪽 항목 수)로 커밋된 범위를 알려 주며,
+    같은 배치를 다시 보내면 이미 저장된 샘플은 중복으로 건너뜀.
+    verbose 응답도 저장된 행(data)은 돌려주지 않고 개수만 반환
+    """
+    chunk_size = getattr(settings, 'POLAR_STREAM_CHUNK_SIZE', 5000)
+    write_behind = is_write_behind_enabled()
+    stats['format'] = 'stream'
+
+    saved_count = 0
+    queued_count = 0
+    duplicate_count = 0
+    rejected = []
+    errors = []
+    timestamps = []  # 저장/큐 추가된 항목의 (최소, 최대) timestamp
+    stream_error = None
+
+    try:
+        for chunk in iter_chunks(parser.items(), chunk_size):
+            offset = stats['items']
+            stats['items'] += len(chunk)
+
+            pending, chunk_rejected, chunk_errors = validate_polar_items(chunk, offset, verbose)
+            rejected.extend(chunk_rejected)
+            errors.extend(chunk_errors)
+            if not pending:
+                continue
+
+            # write-behind 모드: 큐가 가득 차면 나머지 청크는 바로 DB에 저장 (큰 배치를 재전송시키지 않음)
+            if write_behind:
+                try:
+                    queued, duplicates = queue_polar_heart_rates(pending)
+                except QueueFullError as e:
+                    stats['error'] = str(e)
+                    write_behind = False
+                except Exception as e:
+                    logger.error(f"[POLAR] Enqueue failed, saving directly: {str(e)}", exc_info=True)
+                    write_behind = False
+                else:
+                    queued_count += len(queued)
+                    duplicate_count += len(duplicates)
+                    if queued:
+                        chunk_timestamps = [chunk[idx - offset]['timestamp'] for idx, _ in queued]
+                        timestamps.append((min(chunk_timestamps), max(chunk_timestamps)))
+                    continue
+
+            try:
+                created, saved, duplicates = save_polar_heart_rates(pending)
+            except Exception as e:
+                logger.error(f"[POLAR] Bulk insert failed: {str(e)}", exc_info=True)
+                errors.extend(f"Item {idx}: {str(e)}" for idx, _ in pending)
+                rejected.extend(idx for idx, _ in pending)
+                continue
+
+            polar_sample_broker.publish(created)
+            saved_count += len(created)
+            duplicate_count += len(duplicates)
+            if saved:
+                chunk_timestamps = [chunk[idx - offset]['timestamp'] for idx, _ in saved]
+                timestamps.append((min(chunk_timestamps), max(chunk_timestamps)))
+    except (JSONStreamError, DecompressionError) as e:
+        stream_error = e
+
+    if queued_count:
+        ensure_drainer_started()
+
+    stats.update(saved=saved_count, queued=queued_count, duplicates=duplicate_count, rejected=len(rejected))
+    stats['error'] = str(stream_error) if stream_error else (errors[0] if errors else stats.get('error'))
+
+    counts = {
+        'saved_count': saved_count,
+        'queued_count': queued_count,
+        'duplicate_count': duplicate_count,
+    }
+
+    if stream_error:
+        # 앞쪽 processed_count개 항목은 이미 처리(저장/큐 추가/중복/거부)되었고 그 뒤는 읽지 못함
+        return JsonResponse({
+            'status': 'error',
+            'message': str(stream_error),
+            'partial': bool(saved_count or queued_count),
+            'processed_count': stats['items'],
+            **counts,
+        }, status=get_payload_error_status(stream_error))
+
+    if not stats['items']:
+        stats['error'] = 'Empty array'
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Empty array'
+        }, status=400)
+
+    if saved_count or queued_count or duplicate_count:
+        response = {
+            'status': 'success' if saved_count or not queued_count else 'accepted',
+            **counts,
+        }
+        if timestamps:
+            response['first_timestamp'] = min(first for first, _ in timestamps)
+            response['last_timestamp'] = max(last for _, last in timestamps)
+        if saved_count:
+            status = 201
+        elif queued_count:
+            status = 202
+        else:
+            status = 200
+    else:
+        response = {'status': 'error', 'saved_count': 0}
+        status = 400
+
+    if get_response_mode(request) == RESPONSE_MODE_ACK:
+        response['rejected'] = sorted(rejected)
+    else:
+        response['message'] = (
+            f'{saved_count} record(s) saved, {queued_count} queued' if status != 400 else 'No data saved'
+        )
+        if errors:
+            response['errors'] = errors
+            response['error_count'] = len(errors)
+
+    return JsonResponse(response, status=status)
+
+
 @staff_member_required
 def get_polar_devices(request):
     """
@@ -228,6 +881,7 @@ def get_polar_devices(request):
 
 
 @staff_member_required
+@gzip_page
 def get_polar_heart_rate_data(request):
     """
     Polar 데이터 조회 및 차트 데이터 생성 (username + date_of_birth 기반)
@@ -344,6 +998,7 @@ def get_polar_heart_rate_data(request):
 
 
 @staff_member_required
+@gzip_page
 def get_polar_hrv_index_data(request):
     """
     특정 유저의 특정 날짜의 HRV Index 데이터 조회 (5분 단위)
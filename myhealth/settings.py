@@ -64,6 +64,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'fitbit.compression.RequestDecompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -145,6 +146,100 @@ FITBIT_TOKEN_URL = "https://api.fitbit.com/oauth2/token"
 FITBIT_API_BASE_URL = "https://api.fitbit.com"
 FITBIT_SCOPE = "activity heartrate location nutrition profile settings sleep social weight oxygen_saturation respiratory_rate temperature cardio_fitness electrocardiogram"
 
+# Intraday 데이터 bulk upsert 배치 크기 (INSERT ... ON CONFLICT 1회당 행 수)
+FITBIT_BULK_BATCH_SIZE = int(os.getenv('FITBIT_BULK_BATCH_SIZE', '1000'))
+
+# Fitbit API HTTP 커넥션 풀 설정 (keep-alive 세션 재사용)
+FITBIT_HTTP_POOL_SIZE = int(os.getenv('FITBIT_HTTP_POOL_SIZE', '64'))
+FITBIT_HTTP_CONNECT_TIMEOUT = float(os.getenv('FITBIT_HTTP_CONNECT_TIMEOUT', '5'))
+FITBIT_HTTP_READ_TIMEOUT = float(os.getenv('FITBIT_HTTP_READ_TIMEOUT', '30'))
+
+# Fitbit API Rate Limit (사용자당 시간당 요청 수, 예산 소진 시 최대 대기 시간/429 재시도 횟수)
+FITBIT_RATE_LIMIT = int(os.getenv('FITBIT_RATE_LIMIT', '150'))
+FITBIT_RATE_LIMIT_MAX_WAIT = float(os.getenv('FITBIT_RATE_LIMIT_MAX_WAIT', '60'))
+FITBIT_RATE_LIMIT_MAX_RETRIES = int(os.getenv('FITBIT_RATE_LIMIT_MAX_RETRIES', '2'))
+
+# Fitbit API 예산 공유 캐시 (cron 프로세스와 웹 워커가 같은 사용자 예산을 보도록 파일 캐시 사용, 빈 값이면 공유 안 함)
+FITBIT_RATE_LIMIT_CACHE = os.getenv('FITBIT_RATE_LIMIT_CACHE', 'fitbit_rate_limit')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fitbit_rate_limit': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('FITBIT_RATE_LIMIT_CACHE_DIR', str(BASE_DIR / '.cache' / 'fitbit_rate_limit')),
+    },
+}
+
+# access token 만료 몇 초 전부터 갱신할지 (그 전에는 저장된 토큰 재사용)
+FITBIT_TOKEN_REFRESH_MARGIN = int(os.getenv('FITBIT_TOKEN_REFRESH_MARGIN', '600'))
+
+# 사용자별 동기화 병렬 실행 설정 (sync_all_users.py, 관리자 동기화)
+FITBIT_SYNC_MAX_WORKERS = int(os.getenv('FITBIT_SYNC_MAX_WORKERS', '8'))
+FITBIT_SYNC_USER_TIMEOUT = float(os.getenv('FITBIT_SYNC_USER_TIMEOUT', '120'))
+# 사용자 1명의 엔드포인트별 요청 동시 실행 수 (sync_fitbit_data_for_date)
+FITBIT_SYNC_FETCH_WORKERS = int(os.getenv('FITBIT_SYNC_FETCH_WORKERS', '12'))
+
+# Intraday 증분 동기화 (API 지연 고려 lag, 워터마크가 오래된 경우 최대 조회 범위)
+FITBIT_INCREMENTAL_LAG_MINUTES = int(os.getenv('FITBIT_INCREMENTAL_LAG_MINUTES', '10'))
+FITBIT_INCREMENTAL_MAX_LOOKBACK_MINUTES = int(os.getenv('FITBIT_INCREMENTAL_MAX_LOOKBACK_MINUTES', '1440'))
+
+# 백필 시 분 단위 데이터(걸음 수, 칼로리 등)를 한 번에 조회할 최대 일수 (날짜 범위 엔드포인트)
+FITBIT_BACKFILL_INTRADAY_MAX_DAYS = int(os.getenv('FITBIT_BACKFILL_INTRADAY_MAX_DAYS', '7'))
+
+# asyncio 클라이언트 설정 (fitbit/fitbit_api_async.py, 전체 동시 연결 수 / 동시 동기화 사용자 수)
+FITBIT_ASYNC_MAX_CONNECTIONS = int(os.getenv('FITBIT_ASYNC_MAX_CONNECTIONS', '100'))
+FITBIT_ASYNC_MAX_USERS = int(os.getenv('FITBIT_ASYNC_MAX_USERS', '50'))
+
+# 압축된 요청 본문(Content-Encoding: gzip/deflate)을 풀어줄 경로와 압축 해제 후 최대 크기 (fitbit/compression.py, /data/polar/는 POLAR_MAX_BODY_SIZE 적용)
+COMPRESSED_REQUEST_PATHS = ('/data/polar/', '/api/mobile/')
+MAX_DECOMPRESSED_BODY_SIZE = int(os.getenv('MAX_DECOMPRESSED_BODY_SIZE', str(10 * 1024 * 1024)))
+
+# Polar 업로드 스트리밍 처리 (이 크기보다 큰 JSON 배열은 본문 전체를 메모리에 올리지 않고 청크 단위로 검증/저장)
+POLAR_STREAMING_THRESHOLD = int(os.getenv('POLAR_STREAMING_THRESHOLD', str(1024 * 1024)))
+POLAR_STREAM_CHUNK_SIZE = int(os.getenv('POLAR_STREAM_CHUNK_SIZE', '5000'))
+POLAR_MAX_BODY_SIZE = int(os.getenv('POLAR_MAX_BODY_SIZE', str(50 * 1024 * 1024)))
+
+# Polar 업로드 로그 (요청마다 요약 1줄, 본문은 샘플링 비율 0.0~1.0로만 기록, verbose는 디버깅용 전체 기록)
+POLAR_LOG_BODY_SAMPLE_RATE = float(os.getenv('POLAR_LOG_BODY_SAMPLE_RATE', '0.0'))
+POLAR_VERBOSE_LOGGING = os.getenv('POLAR_VERBOSE_LOGGING', 'False') == 'True'
+
+# Polar 업로드 write-behind 큐 (fitbit/polar_queue.py)
+# 켜면 검증된 샘플을 로컬 큐 파일에 추가만 하고 202 응답, drainer가 배치로 polar_heart_rate에 저장
+POLAR_WRITE_BEHIND = os.getenv('POLAR_WRITE_BEHIND', 'False') == 'True'
+POLAR_QUEUE_PATH = os.getenv('POLAR_QUEUE_PATH', str(BASE_DIR / 'polar_queue.sqlite3'))
+POLAR_QUEUE_MAX_PENDING = int(os.getenv('POLAR_QUEUE_MAX_PENDING', '100000'))
+POLAR_QUEUE_RETRY_AFTER = int(os.getenv('POLAR_QUEUE_RETRY_AFTER', '5'))
+POLAR_QUEUE_BATCH_SIZE = int(os.getenv('POLAR_QUEUE_BATCH_SIZE', '5000'))
+POLAR_QUEUE_DRAIN_INTERVAL = float(os.getenv('POLAR_QUEUE_DRAIN_INTERVAL', '1.0'))
+POLAR_QUEUE_LEASE_SECONDS = int(os.getenv('POLAR_QUEUE_LEASE_SECONDS', '300'))
+POLAR_QUEUE_MAX_ATTEMPTS = int(os.getenv('POLAR_QUEUE_MAX_ATTEMPTS', '5'))
+POLAR_QUEUE_IN_PROCESS_DRAINER = os.getenv('POLAR_QUEUE_IN_PROCESS_DRAINER', 'True') == 'True'
+
+# Polar 실시간 SSE 스트림 (manager/polar/realtime-stream/)
+# 연결 1개가 워커 스레드 1개를 점유하므로 gunicorn은 gthread 워커로 실행하고 MAX_STREAMS는 --threads보다 작게 둠
+POLAR_SSE_HEARTBEAT_SECONDS = int(os.getenv('POLAR_SSE_HEARTBEAT_SECONDS', '15'))
+POLAR_SSE_MAX_STREAMS = int(os.getenv('POLAR_SSE_MAX_STREAMS', '20'))
+POLAR_SSE_RETRY_AFTER = int(os.getenv('POLAR_SSE_RETRY_AFTER', '5'))
+POLAR_SSE_CATCHUP_WINDOW_SECONDS = int(os.getenv('POLAR_SSE_CATCHUP_WINDOW_SECONDS', '120'))
+POLAR_SSE_MAX_SECONDS = int(os.getenv('POLAR_SSE_MAX_SECONDS', '300'))
+
+# 워커 프로세스 간 실시간 샘플 전달 (fitbit/realtime.py, 비우면 같은 프로세스의 구독자에게만 전달)
+POLAR_REALTIME_BUS_PATH = os.getenv('POLAR_REALTIME_BUS_PATH', str(BASE_DIR / 'polar_realtime.sqlite3'))
+POLAR_REALTIME_POLL_INTERVAL = float(os.getenv('POLAR_REALTIME_POLL_INTERVAL', '0.5'))
+POLAR_REALTIME_RETENTION_SECONDS = int(os.getenv('POLAR_REALTIME_RETENTION_SECONDS', '60'))
+
+# HRV 주파수 도메인 계산 방법 (fitbit/hrv.py) - welch: 4Hz 보간 + Welch, lomb: Lomb-Scargle, auto: 짧거나 끊긴 구간만 Lomb-Scargle
+HRV_FREQUENCY_METHOD = os.getenv('HRV_FREQUENCY_METHOD', 'welch')
+
+# HRV 지표 증분 계산 (fitbit/hrv_stream.py, python manage.py stream_polar_hrv)
+# 켜면 remove_polar_outliers.py가 calculate_polar_hrv_index.py를 실행하지 않음
+POLAR_HRV_STREAMING = os.getenv('POLAR_HRV_STREAMING', 'False') == 'True'
+POLAR_HRV_STREAM_INTERVAL = float(os.getenv('POLAR_HRV_STREAM_INTERVAL', '5.0'))
+POLAR_HRV_STREAM_GRACE_SECONDS = int(os.getenv('POLAR_HRV_STREAM_GRACE_SECONDS', '120'))
+POLAR_HRV_STREAM_BATCH_SIZE = int(os.getenv('POLAR_HRV_STREAM_BATCH_SIZE', '10000'))
+POLAR_HRV_STREAM_OVERLAP_ROWS = int(os.getenv('POLAR_HRV_STREAM_OVERLAP_ROWS', '20000'))
+
 # Session 설정 - DB 기반 세션 사용 (권장)
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # Django 기본값
 
@@ -242,3 +337,6 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
+
+# 모바일 API JWT 인증 시 PolarUser 조회 결과 캐시 시간 (초, 0이면 매 요청 DB 조회)
+POLAR_JWT_USER_CACHE_TTL = int(os.getenv('POLAR_JWT_USER_CACHE_TTL', '60'))
@@ -18,7 +18,11 @@ from fitbit.models import (
     IntradayDistance, IntradayFloors, IntradayElevation, IntradaySpO2, IntradayHRV
 )
 from fitbit.data_sync import sync_fitbit_data_for_date
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
+from fitbit.rate_limit import fitbit_rate_limiter
+
+# 백필은 Rate Limit 예산이 소진되면 리셋 시점(최대 1시간)까지 기다려서 데이터 누락 방지
+fitbit_rate_limiter.max_wait = 3600
 import pytz
 
 
@@ -115,8 +119,8 @@ def backfill_all_intraday(start_date, end_date):
         log_message(f"\n[{fitbit_user.fitbit_user_id}] 백필 시작...")
 
         try:
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
+            # 토큰 갱신 (만료가 가까울 때만)
+            if not ensure_valid_token(fitbit_user):
                 log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
                 continue
 
@@ -14,8 +14,12 @@ django.setup()
 
 # Django 모델 및 함수 import
 from fitbit.models import FitbitUser
-from fitbit.data_sync import sync_fitbit_data_for_date
-from fitbit.token_refresh import refresh_access_token
+from fitbit.data_sync import sync_fitbit_data_date_range
+from fitbit.token_refresh import ensure_valid_token
+from fitbit.rate_limit import fitbit_rate_limiter
+
+# 백필은 Rate Limit 예산이 소진되면 리셋 시점(최대 1시간)까지 기다려서 데이터 누락 방지
+fitbit_rate_limiter.max_wait = 3600
 
 
 def log_message(message):
@@ -61,21 +65,23 @@ def backfill_date_range(start_date, end_date):
         log_message(f"\n[{fitbit_user.fitbit_user_id}] 백필 시작...")
 
         try:
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
+            # 토큰 갱신 (만료가 가까울 때만)
+            if not ensure_valid_token(fitbit_user):
                 log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
                 continue
 
-            # 각 날짜별로 전체 데이터 동기화
-            for date in dates:
-                log_message(f"[{fitbit_user.fitbit_user_id}] {date} 동기화 중...")
+            # 날짜 범위 엔드포인트로 전체 기간을 한 번에 동기화
+            log_message(f"[{fitbit_user.fitbit_user_id}] {start_date} ~ {end_date} 동기화 중...")
 
-                result = sync_fitbit_data_for_date(
-                    fitbit_user.fitbit_user_id,
-                    fitbit_user.access_token,
-                    date
-                )
+            results = sync_fitbit_data_date_range(
+                fitbit_user.fitbit_user_id,
+                fitbit_user.access_token,
+                start_date,
+                end_date
+            )
 
+            for result in results:
+                date = result['date']
                 if result['success']:
                     log_message(
                         f"[{fitbit_user.fitbit_user_id}] {date} 성공 - "
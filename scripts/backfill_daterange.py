@@ -27,7 +27,7 @@ from fitbit.data_sync import (
     save_intraday_distance, save_intraday_floors, save_intraday_elevation,
     save_intraday_spo2, save_intraday_hrv
 )
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 import pytz
 
 
@@ -114,8 +114,8 @@ def backfill_daterange(start_date, end_date):
         log_message(f"\n[{fitbit_user.fitbit_user_id}] 백필 시작...")
 
         try:
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
+            # 토큰 갱신 (만료가 가까울 때만)
+            if not ensure_valid_token(fitbit_user):
                 log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
                 continue
 
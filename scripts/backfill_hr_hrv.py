@@ -16,7 +16,7 @@ django.setup()
 from fitbit.models import FitbitUser, IntradayHeartRate, IntradayHRV
 from fitbit.data_sync import save_intraday_heart_rate, save_intraday_hrv
 from fitbit.fitbit_api import get_heart_rate_data, get_hrv_intraday_data
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 
 
 def log_message(message):
@@ -90,8 +90,8 @@ def backfill_hr_hrv(start_date, end_date):
         log_message(f"\n[{fitbit_user.fitbit_user_id}] 백필 시작...")
 
         try:
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
+            # 토큰 갱신 (만료가 가까울 때만)
+            if not ensure_valid_token(fitbit_user):
                 log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
                 continue
 
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+HRV 지표 계산 벤치마크
+
+fitbit.hrv 배치 API(전체 구간을 ragged 배열로 한 번에 계산)와
+구간마다 numpy/scipy를 호출하는 구간별 계산(RR 타코그램 4Hz 보간 후 scipy.signal.welch)을
+같은 합성 RR 데이터로 비교하고 결과가 같은지 확인. DB는 사용하지 않음
+
+사용법:
+    python scripts/bench_hrv.py [--windows 2000] [--length 300]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fitbit.hrv import compute_hrv_batch, offsets_from_counts, trapezoid
+
+
+def reference_window(hr_values, rr_values):
+    """구간별 계산 (5분 구간 1개)"""
+    from scipy import signal
+
+    mean_hr = np.mean(hr_values)
+    sd_hr = np.std(hr_values, ddof=1) if len(hr_values) > 1 else None
+    result = {'mean_hr': mean_hr, 'sd_hr': sd_hr, 'mean_rr': np.mean(rr_values) if len(rr_values) else None}
+
+    if len(rr_values) >= 2:
+        result['rmssd'] = np.sqrt(np.mean(np.diff(rr_values) ** 2))
+        result['sdnn'] = np.std(rr_values, ddof=1)
+    if len(rr_values) >= 10:
+        beat_times = np.cumsum(rr_values) / 1000.0
+        grid = beat_times[0] + np.arange(int(np.floor((beat_times[-1] - beat_times[0]) * 4.0)) + 1) / 4.0
+        resampled = np.interp(grid, beat_times, rr_values)
+        freqs, psd = signal.welch(resampled, fs=4.0, nperseg=min(len(resampled), 256))
+        hf_mask = (freqs >= 0.15) & (freqs <= 0.4)
+        lf_mask = (freqs >= 0.04) & (freqs < 0.15)
+        result['hf_power'] = trapezoid(psd[hf_mask], freqs[hf_mask])
+        result['lf_power'] = trapezoid(psd[lf_mask], freqs[lf_mask])
+    return result
+
+
+def build_windows(n_windows, length, seed=0):
+    """5분 구간별 합성 HR/RR (구간마다 길이가 조금씩 다름, 일부 RR 누락)"""
+    rng = np.random.default_rng(seed)
+    hr_counts = rng.integers(max(length - 10, 1), length + 1, n_windows)
+    hr = rng.normal(72, 6, hr_counts.sum()).round()
+    rr_counts = np.maximum(hr_counts - rng.integers(0, 5, n_windows), 0)
+    rr = rng.normal(830, 50, rr_counts.sum()).round().clip(min=300)
+    return hr, offsets_from_counts(hr_counts), rr, offsets_from_counts(rr_counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HRV 지표 계산 벤치마크')
+    parser.add_argument('--windows', type=int, default=2000, help='5분 구간 수')
+    parser.add_argument('--length', type=int, default=300, help='구간당 최대 샘플 수')
+    args = parser.parse_args()
+
+    hr, hr_offsets, rr, rr_offsets = build_windows(args.windows, args.length)
+    print(f"구간 {args.windows}개 x 최대 {args.length}샘플 (RR 총 {len(rr)}개)")
+
+    import scipy.signal  # noqa: F401 (scipy import 시간 제외)
+
+    started = time.perf_counter()
+    reference = [
+        reference_window(hr[hr_offsets[i]:hr_offsets[i + 1]], rr[rr_offsets[i]:rr_offsets[i + 1]])
+        for i in range(args.windows)
+    ]
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    metrics = compute_hrv_batch(hr, hr_offsets, rr, rr_offsets)
+    batch_seconds = time.perf_counter() - started
+
+    mismatches = [
+        name for name in ('mean_hr', 'sd_hr', 'mean_rr', 'rmssd', 'sdnn', 'hf_power', 'lf_power')
+        if not np.allclose(
+            [np.nan if window.get(name) is None else window[name] for window in reference],
+            metrics[name], rtol=1e-9, equal_nan=True
+        )
+    ]
+
+    print(f"  구간별 함수   {reference_seconds * 1000:>9.1f} ms ({reference_seconds / args.windows * 1e6:.0f} us/구간)")
+    print(f"  배치 API      {batch_seconds * 1000:>9.1f} ms ({batch_seconds / args.windows * 1e6:.0f} us/구간)")
+    print(f"  {reference_seconds / batch_seconds:.1f}배 빠름, 결과 {'일치' if not mismatches else '불일치: ' + ', '.join(mismatches)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Polar 업로드 로그량 벤치마크
+
+같은 요청을 POLAR_VERBOSE_LOGGING=True(기존처럼 본문/샘플마다 기록)와 기본 설정(요청당 요약 1줄)으로
+receive_polar_data에 보내고, 요청당 로그 줄 수/바이트와 처리 시간을 비교.
+DB 저장은 요청마다 rollback하므로 실제 데이터에는 영향 없음
+
+사용법:
+    python scripts/bench_polar_ingest_logging.py [--requests 200] [--samples 60]
+"""
+import os
+import sys
+import io
+import json
+import time
+import logging
+import argparse
+import django
+
+# Django 설정
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myhealth.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import transaction
+from django.test import RequestFactory
+from fitbit.views import polar_views
+
+
+def build_payload(request_idx, samples):
+    """1초 간격 샘플 배열 (요청마다 timestamp가 겹치지 않도록)"""
+    base = 1700000000000 + request_idx * samples * 1000
+    return json.dumps([
+        {
+            'hr': 60 + i % 30,
+            'rr': 700 + i % 200,
+            'timestamp': base + i * 1000,
+            'deviceId': '24:AC:AC:0C:D8:6A',
+            'username': 'bench_user',
+            'dateofbirth': '1990-01-01',
+        }
+        for i in range(samples)
+    ])
+
+
+def run(requests_count, samples, verbose):
+    """polar_views 로거 출력을 메모리로 모아 로그 줄 수/바이트와 처리 시간 측정"""
+    settings.POLAR_VERBOSE_LOGGING = verbose
+    settings.POLAR_WRITE_BEHIND = False
+
+    buffer = io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(logging.Formatter('{levelname} {asctime} {module} {message}', style='{'))
+
+    polar_logger = logging.getLogger(polar_views.__name__)
+    saved_handlers, saved_propagate = polar_logger.handlers[:], polar_logger.propagate
+    polar_logger.handlers = [handler]
+    polar_logger.propagate = False
+    polar_logger.setLevel(logging.INFO)
+
+    factory = RequestFactory()
+    api_key = os.getenv('DATA_POLAR_ENDPOINT_API_KEY', 'datapolarendpointapikey')
+    payloads = [build_payload(i, samples) for i in range(requests_count)]
+
+    elapsed = 0.0
+    try:
+        for payload in payloads:
+            request = factory.post(
+                '/data/polar/heartrate/', payload,
+                content_type='application/json', HTTP_X_API_KEY=api_key,
+            )
+            with transaction.atomic():
+                started = time.perf_counter()
+                polar_views.receive_polar_data(request)
+                elapsed += time.perf_counter() - started
+                transaction.set_rollback(True)
+    finally:
+        polar_logger.handlers = saved_handlers
+        polar_logger.propagate = saved_propagate
+
+    output = buffer.getvalue()
+    return {
+        'lines': output.count('\n'),
+        'bytes': len(output.encode('utf-8')),
+        'ms_per_request': elapsed / requests_count * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Polar 업로드 로그량 벤치마크')
+    parser.add_argument('--requests', type=int, default=200, help='요청 수')
+    parser.add_argument('--samples', type=int, default=60, help='요청당 샘플 수')
+    args = parser.parse_args()
+
+    print(f"요청 {args.requests}개 x 샘플 {args.samples}개")
+    results = {
+        'verbose (기존)': run(args.requests, args.samples, verbose=True),
+        'summary (기본)': run(args.requests, args.samples, verbose=False),
+    }
+
+    for name, result in results.items():
+        print(
+            f"  {name:<16} 로그 {result['lines']:>7}줄 {result['bytes'] / 1024:>9.1f} KB "
+            f"(요청당 {result['bytes'] / args.requests:>8.0f} B), {result['ms_per_request']:.2f} ms/요청"
+        )
+
+    before, after = results['verbose (기존)'], results['summary (기본)']
+    if after['bytes']:
+        print(f"  로그량 {before['bytes'] / after['bytes']:.0f}배 감소")
+
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,7 @@ django.setup()
 
 from fitbit.models import FitbitUser
 from fitbit.fitbit_api import get_sleep_data
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 
 
 def debug_sleep_api():
@@ -29,8 +29,8 @@ def debug_sleep_api():
     try:
         fitbit_user = FitbitUser.objects.get(fitbit_user_id=test_user_id)
 
-        # 토큰 갱신
-        if not refresh_access_token(fitbit_user):
+        # 토큰 갱신 (만료가 가까울 때만)
+        if not ensure_valid_token(fitbit_user):
             print("❌ 토큰 갱신 실패")
             return
 
@@ -14,13 +14,43 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myhealth.settings')
 django.setup()
 
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from fitbit.models import PolarHeartRate, PolarHeartRateNN
 import numpy as np
 
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+def grouped_mean_std(codes, values, valid, n_groups):
+    """
+    그룹별 평균/표준편차 (np.mean, np.std(ddof=0)과 동일)
+
+    Args:
+        codes: 행별 그룹 번호 (0 ~ n_groups-1)
+        values: 행별 값
+        valid: 통계에 포함할 행 (0 값 제외)
+        n_groups: 그룹 수
+
+    Returns:
+        tuple: (평균 배열, 표준편차 배열) - 값이 없으면 평균 NaN, 값이 2개 미만이면 표준편차 NaN
+    """
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+        deviation = values[valid] - mean[codes[valid]]
+        std = np.sqrt(np.bincount(codes[valid], weights=deviation ** 2, minlength=n_groups) / counts)
+    std[counts < 2] = np.nan
+    return mean, std
+
 
 def remove_outliers_and_save():
     """
     최근 5분간의 데이터에서 이상치를 제거하고 저장
+
+    미처리 데이터 조회(이미 저장된 NN 행은 NOT EXISTS로 제외) 1회 + bulk_create로 처리하므로
+    사용자 수와 무관하게 쿼리 수가 일정함
     """
     kst = pytz.timezone('Asia/Seoul')
     now = datetime.now(kst)
@@ -29,117 +59,114 @@ def remove_outliers_and_save():
     print(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] 이상치 제거 시작")
     print(f"처리 범위: {five_minutes_ago.strftime('%Y-%m-%d %H:%M:%S')} ~ {now.strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # 최근 5분간 데이터 조회 (이미 처리되지 않은 데이터만)
-    recent_data = PolarHeartRate.objects.filter(
-        datetime__gte=five_minutes_ago,
-        datetime__lt=now
-    ).order_by('username', 'date_of_birth', 'datetime')
+    # 최근 5분간 데이터 중 아직 polar_heart_rate_nn에 없는 데이터만 조회 (중복 방지)
+    processed = PolarHeartRateNN.objects.filter(
+        username=OuterRef('username'),
+        date_of_birth=OuterRef('date_of_birth'),
+        datetime=OuterRef('datetime')
+    )
+    rows = list(
+        PolarHeartRate.objects.filter(
+            datetime__gte=five_minutes_ago,
+            datetime__lt=now,
+            username__isnull=False,
+            date_of_birth__isnull=False
+        ).exclude(
+            username=''
+        ).alias(
+            is_processed=Exists(processed)
+        ).filter(
+            is_processed=False
+        ).order_by('username', 'date_of_birth', 'datetime').values_list(
+            'device_id', 'datetime', 'hr', 'rr', 'username', 'date_of_birth'
+        )
+    )
     
-    if not recent_data.exists():
+    if not rows:
         print("처리할 데이터가 없습니다.")
         return
     
-    # 사용자별로 그룹화
-    users = recent_data.values_list('username', 'date_of_birth').distinct()
-    
-    total_processed = 0
-    total_outliers = 0
-    
-    for username, date_of_birth in users:
-        if not username or not date_of_birth:
-            continue
-        
-        # 해당 사용자의 최근 5분 데이터
-        user_data = recent_data.filter(
+    # 사용자별 그룹 번호 (username, date_of_birth 순으로 정렬되어 있음)
+    users = []
+    codes = np.empty(len(rows), dtype=np.intp)
+    for i, row in enumerate(rows):
+        if not users or users[-1] != (row[4], row[5]):
+            users.append((row[4], row[5]))
+        codes[i] = len(users) - 1
+
+    hr = np.array([row[2] for row in rows], dtype=float)
+    rr = np.array([row[3] if row[3] is not None else 0 for row in rows], dtype=float)
+
+    # 사용자별 통계 (0 값은 제외)
+    hr_valid = hr > 0
+    rr_valid = rr > 0
+    hr_mean, hr_std = grouped_mean_std(codes, hr, hr_valid, len(users))
+    rr_mean, rr_std = grouped_mean_std(codes, rr, rr_valid, len(users))
+
+    # 이상치 (3 표준편차) - 0이 아닌 경우만, 평균으로 대체
+    with np.errstate(invalid='ignore'):
+        hr_outlier = hr_valid & (hr_std[codes] > 0) & (np.abs(hr - hr_mean[codes]) > 3 * hr_std[codes])
+        rr_outlier = rr_valid & (rr_std[codes] > 0) & (np.abs(rr - rr_mean[codes]) > 3 * rr_std[codes])
+    hr_replacement = np.rint(np.nan_to_num(hr_mean)).astype(int)
+    rr_replacement = np.rint(np.nan_to_num(rr_mean)).astype(int)
+
+    nn_objects = []
+    for i, (device_id, dt, row_hr, row_rr, username, date_of_birth) in enumerate(rows):
+        code = codes[i]
+        new_hr = row_hr  # polar_heart_rate_nn.hr은 NOT NULL이므로 0은 그대로 저장 (HRV 계산에서 제외됨)
+        new_rr = row_rr if rr_valid[i] else None
+        original_hr = None
+        original_rr = None
+
+        if hr_outlier[i]:
+            original_hr = row_hr
+            new_hr = int(hr_replacement[code])
+
+        if rr_outlier[i]:
+            original_rr = row_rr
+            new_rr = int(rr_replacement[code])
+
+        nn_objects.append(PolarHeartRateNN(
+            device_id=device_id,
+            datetime=dt,
+            hr=new_hr,
+            rr=new_rr,
             username=username,
-            date_of_birth=date_of_birth
-        )
-        
-        # 이미 처리된 데이터인지 확인 (중복 방지)
-        processed_datetimes = set(
-            PolarHeartRateNN.objects.filter(
-                username=username,
-                date_of_birth=date_of_birth,
-                datetime__gte=five_minutes_ago,
-                datetime__lt=now
-            ).values_list('datetime', flat=True)
-        )
-        
-        # 미처리 데이터만 필터링
-        new_data = [d for d in user_data if d.datetime not in processed_datetimes]
-        
-        if not new_data:
-            continue
-        
-        print(f"\n처리 중: {username} ({date_of_birth}) - {len(new_data)}개 데이터")
-        
-        # HR과 RR 값 추출 (0 값은 제외)
-        hr_values = [d.hr for d in new_data if d.hr is not None and d.hr > 0]
-        rr_values = [d.rr for d in new_data if d.rr is not None and d.rr > 0]
-        
-        # 통계 계산
-        hr_mean = np.mean(hr_values) if hr_values else None
-        hr_std = np.std(hr_values) if len(hr_values) > 1 else None
-        rr_mean = np.mean(rr_values) if rr_values else None
-        rr_std = np.std(rr_values) if len(rr_values) > 1 else None
-        
-        hr_mean_str = f"{hr_mean:.1f}" if hr_mean is not None else "N/A"
-        hr_std_str = f"{hr_std:.1f}" if hr_std is not None else "N/A"
-        rr_mean_str = f"{rr_mean:.1f}" if rr_mean is not None else "N/A"
-        rr_std_str = f"{rr_std:.1f}" if rr_std is not None else "N/A"
+            date_of_birth=date_of_birth,
+            is_outlier_removed=bool(hr_outlier[i] or rr_outlier[i]),
+            original_hr=original_hr,
+            original_rr=original_rr
+        ))
+
+    with transaction.atomic():
+        PolarHeartRateNN.objects.bulk_create(nn_objects, batch_size=BULK_CREATE_BATCH_SIZE)
+
+    # 사용자별 결과 출력
+    user_counts = np.bincount(codes, minlength=len(users))
+    user_outliers = np.bincount(codes, weights=hr_outlier.astype(int) + rr_outlier.astype(int), minlength=len(users))
+    for code, (username, date_of_birth) in enumerate(users):
+        hr_mean_str = f"{hr_mean[code]:.1f}" if not np.isnan(hr_mean[code]) else "N/A"
+        hr_std_str = f"{hr_std[code]:.1f}" if not np.isnan(hr_std[code]) else "N/A"
+        rr_mean_str = f"{rr_mean[code]:.1f}" if not np.isnan(rr_mean[code]) else "N/A"
+        rr_std_str = f"{rr_std[code]:.1f}" if not np.isnan(rr_std[code]) else "N/A"
+        print(f"\n처리 완료: {username} ({date_of_birth}) - {user_counts[code]}개 데이터, 이상치 제거: {int(user_outliers[code])}개")
         print(f"  HR: mean={hr_mean_str}, std={hr_std_str}")
         print(f"  RR: mean={rr_mean_str}, std={rr_std_str}")
-        
-        # 이상치 제거 및 저장
-        outliers_count = 0
-        for data in new_data:
-            is_outlier = False
-            new_hr = data.hr if data.hr > 0 else None
-            new_rr = data.rr if data.rr is not None and data.rr > 0 else None
-            original_hr = None
-            original_rr = None
-
-            # HR 이상치 체크 (3 표준편차) - 0이 아닌 경우만
-            if new_hr is not None and hr_mean is not None and hr_std is not None and hr_std > 0:
-                if abs(data.hr - hr_mean) > 3 * hr_std:
-                    is_outlier = True
-                    original_hr = data.hr
-                    new_hr = int(round(hr_mean))
-                    outliers_count += 1
-
-            # RR 이상치 체크 (3 표준편차) - 0이 아닌 경우만
-            if new_rr is not None and rr_mean is not None and rr_std is not None and rr_std > 0:
-                if abs(data.rr - rr_mean) > 3 * rr_std:
-                    is_outlier = True
-                    original_rr = data.rr
-                    new_rr = int(round(rr_mean))
-                    outliers_count += 1
-
-            # polar_heart_rate_nn에 저장
-            PolarHeartRateNN.objects.create(
-                device_id=data.device_id,
-                datetime=data.datetime,
-                hr=new_hr,
-                rr=new_rr,
-                username=data.username,
-                date_of_birth=data.date_of_birth,
-                is_outlier_removed=is_outlier,
-                original_hr=original_hr,
-                original_rr=original_rr
-            )
-        
-        total_processed += len(new_data)
-        total_outliers += outliers_count
-        
-        print(f"  처리 완료: {len(new_data)}개, 이상치 제거: {outliers_count}개")
-    
-    print(f"\n전체 처리 완료: {total_processed}개 데이터, {total_outliers}개 이상치 제거")
+
+    total_outliers = int(hr_outlier.sum() + rr_outlier.sum())
+    print(f"\n전체 처리 완료: {len(rows)}개 데이터, {total_outliers}개 이상치 제거")
 
 
 if __name__ == '__main__':
     try:
         remove_outliers_and_save()
         
+        # HRV 지표를 stream_polar_hrv 명령이 증분 계산하는 경우 일괄 계산 생략
+        from fitbit.hrv_stream import is_hrv_streaming_enabled
+        if is_hrv_streaming_enabled():
+            print("\nPOLAR_HRV_STREAMING 사용 중: HRV 지표는 stream_polar_hrv가 계산")
+            sys.exit(0)
+        
         # 이상치 제거 완료 후, HRV 지표 계산 스크립트 실행
         print("\n" + "="*50)
         print("HRV 지표 계산 시작...")
@@ -15,8 +15,10 @@ django.setup()
 
 # Django 모델 및 함수 import
 from fitbit.models import FitbitUser
-from fitbit.data_sync import sync_recent_intraday_data
-from fitbit.token_refresh import refresh_access_token
+from fitbit.data_sync import sync_incremental_intraday_data
+from fitbit.token_refresh import run_with_valid_token
+from fitbit.sync_executor import run_user_syncs
+from fitbit.rate_limit import fitbit_rate_limiter
 
 
 def log_message(message):
@@ -25,9 +27,63 @@ def log_message(message):
     print(f"[{timestamp}] {message}")
 
 
+def sync_user(fitbit_user):
+    """사용자 1명의 Intraday 증분 동기화 (스레드 풀에서 실행)"""
+    # 다른 프로세스가 예산을 소진해 리셋까지 오래 남은 사용자는 요청하지 않고 다음 실행으로 미룸
+    defer_seconds = fitbit_rate_limiter.get_defer_seconds(fitbit_user.fitbit_user_id)
+    if defer_seconds is not None:
+        return {
+            'success': False,
+            'error': f"Rate Limit 예산 소진, {defer_seconds:.0f}초 후 리셋 (다음 실행으로 연기)",
+        }
+
+    log_message(f"[{fitbit_user.fitbit_user_id}] 동기화 시작...")
+
+    # 마지막 저장 분(워터마크) 이후 데이터 동기화 (토큰은 만료가 가까울 때나 401 응답 시에만 갱신)
+    return run_with_valid_token(
+        fitbit_user,
+        lambda user: sync_incremental_intraday_data(
+            user.fitbit_user_id,
+            user.access_token
+        )
+    )
+
+
+def format_budget(fitbit_user_id):
+    """사용자의 남은 Fitbit API 요청 예산 (로그용)"""
+    budget = fitbit_rate_limiter.get_budget(fitbit_user_id)
+    if not budget:
+        return ""
+    return f", API 예산: {budget['remaining']}/{budget['limit']}"
+
+
+def log_user_result(item):
+    """사용자별 동기화 결과 로그"""
+    result = item['result']
+
+    if item['success']:
+        log_message(
+            f"[{item['fitbit_user_id']}] 성공 ({item['elapsed']:.1f}초) - "
+            f"HR: {result['intraday_hr']}, "
+            f"Steps: {result['intraday_steps']}, "
+            f"Calories: {result['intraday_calories']}, "
+            f"Distance: {result['intraday_distance']}, "
+            f"Floors: {result['intraday_floors']}, "
+            f"Elevation: {result['intraday_elevation']}, "
+            f"SpO2: {result['intraday_spo2']}, "
+            f"HRV: {result['intraday_hrv']}"
+            f"{format_budget(item['fitbit_user_id'])}"
+        )
+    else:
+        log_message(
+            f"[{item['fitbit_user_id']}] 실패 - "
+            f"Error: {item.get('error') or 'Unknown'}"
+        )
+
+
 def sync_all_users():
-    """모든 사용자의 최근 5분 데이터를 동기화"""
-    log_message("=== Fitbit 최근 5분 데이터 동기화 시작 ===")
+    """모든 사용자의 최신 Intraday 데이터를 증분 동기화"""
+    log_message("=== Fitbit Intraday 증분 동기화 시작 ===")
 
     # 모든 FitbitUser 가져오기
     fitbit_users = FitbitUser.objects.all()
@@ -39,53 +95,12 @@ def sync_all_users():
 
     log_message(f"총 {total_users}명의 사용자 데이터 동기화 시작")
 
-    success_count = 0
-    fail_count = 0
-
-    # 각 사용자별로 동기화
-    for fitbit_user in fitbit_users:
-        try:
-            log_message(f"[{fitbit_user.fitbit_user_id}] 동기화 시작...")
-
-            # 토큰 갱신 (매번 갱신해서 만료 방지)
-            if not refresh_access_token(fitbit_user):
-                log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
-                fail_count += 1
-                continue
-
-            # 최근 5분 데이터 동기화
-            result = sync_recent_intraday_data(
-                fitbit_user.fitbit_user_id,
-                fitbit_user.access_token,
-                minutes_back=5
-            )
-
-            if result['success']:
-                log_message(
-                    f"[{fitbit_user.fitbit_user_id}] 성공 - "
-                    f"HR: {result['intraday_hr']}, "
-                    f"Steps: {result['intraday_steps']}, "
-                    f"Calories: {result['intraday_calories']}, "
-                    f"Distance: {result['intraday_distance']}, "
-                    f"Floors: {result['intraday_floors']}, "
-                    f"Elevation: {result['intraday_elevation']}, "
-                    f"SpO2: {result['intraday_spo2']}, "
-                    f"HRV: {result['intraday_hrv']}"
-                )
-                success_count += 1
-            else:
-                log_message(
-                    f"[{fitbit_user.fitbit_user_id}] 실패 - "
-                    f"Error: {result.get('error', 'Unknown')}"
-                )
-                fail_count += 1
-
-        except Exception as e:
-            log_message(f"[{fitbit_user.fitbit_user_id}] 예외 발생: {e}")
-            fail_count += 1
+    summary = run_user_syncs(fitbit_users, sync_user, on_result=log_user_result)
 
     log_message(
-        f"=== 동기화 완료 - 성공: {success_count}, 실패: {fail_count} ==="
+        f"=== 동기화 완료 - 성공: {summary['success_count']}, "
+        f"실패: {summary['fail_count']} (timeout: {summary['timeout_count']}), "
+        f"소요: {summary['elapsed']:.1f}초 ==="
     )
 
 
@@ -16,7 +16,7 @@ django.setup()
 # Django 모델 및 함수 import
 from fitbit.models import FitbitUser
 from fitbit.data_sync import sync_daily_health_data
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 
 
 def log_message(message):
@@ -51,8 +51,8 @@ def sync_all_users_daily_health():
         try:
             log_message(f"[{fitbit_user.fitbit_user_id}] 동기화 시작...")
 
-            # 토큰 갱신
-            if not refresh_access_token(fitbit_user):
+            # 토큰 갱신 (만료가 가까울 때만)
+            if not ensure_valid_token(fitbit_user):
                 log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
                 fail_count += 1
                 continue
@@ -16,7 +16,7 @@ django.setup()
 # Django 모델 및 함수 import
 from fitbit.models import FitbitUser
 from fitbit.data_sync import sync_fitbit_data_for_date
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 
 
 def log_message(message):
@@ -50,8 +50,8 @@ def sync_all_users_yesterday():
         try:
             log_message(f"[{fitbit_user.fitbit_user_id}] 어제 데이터 동기화 시작...")
 
-            # 토큰 갱신 (매번 갱신해서 만료 방지)
-            if not refresh_access_token(fitbit_user):
+            # 토큰 갱신 (만료가 가까울 때만)
+            if not ensure_valid_token(fitbit_user):
                 log_message(f"[{fitbit_user.fitbit_user_id}] 토큰 갱신 실패 - 스킵")
                 fail_count += 1
                 continue
@@ -25,7 +25,7 @@ from fitbit.data_sync import (
     save_breathing_rate,
     save_skin_temperature
 )
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 
 
 def log_message(message):
@@ -48,9 +48,9 @@ def test_sleep_data_collection():
         fitbit_user = FitbitUser.objects.get(fitbit_user_id=test_user_id)
         log_message(f"유저 찾음: {fitbit_user.fitbit_user_id}")
 
-        # 토큰 갱신
-        log_message("액세스 토큰 갱신 중...")
-        if not refresh_access_token(fitbit_user):
+        # 토큰 갱신 (만료가 가까울 때만)
+        log_message("액세스 토큰 확인 중...")
+        if not ensure_valid_token(fitbit_user):
             log_message("❌ 토큰 갱신 실패")
             return False
 
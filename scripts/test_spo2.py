@@ -15,7 +15,7 @@ django.setup()
 from fitbit.models import FitbitUser
 from fitbit.fitbit_api import get_spo2_intraday_data
 from fitbit.data_sync import save_intraday_spo2
-from fitbit.token_refresh import refresh_access_token
+from fitbit.token_refresh import ensure_valid_token
 
 
 def test_spo2():
@@ -32,8 +32,8 @@ def test_spo2():
     try:
         fitbit_user = FitbitUser.objects.get(fitbit_user_id=test_user_id)
 
-        # 토큰 갱신
-        if not refresh_access_token(fitbit_user):
+        # 토큰 갱신 (만료가 가까울 때만)
+        if not ensure_valid_token(fitbit_user):
             print("❌ 토큰 갱신 실패")
             return
 